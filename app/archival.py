@@ -0,0 +1,71 @@
+"""
+Background archival of old orders (hot/cold storage).
+
+Orders older than ``settings.archive_after_days`` are periodically moved out
+of the hot ``orders`` table into monthly archives, keeping the hot table
+small, in the default store and in every configured location's store.
+``get_order`` still finds archived orders.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from .config import settings
+from .database import OrderStore
+from .tenants import get_tenant_registry
+
+logger = logging.getLogger(__name__)
+
+
+def archive_cutoff(max_age_days: int, now: Optional[datetime] = None) -> str:
+    """
+    Compute the archival cutoff timestamp.
+
+    Args:
+        max_age_days: Orders older than this many days are archived
+        now: Current time (defaults to UTC now)
+
+    Returns:
+        UTC timestamp in the orders table format ("YYYY-MM-DD HH:MM:SS")
+    """
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def run_archival(store: OrderStore, max_age_days: int) -> int:
+    """Archive expired orders once, off the event loop."""
+    cutoff = archive_cutoff(max_age_days)
+    return await asyncio.to_thread(store.archive_orders, cutoff)
+
+
+async def archival_loop(get_store: Callable[[], OrderStore]) -> None:
+    """
+    Run archival every ``settings.archive_interval_minutes`` until cancelled.
+
+    Args:
+        get_store: Returns the current order store (resolved on every run)
+    """
+    interval = settings.archive_interval_minutes * 60
+    logger.info(
+        f"Order archival enabled: older than {settings.archive_after_days} days, "
+        f"every {settings.archive_interval_minutes} min"
+    )
+    while True:
+        try:
+            await run_archival(get_store(), settings.archive_after_days)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Order archival failed: {e}", exc_info=True)
+        registry = get_tenant_registry()
+        if registry is not None:
+            cutoff = archive_cutoff(settings.archive_after_days)
+            try:
+                await asyncio.to_thread(registry.archive_orders, cutoff)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Location order archival failed: {e}", exc_info=True)
+        await asyncio.sleep(interval)
@@ -0,0 +1,375 @@
+"""
+Chat traffic capture and offline replay.
+
+With ``CHAT_CAPTURE_FILE`` set, every answered chat message (``POST /chat``
+and each ``/ws/chat`` turn) is appended to that file as one JSON line::
+
+    {"ts": 1718000000.123, "channel": "http", "session": "1a2b3c4d", "message": "any burgers?",
+     "vip": false, "path": "menu_items", "ms": 3.2, "response": "Dude, we've got ..."}
+
+``path`` is how the answer was produced (see ``tobi_ai.answer_path``) and
+``ms`` the time spent producing it. Lines are written by a background thread
+(``jsonl_writer``); a name ending in ``.gz`` keeps the file gzip-compressed.
+
+The replay tool sends a capture's messages again, in-process (``order_turn``
+then ``get_tobi_response_async``, as ``/chat`` does) or to a running
+server's ``/chat``, at the original pace (``--speed 1``), faster
+(``--speed 10``) or back to back (``--speed 0``), and compares latency and
+the answer-path distribution with the capture (or two result files with
+each other)::
+
+    python -m app.chat_capture replay logs/chat.jsonl --speed 10 -o after.jsonl
+    python -m app.chat_capture replay logs/chat.jsonl --url http://localhost:8000 --speed 0 --concurrency 8
+    python -m app.chat_capture compare before.jsonl after.jsonl
+
+Each captured session is replayed as a session of its own, carrying its
+draft order from message to message, and its messages are sent in order.
+No order is ever placed: in-process, confirmations are answered without
+touching the database; against a server, a message that would confirm a
+draft is not sent and is reported as ``skipped``.
+
+Replaying against a server counts ``429`` responses as errors, so run the
+server under test with ``RATE_LIMIT_ENABLED=false``.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import math
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional
+
+from .config import settings
+from .jsonl_writer import JSONLinesWriter
+
+logger = logging.getLogger(__name__)
+
+# Replay target: (message, VIP flag, captured session) -> (response, answer path)
+Target = Callable[[str, bool, str], Awaitable[tuple[str, Optional[str]]]]
+
+_writer: Optional[JSONLinesWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _capture_writer() -> Optional[JSONLinesWriter]:
+    global _writer
+    path = settings.chat_capture_file
+    if not path:
+        return None
+    if _writer is None or _writer.path != path:
+        with _writer_lock:
+            if _writer is None or _writer.path != path:
+                _writer = JSONLinesWriter(path)
+    return _writer
+
+
+def capture_chat(
+    channel: str,
+    session_id: str,
+    message: str,
+    vip: bool,
+    path: Optional[str],
+    seconds: float,
+    response: str,
+) -> None:
+    """
+    Record one answered chat message (does nothing unless ``CHAT_CAPTURE_FILE`` is set).
+
+    Args:
+        channel: "http" or "ws"
+        session_id: Chat session (only its first 8 characters are kept)
+        message: Customer's message
+        vip: Whether the customer was treated as a VIP
+        path: How the answer was produced (``tobi_ai.answer_path()``)
+        seconds: Time spent producing the answer
+        response: Tobi's answer
+    """
+    writer = _capture_writer()
+    if writer is None:
+        return
+    writer.submit(
+        {
+            "ts": round(time.time(), 3),
+            "channel": channel,
+            "session": session_id[:8],
+            "message": message,
+            "vip": vip,
+            "path": path,
+            "ms": round(seconds * 1000, 3),
+            "response": response,
+        }
+    )
+
+
+def read_capture(path: str) -> Iterator[dict]:
+    """Records of a capture (or replay results) file; malformed lines are skipped."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"{path}:{line_number}: not JSON, skipped")
+                continue
+            if isinstance(record, dict) and isinstance(record.get("message"), str):
+                yield record
+
+
+# ===== Replay =====
+async def replay(records: list[dict], target: Target, speed: float = 1.0, concurrency: int = 1) -> list[dict]:
+    """
+    Send captured messages to a target again.
+
+    Args:
+        records: Captured records, oldest first
+        target: Coroutine answering one message
+        speed: Pace relative to the capture (1 = original timing, 10 = ten
+            times faster); 0 sends back to back with ``concurrency`` in flight
+        concurrency: Messages in flight at once when ``speed`` is 0
+
+    Returns:
+        One result per record, in the capture's order and format (plus
+        ``error`` for messages that failed)
+    """
+    results: list[Optional[dict]] = [None] * len(records)
+
+    async def run(i: int) -> None:
+        results[i] = await _replay_one(records[i], target)
+
+    if speed > 0:
+        # Open loop: each message is sent at its (scaled) original time, however slow the answers are
+        loop = asyncio.get_running_loop()
+        first_ts, start = (records[0]["ts"] if records else 0.0), loop.time()
+        tasks = []
+        for i, record in enumerate(records):
+            delay = (record.get("ts", first_ts) - first_ts) / speed - (loop.time() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run(i)))
+        await asyncio.gather(*tasks)
+    else:
+        pending = iter(range(len(records)))
+
+        async def worker() -> None:
+            for i in pending:
+                await run(i)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results  # type: ignore[return-value]
+
+
+class Skipped(Exception):
+    """A message the replay did not send (it would have placed a real order)."""
+
+
+async def _replay_one(record: dict, target: Target) -> dict:
+    start = time.perf_counter()
+    result = {key: record.get(key) for key in ("ts", "channel", "session", "message", "vip")}
+    try:
+        response, path = await target(record["message"], bool(record.get("vip")), str(record.get("session") or ""))
+        result.update(path=path, response=response)
+    except Skipped as e:
+        result.update(path=None, response=None, skipped=str(e))
+    except Exception as e:
+        result.update(path=None, response=None, error=f"{type(e).__name__}: {e}")
+    result["ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+@dataclass
+class _Conversation:
+    """One captured session as it is replayed."""
+
+    session_id: str  # Session id the replay uses
+    draft: Any = None  # Draft order carried to the next message (as the target sends it)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # Keeps the session's messages in order
+
+
+class _Conversations(dict):
+    """Captured session -> its replay conversation (session ids are new for every run)."""
+
+    def __init__(self):
+        super().__init__()
+        self.run = uuid.uuid4().hex[:8]
+
+    def __missing__(self, session: str) -> _Conversation:
+        conversation = self[session] = _Conversation(f"replay-{self.run}-{session}")
+        return conversation
+
+
+def in_process_target() -> Target:
+    """Answer with this checkout's code (``order_turn``, then ``get_tobi_response_async``); no order is placed."""
+    from .chat_orders import order_turn
+    from .tobi_ai import answer_path, get_tobi_response_async
+
+    conversations = _Conversations()
+
+    async def send(message: str, vip: bool, session: str) -> tuple[str, Optional[str]]:
+        conversation = conversations[session]
+        async with conversation.lock:
+            ordered = await order_turn(message, conversation.draft, conversation.session_id, _unplaced_order)
+            if ordered is not None:
+                conversation.draft = ordered.draft
+                return ordered.response, ordered.path
+            response = await get_tobi_response_async(message, vip)
+            return response, answer_path()
+
+    return send
+
+
+def _unplaced_order(items: list, session_id: str):
+    """Stands in for placing an order during a replay (priced like one; the database is not touched)."""
+    from .menu_versions import current_menu
+    from .models import OrderResponse
+
+    items, total_cents = current_menu().index.price_order(items)
+    return OrderResponse(
+        success=True, order_number=0, items=items, total=total_cents / 100, message="Replayed, not placed"
+    )
+
+
+def http_target(client, url: str) -> Target:
+    """
+    Answer through a running server's ``POST /chat``.
+
+    The answer path comes from the ``X-Answer-Path`` response header. A
+    message that would confirm the session's draft is not sent (``Skipped``).
+    """
+    from .order_parser import confirmation
+
+    endpoint = url.rstrip("/") + "/chat"
+    conversations = _Conversations()
+
+    async def send(message: str, vip: bool, session: str) -> tuple[str, Optional[str]]:
+        conversation = conversations[session]
+        async with conversation.lock:
+            if conversation.draft is not None and confirmation(message):
+                conversation.draft = None  # As if it had been placed
+                raise Skipped("would place an order")
+            body = {"message": message, "session_id": conversation.session_id, "draft_order": conversation.draft}
+            response = await client.post(endpoint, json=body)
+            response.raise_for_status()
+            data = response.json()
+            conversation.draft = data.get("draft_order")
+            return data["response"], response.headers.get("x-answer-path")
+
+    return send
+
+
+# ===== Reports =====
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (0 for an empty list)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))]
+
+
+def summarize(records: Iterable[dict]) -> dict:
+    """Request count, errors, skipped messages, latency percentiles (ms) and answer-path shares of a run."""
+    latencies, paths, errors, skipped, count = [], Counter(), 0, 0, 0
+    for record in records:
+        count += 1
+        if record.get("error"):
+            errors += 1
+            continue
+        if record.get("skipped"):
+            skipped += 1
+            continue
+        latencies.append(float(record.get("ms") or 0.0))
+        paths[record.get("path") or "unknown"] += 1
+    latencies.sort()
+    answered = count - errors - skipped
+    return {
+        "requests": count,
+        "errors": errors,
+        "skipped": skipped,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+        "paths": {path: n / answered for path, n in paths.most_common()} if answered else {},
+    }
+
+
+def format_comparison(baseline: list[dict], candidate: list[dict], names: tuple[str, str]) -> str:
+    """Side-by-side latency and answer-path report of two runs over the same traffic."""
+    before, after = summarize(baseline), summarize(candidate)
+    lines = [f"{'':<22}{names[0]:>14}{names[1]:>14}"]
+    for key in ("requests", "errors", "skipped"):
+        lines.append(f"{key:<22}{before[key]:>14}{after[key]:>14}")
+    for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        change = f"  ({(after[key] - before[key]) / before[key]:+.0%})" if before[key] else ""
+        lines.append(f"{key:<22}{before[key]:>14.2f}{after[key]:>14.2f}{change}")
+    lines.append("answer paths")
+    for path in dict.fromkeys([*before["paths"], *after["paths"]]):
+        lines.append(f"  {path:<20}{before['paths'].get(path, 0):>14.1%}{after['paths'].get(path, 0):>14.1%}")
+
+    # Same messages in the same order (a replay of the other run): count answers that took another path
+    if len(baseline) == len(candidate) and all(a["message"] == b["message"] for a, b in zip(baseline, candidate)):
+        changed = sum(
+            1
+            for a, b in zip(baseline, candidate)
+            if not any(r.get("error") or r.get("skipped") for r in (a, b)) and a["path"] != b["path"]
+        )
+        lines.append(f"changed paths: {changed} of {len(baseline)} messages")
+    return "\n".join(lines)
+
+
+def _main(argv: Optional[list[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m app.chat_capture", description="Replay captured chat traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="Send a capture's messages again and compare with it")
+    replay_parser.add_argument("capture", help="Capture file (.jsonl or .jsonl.gz)")
+    replay_parser.add_argument("--url", help="Running server to replay against (default: in-process)")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Pace multiplier; 0 = back to back")
+    replay_parser.add_argument("--concurrency", type=int, default=1, help="In-flight messages with --speed 0")
+    replay_parser.add_argument("--limit", type=int, help="Replay only the first N messages")
+    replay_parser.add_argument("-o", "--output", help="Write the replay results here (same format as a capture)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two capture or replay result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        baseline, candidate = list(read_capture(args.baseline)), list(read_capture(args.candidate))
+        print(format_comparison(baseline, candidate, ("baseline", "candidate")))
+        return 0
+
+    records = list(read_capture(args.capture))[: args.limit]
+    if not records:
+        print(f"No chat messages in {args.capture}", file=sys.stderr)
+        return 1
+
+    async def run() -> list[dict]:
+        if not args.url:
+            return await replay(records, in_process_target(), args.speed, args.concurrency)
+        import httpx
+
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            return await replay(records, http_target(client, args.url), args.speed, args.concurrency)
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    print(f"Replayed {len(results)} messages in {time.perf_counter() - start:.1f}s ({args.url or 'in-process'})\n")
+    print(format_comparison(records, results, ("capture", "replay")))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return 1 if any(result.get("error") for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,130 @@
+"""
+Ordering through chat.
+
+When a chat message reads like an order ("two smash burgers and a negroni",
+see ``order_parser``), Tobi answers with a draft of it and its total instead
+of asking the LLM. Later order messages add to the draft; "yes" places it
+the way ``POST /order`` does and "no" drops it. Anything else is left to the
+normal chat path, draft untouched.
+
+The draft travels with the conversation rather than living in one worker's
+memory: ``POST /chat`` returns it as ``draft_order`` and the client sends it
+back with the next message (any worker can then place it). ``/ws/chat``
+also keeps it on the connection's session. A draft sent by the client is
+re-priced from the menu, so it cannot change what an order costs.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .menu_index import UnknownMenuItemError, to_cents
+from .menu_versions import current_menu
+from .models import OrderItem, OrderItemRequest, OrderRequest, OrderResponse
+from .order_parser import MAX_QUANTITY, ParsedOrder, confirmation
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Places an order: (items, session_id) -> the created order (blocking; run in a thread)
+PlaceOrder = Callable[[list[OrderItemRequest], str], OrderResponse]
+
+
+@dataclass(frozen=True)
+class OrderTurn:
+    """Tobi's answer to a message about ordering."""
+
+    path: str  # "order_draft", "order_clarify", "order_placed", "order_cancelled" or "order_failed"
+    response: str
+    draft: Optional[OrderRequest] = None  # The draft after this message (None once placed or dropped)
+    order: Optional[OrderResponse] = None  # The order placed by this message
+
+
+async def order_turn(
+    message: str, draft: Optional[OrderRequest], session_id: str, place_order: PlaceOrder
+) -> Optional[OrderTurn]:
+    """
+    Answer a message that orders, or that confirms or drops a draft.
+
+    Args:
+        message: Customer's message
+        draft: The conversation's draft order, if any
+        session_id: Chat session the order belongs to
+        place_order: Creates the order once the customer confirms
+
+    Returns:
+        Tobi's answer, or None if the message is not about ordering
+    """
+    draft = _repriced(draft)
+    with span("order_parse"):
+        parsed = current_menu().orders.parse(message)
+    if parsed is not None:
+        return _draft(draft, parsed, session_id)
+
+    if draft is None:
+        return None
+    confirmed = confirmation(message)
+    if confirmed is None:
+        return None
+    if not confirmed:
+        return OrderTurn("order_cancelled", "No worries dude, I tossed that order. What else can I get ya?")
+
+    try:
+        # A blocking database write: keep it off the event loop
+        order = await asyncio.to_thread(place_order, draft.items, session_id)
+    except (UnknownMenuItemError, ValueError) as e:
+        logger.warning(f"Chat order failed - Session: {session_id[:8]}... | {e}")
+        return OrderTurn("order_failed", f"Bummer dude, I couldn't put that order in ({e}). Wanna try again?")
+    return OrderTurn(
+        "order_placed",
+        f"Order #{order.order_number} is in! {_describe(order.items)} - ${order.total:.2f}. "
+        "Your food will be ready shortly, bro!",
+        order=order,
+    )
+
+
+def _repriced(draft: Optional[OrderRequest]) -> Optional[OrderRequest]:
+    """A draft with menu names and prices; items no longer on the menu are dropped."""
+    if draft is None:
+        return None
+    index = current_menu().index
+    items = [
+        OrderItem(name=entry.name, price=entry.price, quantity=min(item.quantity, MAX_QUANTITY))
+        for item in draft.items
+        if (entry := index.get(item.name)) is not None
+    ]
+    return OrderRequest(items=items, session_id=draft.session_id) if items else None
+
+
+def _draft(draft: Optional[OrderRequest], parsed: ParsedOrder, session_id: str) -> OrderTurn:
+    """Add parsed items to the draft and read it back."""
+    question = ""
+    if parsed.ambiguous:
+        phrase, names = next(iter(parsed.ambiguous.items()))
+        question = f"which {phrase} are you feeling: {_join(names, 'or')}?"
+
+    if parsed.items:
+        items = {item.name: item for item in draft.items} if draft else {}
+        for item in parsed.items:
+            earlier = items.get(item.name)
+            quantity = min(item.quantity + (earlier.quantity if earlier else 0), MAX_QUANTITY)
+            items[item.name] = item.model_copy(update={"quantity": quantity})
+        draft = OrderRequest(items=list(items.values()), session_id=session_id)
+
+    if draft is None:
+        return OrderTurn("order_clarify", f"Dude, {question}")
+
+    total_cents = sum(to_cents(item.price) * item.quantity for item in draft.items)
+    response = f"Sweet! {_describe(draft.items)} - ${total_cents / 100:.2f} total. Say yes to lock it in!"
+    if question:
+        response += f" Oh, and {question}"
+    return OrderTurn("order_draft", response, draft)
+
+
+def _describe(items: list[OrderItem]) -> str:
+    return _join([f"{item.quantity}x {item.name}" for item in items], "and")
+
+
+def _join(words: list[str], conjunction: str) -> str:
+    return words[0] if len(words) == 1 else f"{', '.join(words[:-1])} {conjunction} {words[-1]}"
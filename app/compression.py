@@ -0,0 +1,108 @@
+"""
+HTTP compression and conditional-request helpers for pre-built responses.
+
+Bodies are compressed once (gzip, and brotli when the optional ``brotli``
+package is installed) and the best variant is picked per request from
+``Accept-Encoding``. Each variant has its own strong ETag (``"<hash>"``,
+``"<hash>-gzip"``, ``"<hash>-br"``), since a strong ETag promises identical
+bytes and the encodings of one body differ.
+"""
+
+import gzip
+import hashlib
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+
+def compress_variants(body: bytes) -> dict[str, bytes]:
+    """
+    Pre-compress a body into every supported encoding.
+
+    Returns:
+        Mapping of content-coding ("identity", "gzip", "br") to bytes.
+        Compressed variants that are not smaller than the original are dropped.
+    """
+    variants = {"identity": body}
+    # mtime=0 keeps the output (and therefore caches) deterministic
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(gzipped) < len(body):
+        variants["gzip"] = gzipped
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        if len(compressed) < len(body):
+            variants["br"] = compressed
+    return variants
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong ETag derived from the content hash."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """ETag of one encoding of a body (``strong_etag`` of the body for identity)."""
+    return etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """
+    Pick the best available content-coding for an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Raw header value (None if absent)
+        available: Codings that have a pre-built variant
+
+    Returns:
+        "br", "gzip" or "identity"
+    """
+    if not accept_encoding:
+        return "identity"
+
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            qualities[coding] = quality
+
+    wildcard = qualities.get("*")
+    best, best_quality = "identity", 0.0
+    for coding in ENCODING_PREFERENCE:
+        if coding not in available:
+            continue
+        quality = qualities.get(coding, wildcard if wildcard is not None else (1.0 if coding == "identity" else 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` header against a body's ETag, in any of its encodings.
+
+    Uses weak comparison, as RFC 9110 requires: a client holding the gzip
+    variant still has the current content.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    variants = {variant_etag(etag, encoding) for encoding in ENCODING_PREFERENCE}
+    return any(tag.strip().removeprefix("W/") in variants for tag in if_none_match.split(","))
@@ -23,10 +23,52 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./data/orders.db"
 
+    # Seconds a SQLite writer waits for another process's write lock
+    sqlite_busy_timeout_seconds: float = 5.0
+
+    # Production server (python -m app.server); 0 workers = one per CPU
+    workers: int = 0
+    graceful_timeout_seconds: float = 30.0  # In-flight requests get this long on shutdown/restart
+
+    # Menu caching (seconds clients may reuse /menu before revalidating)
+    menu_cache_max_age: int = 300
+
+    # Static files (seconds clients may reuse a plain /static URL before revalidating;
+    # fingerprinted URLs are cached for a year)
+    static_cache_max_age: int = 300
+
+    # Menu source: JSON file shaped like MENU_DATA (unset = built-in menu), polled for changes
+    menu_file: Optional[str] = None
+    menu_reload_interval_seconds: float = 5.0
+
+    # Semantic menu search (hashed n-gram embeddings) when keyword matching finds nothing
+    menu_search_dim: int = 256  # Embedding size; the item matrix is items x dim float32
+    menu_search_min_score: float = 0.25  # Cosine similarity below which an item is not a match
+
+    # Multiple locations: JSON file of location id -> config (unset = single location)
+    tenants_file: Optional[str] = None
+    tenant_idle_seconds: float = 1800.0  # Unload a location's menu, store and caches after this long unused
+    tenant_max_loaded: int = 50
+
+    # Order archival (hot/cold storage); 0 disables the background job
+    archive_after_days: int = 90
+    archive_interval_minutes: int = 60
+
     # AI Model (Optional - for future llama.cpp integration)
     llama_server_url: Optional[str] = None
     use_local_ai: bool = False
 
+    # LLM prompt size: relevant menu items in full, the rest summarized, within a token budget
+    llm_prompt_token_budget: int = 1024  # 0 = no limit
+    llm_prompt_max_items: int = 8  # Matching menu items included in full
+    llm_token_cache_size: int = 4096  # Cached /tokenize results (menu pieces)
+
+    # Load-adaptive generation: fewer tokens, shorter prompts, templates for simple intents under load
+    llm_adaptive_generation: bool = True
+    llm_max_in_flight: int = 4  # llama-server calls in flight per worker above which generation steps down
+    llm_adapt_step_seconds: float = 5.0  # Minimum time between steps down
+    llm_adapt_recover_seconds: float = 30.0  # Minimum time between steps back up
+
     # Security
     secret_key: str = "dev-secret-key-change-in-production"
 
@@ -36,6 +78,61 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     log_file: str = "logs/app.log"
+    log_format: str = "text"  # text or json
+    log_max_bytes: int = 10 * 1024 * 1024  # Rotate the log file at this size
+    log_backup_count: int = 5
+    log_queue_size: int = 10000  # Records beyond this are dropped instead of blocking
+    log_sample_rates: str = ""  # e.g. "app.main=0.1,app.tobi_ai=0.5" (INFO and below only)
+
+    # Per-request profiling (cProfile + tracemalloc), triggered by header or sampling
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"
+    profiling_token: Optional[str] = None  # If set, the header value must match it
+    profiling_sample_rate: float = 0.0  # Fraction of requests profiled without the header
+    profiling_dir: str = "logs/profiles"
+    profiling_max_files: int = 50  # Profiles kept on disk
+
+    # If set, /debug/* endpoints (profiles, traces) require this value in the X-Debug-Token header
+    debug_token: Optional[str] = None
+
+    # In-process request tracing (spans per stage, served at /debug/traces)
+    tracing_enabled: bool = False
+    tracing_buffer_size: int = 200  # Finished traces kept in memory per process
+    tracing_export_file: Optional[str] = None  # Also append traces here as OTLP/JSON lines
+    tracing_service_name: str = "restaurant-ai"
+
+    # Chat traffic capture for offline replay (python -m app.chat_capture replay ...)
+    chat_capture_file: Optional[str] = None  # JSON Lines, gzip-compressed if it ends in .gz
+
+    # Health monitoring (background probes, cached for /health endpoints)
+    health_check_interval_seconds: float = 10.0
+
+    # Chat rate limiting (token buckets: rate in requests/second, burst = bucket size)
+    rate_limit_enabled: bool = True
+    chat_rate_per_ip: float = 5.0
+    chat_burst_per_ip: float = 30.0
+    chat_rate_per_session: float = 1.0
+    chat_burst_per_session: float = 10.0
+    chat_global_max_rate: float = 50.0  # Global rate while llama-server is fast
+    chat_global_min_rate: float = 2.0  # Floor while shedding load
+    chat_global_burst: float = 100.0
+    llm_latency_target_seconds: float = 5.0  # Shed load while average LLM latency is above this
+    rate_limit_idle_seconds: float = 600.0  # Evict buckets idle this long
+
+    # WebSocket chat (/ws/chat) and chat sessions
+    ws_idle_timeout_seconds: float = 300.0  # Close connections with no message for this long
+    ws_send_timeout_seconds: float = 10.0  # Disconnect clients that stop reading
+    ws_max_connections: int = 1000  # Per worker process
+    chat_session_max: int = 10000
+    chat_session_idle_seconds: float = 1800.0
+    chat_history_turns: int = 3  # Earlier turns included in the LLM prompt
+
+    # Order status Server-Sent Events (/orders/events)
+    sse_heartbeat_seconds: float = 15.0  # Keep-alive comment interval (keeps proxies from timing out)
+    sse_buffer_size: int = 100  # Events buffered per subscriber before the oldest are dropped
+
+    # Fast JSON path: model_validate_json / model_dump_json / orjson
+    fast_json: bool = False
 
     # Feature Flags
     enable_magic_password: bool = True
@@ -65,7 +162,7 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
-# Ensure required directories exist
+# Ensure required directories exist (called on application startup, not on import)
 def ensure_directories():
     """Create necessary directories if they don't exist."""
     base_dir = Path(__file__).parent.parent
@@ -78,7 +175,3 @@ def ensure_directories():
 
     for directory in directories:
         directory.mkdir(parents=True, exist_ok=True)
-
-
-# Run on import
-ensure_directories()
@@ -1,30 +1,309 @@
 """
 Database operations for order management.
+
+Orders are persisted through an ``OrderStore`` backend chosen from
+``settings.database_url``:
+
+- ``sqlite:///path/to/orders.db`` - built-in SQLite store (default)
+- ``memory://`` or ``sqlite:///:memory:`` - in-process store for tests and benchmarks
+- anything else (``postgresql://...``) - SQLAlchemy store (requires ``sqlalchemy``)
+
+Endpoints receive the store through the ``get_db`` FastAPI dependency.
 """
 
-import sqlite3
 import json
 import logging
+import heapq
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, Union
 from contextlib import contextmanager
 
 from .config import settings
+from .menu_versions import current_menu
+from .tenants import current_tenant
+from .order_status import apply_transitions
+from .tracing import record_span, span
+
+if TYPE_CHECKING:
+    import sqlite3
 
 logger = logging.getLogger(__name__)
 
 
-class Database:
-    """Simple SQLite database manager."""
+def _serialize_items(items: list) -> list[dict]:
+    """Convert order items (Pydantic models or dicts) into plain dicts."""
+    return [item.model_dump() if hasattr(item, "model_dump") else dict(item) for item in items]
+
+
+def _sqlite_connect(path: Path) -> "sqlite3.Connection":
+    """
+    Open a SQLite connection that can share its file with other worker processes.
+
+    Writers wait up to ``sqlite_busy_timeout_seconds`` for the lock instead of
+    failing immediately, and write transactions start with ``BEGIN IMMEDIATE``
+    so a transaction never reads under a shared lock and then hits
+    ``SQLITE_BUSY`` when it tries to upgrade to a write.
+    """
+    import sqlite3  # Deferred: only the SQLite store needs it
+
+    conn = sqlite3.connect(str(path), timeout=settings.sqlite_busy_timeout_seconds, isolation_level="IMMEDIATE")
+    # Safe with WAL: a crash can lose the last commits but never corrupts the file
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _utc_timestamp() -> str:
+    """Timestamp in the same format as SQLite's CURRENT_TIMESTAMP."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to ``size`` items without materializing the iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _compute_rollup(items: list[dict], total: float, created_at: str) -> dict:
+    """
+    Compute the analytics deltas contributed by a single order.
+
+    Args:
+        items: Serialized order items
+        total: Order total
+        created_at: Order timestamp ("YYYY-MM-DD HH:MM:SS", UTC)
+
+    Returns:
+        Dict with per-item (category, quantity, revenue) and per-category
+        (quantity, revenue) deltas, the hour bucket and order-level totals
+    """
+    by_item: dict[str, tuple[str, int, float]] = {}
+    by_category: dict[str, tuple[int, float]] = {}
+    menu_index = current_menu().index
+    for item in items:
+        name = item["name"]
+        category = menu_index.category(name)
+        quantity = item.get("quantity", 1)
+        revenue = item["price"] * quantity
+        _, item_quantity, item_revenue = by_item.get(name, (category, 0, 0.0))
+        by_item[name] = (category, item_quantity + quantity, item_revenue + revenue)
+        category_quantity, category_revenue = by_category.get(category, (0, 0.0))
+        by_category[category] = (category_quantity + quantity, category_revenue + revenue)
+
+    return {
+        "items": by_item,
+        "categories": by_category,
+        "hour": f"{created_at[:13]}:00",
+        "item_count": sum(quantity for _, quantity, _ in by_item.values()),
+        "revenue": total,
+    }
+
+
+def _format_summary(totals: tuple, top_items: list, categories: list, hourly: list) -> dict:
+    """Shape rollup rows into the analytics summary returned by every store."""
+    orders, items_sold, revenue = totals
+    return {
+        "totals": {"orders": orders, "items_sold": items_sold, "revenue": round(revenue, 2)},
+        "top_items": [
+            {"name": name, "category": category, "quantity": quantity, "revenue": round(item_revenue, 2)}
+            for name, category, quantity, item_revenue in top_items
+        ],
+        "categories": [
+            {"category": category, "quantity": quantity, "revenue": round(category_revenue, 2)}
+            for category, quantity, category_revenue in categories
+        ],
+        # Newest hours are selected first; report them in chronological order
+        "hourly_revenue": [
+            {"hour": hour, "orders": hour_orders, "revenue": round(hour_revenue, 2)}
+            for hour, hour_orders, hour_revenue in reversed(hourly)
+        ],
+    }
+
+
+class SalesRollup:
+    """Running sales aggregates: totals, per item, per category and per hour."""
 
     def __init__(self):
-        # Extract path from database URL
-        if settings.database_url.startswith("sqlite:///"):
-            db_path = settings.database_url.replace("sqlite:///", "")
-            self.db_path = Path(db_path)
-        else:
-            # Default fallback
-            self.db_path = Path("data/orders.db")
+        self.orders = 0
+        self.items_sold = 0
+        self.revenue = 0.0
+        self.by_item: dict[str, list] = {}
+        self.by_category: dict[str, list] = {}
+        self.by_hour: dict[str, list] = {}
+
+    def add(self, rollup: dict) -> None:
+        """Fold one order's deltas (from ``_compute_rollup``) into the aggregates."""
+        self.orders += 1
+        self.items_sold += rollup["item_count"]
+        self.revenue += rollup["revenue"]
+        for name, (category, quantity, revenue) in rollup["items"].items():
+            row = self.by_item.setdefault(name, [category, 0, 0.0])
+            row[1] += quantity
+            row[2] += revenue
+        for category, (quantity, revenue) in rollup["categories"].items():
+            row = self.by_category.setdefault(category, [0, 0.0])
+            row[0] += quantity
+            row[1] += revenue
+        row = self.by_hour.setdefault(rollup["hour"], [0, 0.0])
+        row[0] += 1
+        row[1] += rollup["revenue"]
+
+    def summary(self, top_n: int, hours: int) -> dict:
+        """Build the analytics summary from the aggregates."""
+        top_items = heapq.nlargest(
+            top_n, ((name, *row) for name, row in self.by_item.items()), key=lambda row: (row[3], row[2])
+        )
+        categories = sorted(((category, *row) for category, row in self.by_category.items()), key=lambda r: -r[2])
+        hourly = [(hour, *self.by_hour[hour]) for hour in heapq.nlargest(hours, self.by_hour)]
+        return _format_summary((self.orders, self.items_sold, self.revenue), top_items, categories, hourly)
+
+
+class OrderStore(ABC):
+    """Storage interface for orders."""
+
+    @abstractmethod
+    def init_db(self) -> None:
+        """Initialize the storage schema."""
+
+    @abstractmethod
+    def get_order_count(self) -> int:
+        """Get total number of orders, archived ones included (order numbers are derived from it)."""
+
+    @abstractmethod
+    def create_order(self, order_number: int, session_id: str, items: list, total: float) -> bool:
+        """
+        Create a new order.
+
+        Raises:
+            ValueError: If the order number already exists (live or archived)
+        """
+
+    @abstractmethod
+    def get_order(self, order_number: int) -> Optional[dict]:
+        """Retrieve an order by order number."""
+
+    @abstractmethod
+    def list_orders(self, limit: int = 50, offset: int = 0, session_id: Optional[str] = None) -> list[dict]:
+        """List orders, newest first, optionally filtered by session."""
+
+    @abstractmethod
+    def update_order_status(self, order_number: int, status: str) -> bool:
+        """Set the status of an order. Returns False if the order does not exist."""
+
+    @abstractmethod
+    def transition_order_statuses(self, changes: list[tuple[int, str]]) -> list[dict]:
+        """
+        Apply status changes through the order state machine in one transaction.
+
+        Invalid transitions and unknown orders are reported, not raised; the
+        valid changes are still applied.
+
+        Args:
+            changes: (order_number, new status) pairs, applied in order
+
+        Returns:
+            Per-change dicts with "order_number", "ok", "previous_status",
+            "status", "error" (and "session_id" for existing orders)
+        """
+
+    @abstractmethod
+    def get_sales_summary(self, top_n: int = 5, hours: int = 24) -> dict:
+        """
+        Read sales analytics from the rollups (never scans the orders table).
+
+        Args:
+            top_n: Number of best-selling items to return
+            hours: Number of most recent hour buckets to return
+
+        Returns:
+            Dict with "totals", "top_items", "categories" and "hourly_revenue"
+        """
+
+    @abstractmethod
+    def rebuild_rollups(self) -> None:
+        """Recompute every sales rollup from scratch from the orders table."""
+
+    @abstractmethod
+    def iter_orders(
+        self, since: Optional[str] = None, until: Optional[str] = None, chunk_size: int = 500
+    ) -> Iterator[list[dict]]:
+        """
+        Stream hot-table orders oldest first in fixed-size chunks.
+
+        Each chunk is fetched with its own short query (keyset pagination on
+        the primary key), so memory stays constant and no read transaction is
+        held open between chunks.
+
+        Args:
+            since: Only orders created at or after this UTC timestamp
+            until: Only orders created before this UTC timestamp
+            chunk_size: Orders per chunk
+
+        Yields:
+            Lists of order dicts including ``session_id``
+        """
+
+    @abstractmethod
+    def import_orders(self, orders: Iterable[dict], batch_size: int = 500) -> dict:
+        """
+        Bulk-load orders in batched transactions, updating the sales rollups.
+
+        Orders whose number already exists, live or archived, are skipped.
+
+        Args:
+            orders: Order dicts (order_number, session_id, items, total, status, created_at)
+            batch_size: Orders per transaction
+
+        Returns:
+            Dict with "imported" and "skipped" counts
+        """
+
+    @abstractmethod
+    def archive_orders(self, cutoff: str, batch_size: int = 500) -> int:
+        """
+        Move orders created before ``cutoff`` out of the hot table into monthly archives.
+
+        Archived orders stay reachable through ``get_order`` and are still
+        counted by the sales rollups.
+
+        Args:
+            cutoff: UTC timestamp ("YYYY-MM-DD HH:MM:SS"); older orders are archived
+            batch_size: Orders moved per transaction
+
+        Returns:
+            Number of orders archived
+        """
+
+    @abstractmethod
+    def health_check(self) -> bool:
+        """Check if the store is accessible."""
+
+    def close(self) -> None:
+        """Release pooled connections (stores that open a connection per call have none)."""
+
+    def after_fork(self) -> None:
+        """Forget pooled connections inherited from the parent process, without closing them (theirs, not ours)."""
+
+
+class Database(OrderStore):
+    """Simple SQLite database manager."""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+        if db_path is None:
+            # Extract path from database URL
+            if settings.database_url.startswith("sqlite:///"):
+                db_path = settings.database_url.replace("sqlite:///", "")
+            else:
+                # Default fallback
+                db_path = "data/orders.db"
+        self.db_path = Path(db_path)
+        # Cold storage: one SQLite file per month of archived orders
+        self.archive_dir = self.db_path.parent / "archive"
 
         # Ensure parent directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -34,12 +313,19 @@ class Database:
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(str(self.db_path))
+        """Context manager for database connections (traced as db.connect, db.query and db.commit)."""
+        with span("db.connect"):
+            conn = _sqlite_connect(self.db_path)
+        # Timed by hand: the caller's block may be a generator resumed in another context
+        query_start = time.time_ns()
         try:
             yield conn
+            commit_start = time.time_ns()
+            record_span("db.query", query_start, commit_start)
             conn.commit()
+            record_span("db.commit", commit_start)
         except Exception as e:
+            record_span("db.query", query_start, rolled_back=True)
             conn.rollback()
             logger.error(f"Database error: {e}", exc_info=True)
             raise
@@ -49,6 +335,8 @@ class Database:
     def init_db(self):
         """Initialize database schema."""
         with self.get_connection() as conn:
+            # WAL lets readers in every worker process run alongside the single writer
+            conn.execute("PRAGMA journal_mode=WAL")
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -79,28 +367,112 @@ class Database:
             """
             )
 
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_created_at
+                ON orders(created_at)
+            """
+            )
+
+            # Which monthly archive holds an archived order number
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_orders (
+                    order_number INTEGER PRIMARY KEY,
+                    month TEXT NOT NULL
+                )
+            """
+            )
+
+            # Sales rollups, maintained incrementally on every insert
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sales_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    orders INTEGER NOT NULL DEFAULT 0,
+                    items INTEGER NOT NULL DEFAULT 0,
+                    revenue REAL NOT NULL DEFAULT 0
+                )
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sales_by_item (
+                    item_name TEXT PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    revenue REAL NOT NULL
+                )
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_sales_by_item_revenue
+                ON sales_by_item(revenue DESC)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sales_by_category (
+                    category TEXT PRIMARY KEY,
+                    quantity INTEGER NOT NULL,
+                    revenue REAL NOT NULL
+                )
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sales_by_hour (
+                    hour TEXT PRIMARY KEY,
+                    orders INTEGER NOT NULL,
+                    revenue REAL NOT NULL
+                )
+            """
+            )
+
+            # Backfill rollups for databases created before they existed
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM orders), EXISTS (SELECT 1 FROM sales_totals)")
+            has_orders, has_rollups = cursor.fetchone()
+            if has_orders and not has_rollups:
+                self._rebuild_rollups(conn)
+
             logger.info(f"Database initialized at {self.db_path}")
 
     def get_order_count(self) -> int:
-        """Get total number of orders."""
+        """Get total number of orders, archived ones included."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM orders")
+            cursor.execute("SELECT (SELECT COUNT(*) FROM orders) + (SELECT COUNT(*) FROM archived_orders)")
             count = cursor.fetchone()[0]
             return count
 
     def create_order(self, order_number: int, session_id: str, items: list, total: float) -> bool:
         """Create a new order."""
+        import sqlite3
+
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                serialized = _serialize_items(items)
+                created_at = _utc_timestamp()
                 cursor.execute(
                     """
-                    INSERT INTO orders (order_number, session_id, items, total, status)
-                    VALUES (?, ?, ?, ?, ?)
+                    INSERT INTO orders (order_number, session_id, items, total, status, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                    (order_number, session_id, json.dumps([item.dict() for item in items]), total, "confirmed"),
+                    (order_number, session_id, json.dumps(serialized), total, "confirmed", created_at),
                 )
+                # Checked after the insert, which holds the write lock: archival cannot move it meanwhile
+                cursor.execute("SELECT 1 FROM archived_orders WHERE order_number = ?", (order_number,))
+                if cursor.fetchone():
+                    raise sqlite3.IntegrityError("order number is archived")
+
+                # Same transaction: the rollups never drift from the orders table
+                self._apply_rollup(cursor, _compute_rollup(serialized, total, created_at))
 
                 logger.info(f"Order {order_number} created successfully")
                 return True
@@ -117,7 +489,7 @@ class Database:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT order_number, items, total, status, created_at
+                SELECT order_number, items, total, status, created_at, session_id
                 FROM orders
                 WHERE order_number = ?
             """,
@@ -127,7 +499,10 @@ class Database:
             result = cursor.fetchone()
 
             if not result:
-                return None
+                # Fall back to cold storage
+                cursor.execute("SELECT month FROM archived_orders WHERE order_number = ?", (order_number,))
+                archived = cursor.fetchone()
+                return self._get_archived_order(archived[0], order_number) if archived else None
 
             return {
                 "order_number": result[0],
@@ -135,8 +510,335 @@ class Database:
                 "total": result[2],
                 "status": result[3],
                 "created_at": result[4],
+                "session_id": result[5],
             }
 
+    def list_orders(self, limit: int = 50, offset: int = 0, session_id: Optional[str] = None) -> list[dict]:
+        """List orders, newest first, optionally filtered by session."""
+        query = "SELECT order_number, items, total, status, created_at FROM orders"
+        params: list[Any] = []
+        if session_id is not None:
+            query += " WHERE session_id = ?"
+            params.append(session_id)
+        query += " ORDER BY id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [
+                {
+                    "order_number": row[0],
+                    "items": json.loads(row[1]),
+                    "total": row[2],
+                    "status": row[3],
+                    "created_at": row[4],
+                }
+                for row in cursor.fetchall()
+            ]
+
+    def update_order_status(self, order_number: int, status: str) -> bool:
+        """Set the status of an order."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE orders SET status = ? WHERE order_number = ?", (status, order_number))
+            return cursor.rowcount > 0
+
+    def transition_order_statuses(self, changes: list[tuple[int, str]]) -> list[dict]:
+        """Apply status changes through the order state machine in one transaction."""
+        order_numbers = list(dict.fromkeys(order_number for order_number, _ in changes))
+        with self.get_connection() as conn:
+            # Take the write lock before reading, so no other process changes a status in between
+            conn.execute("BEGIN IMMEDIATE")
+            current = {}
+            for batch in _batched(order_numbers, 500):
+                placeholders = ",".join("?" * len(batch))
+                query = f"SELECT order_number, status, session_id FROM orders WHERE order_number IN ({placeholders})"
+                rows = conn.execute(query, batch)  # nosec B608 - placeholders only
+                current.update({row[0]: {"status": row[1], "session_id": row[2]} for row in rows})
+
+            results, writes = apply_transitions(current, changes)
+            conn.executemany(
+                "UPDATE orders SET status = ? WHERE order_number = ?",
+                [(status, order_number) for order_number, status in writes.items()],
+            )
+        return results
+
+    def iter_orders(
+        self, since: Optional[str] = None, until: Optional[str] = None, chunk_size: int = 500
+    ) -> Iterator[list[dict]]:
+        """Stream hot-table orders oldest first in fixed-size chunks."""
+        query = "SELECT id, order_number, session_id, items, total, status, created_at FROM orders WHERE id > ?"
+        filters: list[Any] = []
+        if since is not None:
+            query += " AND created_at >= ?"
+            filters.append(since)
+        if until is not None:
+            query += " AND created_at < ?"
+            filters.append(until)
+        query += " ORDER BY id LIMIT ?"
+
+        last_id = 0
+        while True:
+            with self.get_connection() as conn:
+                rows = conn.execute(query, [last_id, *filters, chunk_size]).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [
+                {
+                    "order_number": row[1],
+                    "session_id": row[2],
+                    "items": json.loads(row[3]),
+                    "total": row[4],
+                    "status": row[5],
+                    "created_at": row[6],
+                }
+                for row in rows
+            ]
+            if len(rows) < chunk_size:
+                return
+
+    def import_orders(self, orders: Iterable[dict], batch_size: int = 500) -> dict:
+        """Bulk-load orders in batched transactions."""
+        imported = skipped = 0
+        for batch in _batched(orders, batch_size):
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                for order in batch:
+                    items = _serialize_items(order["items"])
+                    created_at = order.get("created_at") or _utc_timestamp()
+                    cursor.execute(
+                        """
+                        INSERT OR IGNORE INTO orders (order_number, session_id, items, total, status, created_at)
+                        SELECT ?, ?, ?, ?, ?, ?
+                        WHERE NOT EXISTS (SELECT 1 FROM archived_orders WHERE order_number = ?)
+                    """,
+                        (
+                            order["order_number"],
+                            order.get("session_id"),
+                            json.dumps(items),
+                            order["total"],
+                            order.get("status") or "confirmed",
+                            created_at,
+                            order["order_number"],
+                        ),
+                    )
+                    if cursor.rowcount:
+                        self._apply_rollup(cursor, _compute_rollup(items, order["total"], created_at))
+                        imported += 1
+                    else:
+                        skipped += 1
+
+        logger.info(f"Imported {imported} orders ({skipped} skipped as duplicates)")
+        return {"imported": imported, "skipped": skipped}
+
+    @staticmethod
+    def _apply_rollup(cursor, rollup: dict) -> None:
+        """Fold one order's deltas into the rollup tables."""
+        cursor.execute(
+            """
+            INSERT INTO sales_totals (id, orders, items, revenue) VALUES (1, 1, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                orders = orders + 1, items = items + excluded.items, revenue = revenue + excluded.revenue
+        """,
+            (rollup["item_count"], rollup["revenue"]),
+        )
+        cursor.executemany(
+            """
+            INSERT INTO sales_by_item (item_name, category, quantity, revenue) VALUES (?, ?, ?, ?)
+            ON CONFLICT(item_name) DO UPDATE SET
+                quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+        """,
+            [(name, category, quantity, revenue) for name, (category, quantity, revenue) in rollup["items"].items()],
+        )
+        cursor.executemany(
+            """
+            INSERT INTO sales_by_category (category, quantity, revenue) VALUES (?, ?, ?)
+            ON CONFLICT(category) DO UPDATE SET
+                quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+        """,
+            [(category, quantity, revenue) for category, (quantity, revenue) in rollup["categories"].items()],
+        )
+        cursor.execute(
+            """
+            INSERT INTO sales_by_hour (hour, orders, revenue) VALUES (?, 1, ?)
+            ON CONFLICT(hour) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue
+        """,
+            (rollup["hour"], rollup["revenue"]),
+        )
+
+    def _rebuild_rollups(self, conn) -> None:
+        """Recompute rollups inside an open transaction."""
+        rollup = SalesRollup()
+        for archive_path in sorted(self.archive_dir.glob("orders-*.db")):
+            with self._archive_connection(archive_path.stem.removeprefix("orders-")) as archive:
+                for items, total, created_at in archive.execute(
+                    "SELECT items, total, created_at FROM orders ORDER BY id"
+                ):
+                    rollup.add(_compute_rollup(json.loads(items), total, created_at))
+        for items, total, created_at in conn.execute("SELECT items, total, created_at FROM orders ORDER BY id"):
+            rollup.add(_compute_rollup(json.loads(items), total, created_at))
+
+        cursor = conn.cursor()
+        for table in ("sales_totals", "sales_by_item", "sales_by_category", "sales_by_hour"):
+            cursor.execute(f"DELETE FROM {table}")  # nosec B608 - fixed table names
+        cursor.execute(
+            "INSERT INTO sales_totals (id, orders, items, revenue) VALUES (1, ?, ?, ?)",
+            (rollup.orders, rollup.items_sold, rollup.revenue),
+        )
+        cursor.executemany(
+            "INSERT INTO sales_by_item (item_name, category, quantity, revenue) VALUES (?, ?, ?, ?)",
+            [(name, *row) for name, row in rollup.by_item.items()],
+        )
+        cursor.executemany(
+            "INSERT INTO sales_by_category (category, quantity, revenue) VALUES (?, ?, ?)",
+            [(category, *row) for category, row in rollup.by_category.items()],
+        )
+        cursor.executemany(
+            "INSERT INTO sales_by_hour (hour, orders, revenue) VALUES (?, ?, ?)",
+            [(hour, *row) for hour, row in rollup.by_hour.items()],
+        )
+
+    def rebuild_rollups(self) -> None:
+        """Recompute every sales rollup from scratch from the orders table."""
+        with self.get_connection() as conn:
+            self._rebuild_rollups(conn)
+        logger.info("Sales rollups rebuilt")
+
+    @contextmanager
+    def _archive_connection(self, month: str):
+        """Context manager for the archive database of one month ("YYYY-MM")."""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        conn = _sqlite_connect(self.archive_dir / f"orders-{month}.db")
+        try:
+            # Archived rows keep their hot-table id
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS orders (
+                    id INTEGER PRIMARY KEY,
+                    order_number INTEGER NOT NULL,
+                    session_id TEXT,
+                    items TEXT NOT NULL,
+                    total REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_order_number ON orders(order_number)")
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Archive database error ({month}): {e}", exc_info=True)
+            raise
+        finally:
+            conn.close()
+
+    def _get_archived_order(self, month: str, order_number: int) -> Optional[dict]:
+        """Retrieve the latest archived order with this number from a monthly archive."""
+        with self._archive_connection(month) as conn:
+            result = conn.execute(
+                """
+                SELECT order_number, items, total, status, created_at, session_id
+                FROM orders
+                WHERE order_number = ?
+                ORDER BY id DESC
+                LIMIT 1
+            """,
+                (order_number,),
+            ).fetchone()
+
+        if not result:
+            return None
+
+        return {
+            "order_number": result[0],
+            "items": json.loads(result[1]),
+            "total": result[2],
+            "status": result[3],
+            "created_at": result[4],
+            "session_id": result[5],
+        }
+
+    def archive_orders(self, cutoff: str, batch_size: int = 500) -> int:
+        """Move orders older than ``cutoff`` into per-month archive databases."""
+        with self.get_connection() as conn:
+            kept = conn.execute(
+                """
+                SELECT COUNT(*) FROM orders
+                WHERE created_at < ? AND order_number IN (SELECT order_number FROM archived_orders)
+            """,
+                (cutoff,),
+            ).fetchone()[0]
+        if kept:
+            logger.warning(f"{kept} orders kept in the hot table: their order numbers are already archived")
+
+        archived = 0
+        while True:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT id, order_number, session_id, items, total, status, created_at
+                    FROM orders
+                    WHERE created_at < ? AND order_number NOT IN (SELECT order_number FROM archived_orders)
+                    ORDER BY created_at
+                    LIMIT ?
+                """,
+                    (cutoff, batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+
+                by_month: dict[str, list[tuple]] = {}
+                for row in rows:
+                    by_month.setdefault(row[6][:7], []).append(row)
+
+                # Archive writes commit first, so a crash before the delete below
+                # only means the batch is copied again (idempotent by id)
+                for month, month_rows in by_month.items():
+                    with self._archive_connection(month) as archive:
+                        archive.executemany("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)", month_rows)
+
+                # Never replaces: an archived order number is never taken again
+                conn.executemany(
+                    "INSERT INTO archived_orders (order_number, month) VALUES (?, ?)",
+                    [(row[1], row[6][:7]) for row in rows],
+                )
+                conn.executemany("DELETE FROM orders WHERE id = ?", [(row[0],) for row in rows])
+
+            archived += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        if archived:
+            logger.info(f"Archived {archived} orders created before {cutoff}")
+        return archived
+
+    def get_sales_summary(self, top_n: int = 5, hours: int = 24) -> dict:
+        """Read sales analytics from the rollup tables."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT orders, items, revenue FROM sales_totals WHERE id = 1")
+            totals = cursor.fetchone() or (0, 0, 0.0)
+            cursor.execute(
+                """
+                SELECT item_name, category, quantity, revenue
+                FROM sales_by_item
+                ORDER BY revenue DESC, quantity DESC
+                LIMIT ?
+            """,
+                (top_n,),
+            )
+            top_items = cursor.fetchall()
+            cursor.execute("SELECT category, quantity, revenue FROM sales_by_category ORDER BY revenue DESC")
+            categories = cursor.fetchall()
+            cursor.execute("SELECT hour, orders, revenue FROM sales_by_hour ORDER BY hour DESC LIMIT ?", (hours,))
+            hourly = cursor.fetchall()
+
+        return _format_summary(totals, top_items, categories, hourly)
+
     def health_check(self) -> bool:
         """Check if database is accessible."""
         try:
@@ -149,5 +851,649 @@ class Database:
             return False
 
 
-# Global database instance
-db = Database()
+class MemoryDatabase(OrderStore):
+    """In-process order store for tests and benchmarks (no disk I/O)."""
+
+    def __init__(self):
+        self._orders: dict[int, dict] = {}
+        # Cold storage: month ("YYYY-MM") -> order number -> order
+        self._archive: dict[str, dict[int, dict]] = {}
+        self._archived_month: dict[int, str] = {}
+        self._rollup = SalesRollup()
+        self._lock = threading.Lock()
+
+    def init_db(self) -> None:
+        """Nothing to initialize for the in-memory store."""
+
+    def get_order_count(self) -> int:
+        """Get total number of orders, archived ones included."""
+        return len(self._orders) + len(self._archived_month)
+
+    def create_order(self, order_number: int, session_id: str, items: list, total: float) -> bool:
+        """Create a new order."""
+        with self._lock:
+            if order_number in self._orders or order_number in self._archived_month:
+                logger.error(f"Order number {order_number} already exists")
+                raise ValueError(f"Order number {order_number} already exists")
+            order = {
+                "order_number": order_number,
+                "session_id": session_id,
+                "items": _serialize_items(items),
+                "total": total,
+                "status": "confirmed",
+                "created_at": _utc_timestamp(),
+            }
+            self._orders[order_number] = order
+            self._rollup.add(_compute_rollup(order["items"], total, order["created_at"]))
+        logger.info(f"Order {order_number} created successfully")
+        return True
+
+    def get_order(self, order_number: int) -> Optional[dict]:
+        """Retrieve an order by order number."""
+        order = self._orders.get(order_number)
+        if order is None:
+            month = self._archived_month.get(order_number)
+            order = self._archive[month].get(order_number) if month else None
+        if order is None:
+            return None
+        return {key: order[key] for key in ("order_number", "items", "total", "status", "created_at", "session_id")}
+
+    def list_orders(self, limit: int = 50, offset: int = 0, session_id: Optional[str] = None) -> list[dict]:
+        """List orders, newest first, optionally filtered by session."""
+        with self._lock:
+            orders = list(self._orders.values())
+        if session_id is not None:
+            orders = [order for order in orders if order["session_id"] == session_id]
+        orders.reverse()
+        return [self.get_order(order["order_number"]) for order in orders[offset : offset + limit]]
+
+    def update_order_status(self, order_number: int, status: str) -> bool:
+        """Set the status of an order."""
+        with self._lock:
+            order = self._orders.get(order_number)
+            if order is None:
+                return False
+            order["status"] = status
+            return True
+
+    def transition_order_statuses(self, changes: list[tuple[int, str]]) -> list[dict]:
+        """Apply status changes through the order state machine atomically."""
+        with self._lock:
+            current = {
+                order_number: self._orders[order_number] for order_number, _ in changes if order_number in self._orders
+            }
+            results, writes = apply_transitions(current, changes)
+            for order_number, status in writes.items():
+                self._orders[order_number]["status"] = status
+        return results
+
+    def iter_orders(
+        self, since: Optional[str] = None, until: Optional[str] = None, chunk_size: int = 500
+    ) -> Iterator[list[dict]]:
+        """Stream orders oldest first in fixed-size chunks."""
+        with self._lock:
+            orders = list(self._orders.values())
+        matching = (
+            {key: order[key] for key in ("order_number", "session_id", "items", "total", "status", "created_at")}
+            for order in orders
+            if (since is None or order["created_at"] >= since) and (until is None or order["created_at"] < until)
+        )
+        yield from _batched(matching, chunk_size)
+
+    def import_orders(self, orders: Iterable[dict], batch_size: int = 500) -> dict:
+        """Bulk-load orders in batches."""
+        imported = skipped = 0
+        for batch in _batched(orders, batch_size):
+            with self._lock:
+                for order in batch:
+                    if order["order_number"] in self._orders or order["order_number"] in self._archived_month:
+                        skipped += 1
+                        continue
+                    record = {
+                        "order_number": order["order_number"],
+                        "session_id": order.get("session_id"),
+                        "items": _serialize_items(order["items"]),
+                        "total": order["total"],
+                        "status": order.get("status") or "confirmed",
+                        "created_at": order.get("created_at") or _utc_timestamp(),
+                    }
+                    self._orders[record["order_number"]] = record
+                    self._rollup.add(_compute_rollup(record["items"], record["total"], record["created_at"]))
+                    imported += 1
+
+        logger.info(f"Imported {imported} orders ({skipped} skipped as duplicates)")
+        return {"imported": imported, "skipped": skipped}
+
+    def get_sales_summary(self, top_n: int = 5, hours: int = 24) -> dict:
+        """Read sales analytics from the running aggregates."""
+        with self._lock:
+            return self._rollup.summary(top_n, hours)
+
+    def rebuild_rollups(self) -> None:
+        """Recompute every sales rollup from scratch from the stored orders."""
+        rollup = SalesRollup()
+        with self._lock:
+            archived = [order for month in sorted(self._archive) for order in self._archive[month].values()]
+            for order in archived + list(self._orders.values()):
+                rollup.add(_compute_rollup(order["items"], order["total"], order["created_at"]))
+            self._rollup = rollup
+
+    def archive_orders(self, cutoff: str, batch_size: int = 500) -> int:
+        """Move orders older than ``cutoff`` into per-month archives."""
+        with self._lock:
+            expired = [order for order in self._orders.values() if order["created_at"] < cutoff]
+            kept = [order for order in expired if order["order_number"] in self._archived_month]
+            if kept:
+                logger.warning(f"{len(kept)} orders kept in the hot table: their order numbers are already archived")
+                expired = [order for order in expired if order["order_number"] not in self._archived_month]
+            for order in expired:
+                month = order["created_at"][:7]
+                self._archive.setdefault(month, {})[order["order_number"]] = order
+                self._archived_month[order["order_number"]] = month
+                del self._orders[order["order_number"]]
+
+        if expired:
+            logger.info(f"Archived {len(expired)} orders created before {cutoff}")
+        return len(expired)
+
+    def health_check(self) -> bool:
+        """The in-memory store is always available."""
+        return True
+
+
+class SQLAlchemyDatabase(OrderStore):
+    """Order store for server databases (PostgreSQL, MySQL, ...) via SQLAlchemy Core."""
+
+    def __init__(self, database_url: str):
+        try:
+            import sqlalchemy as sa
+        except ImportError as e:
+            raise ImportError(
+                f"DATABASE_URL '{database_url}' requires SQLAlchemy. Install with: pip install sqlalchemy"
+            ) from e
+
+        self._sa = sa
+        self.engine = sa.create_engine(database_url, pool_pre_ping=True, future=True)
+        self.metadata = sa.MetaData()
+        self.orders = sa.Table(
+            "orders",
+            self.metadata,
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("order_number", sa.Integer, unique=True, nullable=False, index=True),
+            sa.Column("session_id", sa.String(64), index=True),
+            sa.Column("items", sa.Text, nullable=False),
+            sa.Column("total", sa.Float, nullable=False),
+            sa.Column("status", sa.String(32), nullable=False, server_default="pending"),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.current_timestamp()),
+            # Never reuse ids: archived rows keep them
+            sqlite_autoincrement=True,
+        )
+
+        # Cold storage: archived orders partitioned by month ("YYYY-MM")
+        self.orders_archive = sa.Table(
+            "orders_archive",
+            self.metadata,
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column("order_number", sa.Integer, nullable=False, index=True),
+            sa.Column("session_id", sa.String(64)),
+            sa.Column("items", sa.Text, nullable=False),
+            sa.Column("total", sa.Float, nullable=False),
+            sa.Column("status", sa.String(32), nullable=False),
+            sa.Column("created_at", sa.DateTime, nullable=False),
+            sa.Column("month", sa.String(7), nullable=False, index=True),
+        )
+
+        # Sales rollups, maintained incrementally on every insert
+        self.sales_totals = sa.Table(
+            "sales_totals",
+            self.metadata,
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column("orders", sa.Integer, nullable=False),
+            sa.Column("items", sa.Integer, nullable=False),
+            sa.Column("revenue", sa.Float, nullable=False),
+        )
+        self.sales_by_item = sa.Table(
+            "sales_by_item",
+            self.metadata,
+            sa.Column("item_name", sa.String(200), primary_key=True),
+            sa.Column("category", sa.String(64), nullable=False),
+            sa.Column("quantity", sa.Integer, nullable=False),
+            sa.Column("revenue", sa.Float, nullable=False, index=True),
+        )
+        self.sales_by_category = sa.Table(
+            "sales_by_category",
+            self.metadata,
+            sa.Column("category", sa.String(64), primary_key=True),
+            sa.Column("quantity", sa.Integer, nullable=False),
+            sa.Column("revenue", sa.Float, nullable=False),
+        )
+        self.sales_by_hour = sa.Table(
+            "sales_by_hour",
+            self.metadata,
+            sa.Column("hour", sa.String(16), primary_key=True),
+            sa.Column("orders", sa.Integer, nullable=False),
+            sa.Column("revenue", sa.Float, nullable=False),
+        )
+
+        self.init_db()
+
+    def init_db(self) -> None:
+        """Initialize database schema."""
+        sa = self._sa
+        self.metadata.create_all(self.engine)
+
+        # Backfill rollups for databases created before they existed
+        with self.engine.connect() as conn:
+            has_orders = conn.execute(sa.select(self.orders.c.id).limit(1)).first() is not None
+            has_rollups = conn.execute(sa.select(self.sales_totals.c.id).limit(1)).first() is not None
+        if has_orders and not has_rollups:
+            self.rebuild_rollups()
+
+        logger.info(f"Database initialized at {self.engine.url.render_as_string(hide_password=True)}")
+
+    @staticmethod
+    def _row_to_order(row) -> dict:
+        created_at = row.created_at
+        if isinstance(created_at, datetime):
+            created_at = created_at.strftime("%Y-%m-%d %H:%M:%S")
+        return {
+            "order_number": row.order_number,
+            "items": json.loads(row.items),
+            "total": row.total,
+            "status": row.status,
+            "created_at": created_at,
+            "session_id": row.session_id,
+        }
+
+    def get_order_count(self) -> int:
+        """Get total number of orders, archived ones included."""
+        sa = self._sa
+        with self.engine.connect() as conn:
+            live = conn.execute(sa.select(sa.func.count()).select_from(self.orders)).scalar_one()
+            return live + conn.execute(sa.select(sa.func.count()).select_from(self.orders_archive)).scalar_one()
+
+    def create_order(self, order_number: int, session_id: str, items: list, total: float) -> bool:
+        """Create a new order."""
+        sa = self._sa
+        serialized = _serialize_items(items)
+        created_at = _utc_timestamp()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    self.orders.insert().values(
+                        order_number=order_number,
+                        session_id=session_id,
+                        items=json.dumps(serialized),
+                        total=total,
+                        status="confirmed",
+                        created_at=datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S"),
+                    )
+                )
+                archive = self.orders_archive
+                if conn.execute(sa.select(archive.c.id).where(archive.c.order_number == order_number)).first():
+                    raise ValueError(f"Order number {order_number} already exists")
+                # Same transaction: the rollups never drift from the orders table
+                self._apply_rollup(conn, _compute_rollup(serialized, total, created_at))
+            logger.info(f"Order {order_number} created successfully")
+            return True
+        except sa.exc.IntegrityError as e:
+            logger.error(f"Order number {order_number} already exists: {e}")
+            raise ValueError(f"Order number {order_number} already exists")
+        except ValueError:
+            logger.error(f"Order number {order_number} already exists (archived)")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to create order: {e}", exc_info=True)
+            raise
+
+    def get_order(self, order_number: int) -> Optional[dict]:
+        """Retrieve an order by order number."""
+        sa = self._sa
+        archive = self.orders_archive
+        with self.engine.connect() as conn:
+            row = conn.execute(sa.select(self.orders).where(self.orders.c.order_number == order_number)).first()
+            if row is None:
+                # Fall back to cold storage
+                row = conn.execute(
+                    sa.select(archive).where(archive.c.order_number == order_number).order_by(archive.c.id.desc())
+                ).first()
+        return self._row_to_order(row) if row else None
+
+    def list_orders(self, limit: int = 50, offset: int = 0, session_id: Optional[str] = None) -> list[dict]:
+        """List orders, newest first, optionally filtered by session."""
+        sa = self._sa
+        query = sa.select(self.orders).order_by(self.orders.c.id.desc()).limit(limit).offset(offset)
+        if session_id is not None:
+            query = query.where(self.orders.c.session_id == session_id)
+        with self.engine.connect() as conn:
+            return [self._row_to_order(row) for row in conn.execute(query)]
+
+    def update_order_status(self, order_number: int, status: str) -> bool:
+        """Set the status of an order."""
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                self.orders.update().where(self.orders.c.order_number == order_number).values(status=status)
+            )
+            return result.rowcount > 0
+
+    def transition_order_statuses(self, changes: list[tuple[int, str]]) -> list[dict]:
+        """Apply status changes through the order state machine in one transaction."""
+        sa = self._sa
+        orders = self.orders
+        order_numbers = list(dict.fromkeys(order_number for order_number, _ in changes))
+        with self.engine.begin() as conn:
+            current = {}
+            for batch in _batched(order_numbers, 500):
+                query = sa.select(orders.c.order_number, orders.c.status, orders.c.session_id).where(
+                    orders.c.order_number.in_(batch)
+                )
+                if conn.dialect.name != "sqlite":
+                    query = query.with_for_update()
+                current.update(
+                    {
+                        row.order_number: {"status": row.status, "session_id": row.session_id}
+                        for row in conn.execute(query)
+                    }
+                )
+
+            results, writes = apply_transitions(current, changes)
+            if writes:
+                conn.execute(
+                    orders.update()
+                    .where(orders.c.order_number == sa.bindparam("number"))
+                    .values(status=sa.bindparam("new_status")),
+                    [{"number": order_number, "new_status": status} for order_number, status in writes.items()],
+                )
+        return results
+
+    def iter_orders(
+        self, since: Optional[str] = None, until: Optional[str] = None, chunk_size: int = 500
+    ) -> Iterator[list[dict]]:
+        """Stream hot-table orders oldest first in fixed-size chunks."""
+        sa = self._sa
+        orders = self.orders.c
+        query = sa.select(self.orders).order_by(orders.id).limit(chunk_size)
+        if since is not None:
+            query = query.where(orders.created_at >= datetime.strptime(since, "%Y-%m-%d %H:%M:%S"))
+        if until is not None:
+            query = query.where(orders.created_at < datetime.strptime(until, "%Y-%m-%d %H:%M:%S"))
+
+        last_id = 0
+        while True:
+            with self.engine.connect() as conn:
+                rows = conn.execute(query.where(orders.id > last_id)).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield [{**self._row_to_order(row), "session_id": row.session_id} for row in rows]
+            if len(rows) < chunk_size:
+                return
+
+    def import_orders(self, orders: Iterable[dict], batch_size: int = 500) -> dict:
+        """Bulk-load orders in batched transactions."""
+        sa = self._sa
+        imported = skipped = 0
+        for batch in _batched(orders, batch_size):
+            with self.engine.begin() as conn:
+                numbers = [order["order_number"] for order in batch]
+                existing = set()
+                for table in (self.orders, self.orders_archive):  # Archived numbers stay taken
+                    existing.update(
+                        conn.execute(sa.select(table.c.order_number).where(table.c.order_number.in_(numbers))).scalars()
+                    )
+                rows = []
+                for order in batch:
+                    if order["order_number"] in existing:
+                        skipped += 1
+                        continue
+                    existing.add(order["order_number"])
+                    items = _serialize_items(order["items"])
+                    created_at = order.get("created_at") or _utc_timestamp()
+                    rows.append(
+                        {
+                            "order_number": order["order_number"],
+                            "session_id": order.get("session_id"),
+                            "items": json.dumps(items),
+                            "total": order["total"],
+                            "status": order.get("status") or "confirmed",
+                            "created_at": datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S"),
+                        }
+                    )
+                    self._apply_rollup(conn, _compute_rollup(items, order["total"], created_at))
+                if rows:
+                    conn.execute(self.orders.insert(), rows)
+                imported += len(rows)
+
+        logger.info(f"Imported {imported} orders ({skipped} skipped as duplicates)")
+        return {"imported": imported, "skipped": skipped}
+
+    def _increment(self, conn, table, key: dict, deltas: dict, extra: Optional[dict] = None) -> None:
+        """Add deltas to a rollup row, inserting the row if it does not exist yet (one atomic upsert)."""
+        from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+        values = {**key, **(extra or {}), **deltas}
+        dialect = conn.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = (postgresql if dialect == "postgresql" else sqlite).insert(table).values(values)
+            conn.execute(
+                insert.on_conflict_do_update(
+                    index_elements=list(key),
+                    set_={column: table.c[column] + insert.excluded[column] for column in deltas},
+                )
+            )
+        elif dialect in ("mysql", "mariadb"):
+            insert = mysql.insert(table).values(values)
+            conn.execute(
+                insert.on_duplicate_key_update({column: table.c[column] + insert.inserted[column] for column in deltas})
+            )
+        else:
+            self._increment_portable(conn, table, key, deltas, values)
+
+    def _increment_portable(self, conn, table, key: dict, deltas: dict, values: dict) -> None:
+        """Update-then-insert for databases without an upsert; a lost insert race falls back to the update."""
+        sa = self._sa
+        condition = sa.and_(*(table.c[column] == value for column, value in key.items()))
+        update = (
+            table.update()
+            .where(condition)
+            .values({column: table.c[column] + delta for column, delta in deltas.items()})
+        )
+        if conn.execute(update).rowcount:
+            return
+        try:
+            with conn.begin_nested():  # Savepoint: a conflict must not roll back the order itself
+                conn.execute(table.insert().values(values))
+        except sa.exc.IntegrityError:
+            # Another transaction inserted the row first
+            conn.execute(update)
+
+    def _apply_rollup(self, conn, rollup: dict) -> None:
+        """Fold one order's deltas into the rollup tables."""
+        self._increment(
+            conn,
+            self.sales_totals,
+            {"id": 1},
+            {"orders": 1, "items": rollup["item_count"], "revenue": rollup["revenue"]},
+        )
+        for name, (category, quantity, revenue) in rollup["items"].items():
+            self._increment(
+                conn,
+                self.sales_by_item,
+                {"item_name": name},
+                {"quantity": quantity, "revenue": revenue},
+                extra={"category": category},
+            )
+        for category, (quantity, revenue) in rollup["categories"].items():
+            self._increment(
+                conn, self.sales_by_category, {"category": category}, {"quantity": quantity, "revenue": revenue}
+            )
+        self._increment(conn, self.sales_by_hour, {"hour": rollup["hour"]}, {"orders": 1, "revenue": rollup["revenue"]})
+
+    def rebuild_rollups(self) -> None:
+        """Recompute every sales rollup from scratch from the orders table."""
+        sa = self._sa
+        rollup = SalesRollup()
+        queries = [
+            sa.select(table.c["items"], table.c.total, table.c.created_at).order_by(table.c.id)
+            for table in (self.orders_archive, self.orders)
+        ]
+        with self.engine.begin() as conn:
+            for query in queries:
+                for row in conn.execution_options(yield_per=1000).execute(query):
+                    created_at = row.created_at
+                    if isinstance(created_at, datetime):
+                        created_at = created_at.strftime("%Y-%m-%d %H:%M:%S")
+                    rollup.add(_compute_rollup(json.loads(row.items), row.total, created_at))
+
+            for table in (self.sales_totals, self.sales_by_item, self.sales_by_category, self.sales_by_hour):
+                conn.execute(table.delete())
+            conn.execute(
+                self.sales_totals.insert().values(
+                    id=1, orders=rollup.orders, items=rollup.items_sold, revenue=rollup.revenue
+                )
+            )
+            if rollup.by_item:
+                conn.execute(
+                    self.sales_by_item.insert(),
+                    [
+                        {"item_name": name, "category": category, "quantity": quantity, "revenue": revenue}
+                        for name, (category, quantity, revenue) in rollup.by_item.items()
+                    ],
+                )
+            if rollup.by_category:
+                conn.execute(
+                    self.sales_by_category.insert(),
+                    [
+                        {"category": category, "quantity": quantity, "revenue": revenue}
+                        for category, (quantity, revenue) in rollup.by_category.items()
+                    ],
+                )
+            if rollup.by_hour:
+                conn.execute(
+                    self.sales_by_hour.insert(),
+                    [
+                        {"hour": hour, "orders": orders, "revenue": revenue}
+                        for hour, (orders, revenue) in rollup.by_hour.items()
+                    ],
+                )
+        logger.info("Sales rollups rebuilt")
+
+    def archive_orders(self, cutoff: str, batch_size: int = 500) -> int:
+        """Move orders older than ``cutoff`` into the month-partitioned archive table."""
+        sa = self._sa
+        cutoff_dt = datetime.strptime(cutoff, "%Y-%m-%d %H:%M:%S")
+        # Never replaces: an archived order number is never taken again
+        taken = self.orders.c.order_number.in_(sa.select(self.orders_archive.c.order_number))
+        with self.engine.connect() as conn:
+            kept = conn.execute(
+                sa.select(sa.func.count()).select_from(self.orders).where(self.orders.c.created_at < cutoff_dt, taken)
+            ).scalar_one()
+        if kept:
+            logger.warning(f"{kept} orders kept in the hot table: their order numbers are already archived")
+
+        archived = 0
+        while True:
+            with self.engine.begin() as conn:
+                rows = conn.execute(
+                    sa.select(self.orders)
+                    .where(self.orders.c.created_at < cutoff_dt, ~taken)
+                    .order_by(self.orders.c.created_at)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                conn.execute(
+                    self.orders_archive.insert(),
+                    [{**row._mapping, "month": row.created_at.strftime("%Y-%m")} for row in rows],
+                )
+                conn.execute(self.orders.delete().where(self.orders.c.id.in_([row.id for row in rows])))
+
+            archived += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        if archived:
+            logger.info(f"Archived {archived} orders created before {cutoff}")
+        return archived
+
+    def get_sales_summary(self, top_n: int = 5, hours: int = 24) -> dict:
+        """Read sales analytics from the rollup tables."""
+        sa = self._sa
+        item, category, hour = self.sales_by_item.c, self.sales_by_category.c, self.sales_by_hour.c
+        with self.engine.connect() as conn:
+            totals = conn.execute(
+                sa.select(self.sales_totals.c.orders, self.sales_totals.c["items"], self.sales_totals.c.revenue)
+            ).first()
+            top_items = conn.execute(
+                sa.select(item.item_name, item.category, item.quantity, item.revenue)
+                .order_by(item.revenue.desc(), item.quantity.desc())
+                .limit(top_n)
+            ).all()
+            categories = conn.execute(
+                sa.select(category.category, category.quantity, category.revenue).order_by(category.revenue.desc())
+            ).all()
+            hourly = conn.execute(
+                sa.select(hour.hour, hour.orders, hour.revenue).order_by(hour.hour.desc()).limit(hours)
+            ).all()
+
+        return _format_summary(tuple(totals) if totals else (0, 0, 0.0), top_items, categories, hourly)
+
+    def close(self) -> None:
+        """Close the connection pool."""
+        self.engine.dispose()
+
+    def after_fork(self) -> None:
+        """Start a fresh pool; the parent's connections stay open for the parent."""
+        self.engine.dispose(close=False)
+
+    def health_check(self) -> bool:
+        """Check if database is accessible."""
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(self._sa.text("SELECT 1"))
+                return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+
+
+def create_database(database_url: str) -> OrderStore:
+    """
+    Create the order store matching a database URL scheme.
+
+    Args:
+        database_url: e.g. ``sqlite:///./data/orders.db``, ``memory://``, ``postgresql://...``
+
+    Returns:
+        Initialized order store
+    """
+    if database_url.startswith("memory://") or database_url == "sqlite:///:memory:":
+        return MemoryDatabase()
+    if database_url.startswith("sqlite:///"):
+        return Database(database_url.replace("sqlite:///", ""))
+    return SQLAlchemyDatabase(database_url)
+
+
+# Global order store, created on first use
+_db: Optional[OrderStore] = None
+_db_lock = threading.Lock()
+
+
+def get_db() -> OrderStore:
+    """FastAPI dependency returning the order store of the request's location."""
+    tenant = current_tenant()
+    if tenant is not None:
+        return tenant.db
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = create_database(settings.database_url)
+    return _db
+
+
+def set_db(store: Optional[OrderStore]) -> None:
+    """Replace the global order store (``None`` recreates it from settings on next use)."""
+    global _db
+    _db = store
@@ -0,0 +1,295 @@
+"""
+In-process pub/sub for order events, streamed to clients as Server-Sent Events.
+
+Subscribers follow one order, one session, or the whole kitchen feed. Each
+has a bounded buffer: when a slow client falls behind, its oldest events are
+dropped and it is told how many it missed (so it can re-fetch), instead of
+the publisher blocking or memory growing without limit.
+
+With several worker processes (``app.server``), each worker also relays the
+events it publishes to its siblings through an ``EventRelay``: every worker
+binds a Unix datagram socket in a directory the master creates, and a
+publish sends the event to every other socket there. A kitchen screen
+connected to one worker therefore sees orders placed through any of them.
+Workers on other hosts are not reached.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from .config import settings
+from .tenants import current_tenant
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One subscriber's filter and bounded event buffer."""
+
+    def __init__(self, order_number: Optional[int], session_id: Optional[str], max_buffer: int):
+        self.order_number = order_number
+        self.session_id = session_id
+        self._events: deque = deque(maxlen=max_buffer)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event: dict) -> None:
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> tuple[list[dict], int]:
+        """
+        Wait up to ``timeout`` seconds for events.
+
+        Returns:
+            (buffered events, number dropped since the last batch)
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return [], 0
+        events, dropped = list(self._events), self.dropped
+        self._events.clear()
+        self.dropped = 0
+        self._ready.clear()
+        return events, dropped
+
+
+class OrderEventBus:
+    """Routes order events to matching subscribers."""
+
+    def __init__(self, max_buffer: int = 100, location: Optional[str] = None):
+        self.max_buffer = max_buffer
+        self.location = location  # Location id (None for the default location), for relayed events
+        self._by_order: dict[int, set[Subscription]] = {}
+        self._by_session: dict[str, set[Subscription]] = {}
+        self._kitchen: set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._kitchen) + sum(map(len, self._by_order.values())) + sum(map(len, self._by_session.values()))
+
+    def subscribe(self, order_number: Optional[int] = None, session_id: Optional[str] = None) -> Subscription:
+        """Subscribe to one order, one session, or (neither given) every order."""
+        subscription = Subscription(order_number, session_id, self.max_buffer)
+        if order_number is not None:
+            self._by_order.setdefault(order_number, set()).add(subscription)
+        elif session_id is not None:
+            self._by_session.setdefault(session_id, set()).add(subscription)
+        else:
+            self._kitchen.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.order_number is not None:
+            _discard(self._by_order, subscription.order_number, subscription)
+        elif subscription.session_id is not None:
+            _discard(self._by_session, subscription.session_id, subscription)
+        else:
+            self._kitchen.discard(subscription)
+
+    def publish(self, event_type: str, order: dict, **fields) -> dict:
+        """
+        Publish an event about ``order`` to every matching subscriber, in this
+        process and (through the relay) in the other workers.
+
+        Must be called from the event loop thread (request handlers are).
+
+        Returns:
+            The published event
+        """
+        event = {
+            "type": event_type,
+            "order_number": order["order_number"],
+            "session_id": order.get("session_id"),
+            "status": order["status"],
+            **fields,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self.deliver(event)
+        if event_relay is not None:
+            event_relay.send(self.location, event)
+        return event
+
+    def deliver(self, event: dict) -> None:
+        """Hand an already published event to this process's matching subscribers."""
+        targets = set(self._kitchen)
+        targets.update(self._by_order.get(event["order_number"], ()))
+        if event["session_id"] is not None:
+            targets.update(self._by_session.get(event["session_id"], ()))
+        for subscription in targets:
+            subscription.push(event)
+
+
+def _discard(index: dict, key, subscription: Subscription) -> None:
+    subscribers = index.get(key)
+    if subscribers is not None:
+        subscribers.discard(subscription)
+        if not subscribers:
+            del index[key]
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(
+    bus: OrderEventBus,
+    order_number: Optional[int] = None,
+    session_id: Optional[str] = None,
+    initial: Optional[dict] = None,
+) -> AsyncIterator[str]:
+    """
+    Subscribe and yield SSE frames until the client goes away.
+
+    Sends ``initial`` (the current order state) first, a comment as a
+    heartbeat when nothing happens for ``sse_heartbeat_seconds``, and an
+    ``overflow`` event when buffered events had to be dropped.
+    """
+    subscription = bus.subscribe(order_number=order_number, session_id=session_id)
+    try:
+        yield "retry: 3000\n\n"
+        if initial is not None:
+            yield format_sse("snapshot", initial)
+        while True:
+            events, dropped = await subscription.next_batch(settings.sse_heartbeat_seconds)
+            if dropped:
+                yield format_sse("overflow", {"dropped": dropped})
+            if not events and not dropped:
+                yield ": keep-alive\n\n"
+            for event in events:
+                yield format_sse(event["type"], event)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+class EventRelay:
+    """Sends published events to the sibling worker processes and delivers theirs."""
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        """
+        Args:
+            directory: Directory shared by the workers (created by the master)
+            name: This worker's socket name (default: its pid)
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name or os.getpid()}.sock")
+        self.dropped = 0
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Bind this worker's socket and start receiving (call from the event loop)."""
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock.bind(self.path)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._receive)
+        logger.info(f"Order event relay listening on {self.path}")
+
+    def stop(self) -> None:
+        if self._sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def send(self, location: Optional[str], event: dict) -> None:
+        """Send an event to every other worker (never blocks; dropped if a worker's buffer is full)."""
+        if self._sock is None:
+            return
+        data = json.dumps({"location": location, "event": event}, separators=(",", ":")).encode("utf-8")
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith(".sock"):
+                continue
+            try:
+                self._sock.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                _unlink_stale(path)  # Left behind by a worker that died
+            except BlockingIOError:
+                self.dropped += 1
+                logger.warning(f"Order event relay: {name} is not keeping up, event dropped")
+            except OSError as e:
+                logger.warning(f"Order event relay: could not send to {name}: {e}")
+
+    def _receive(self) -> None:
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                message = json.loads(data)
+                bus = _bus_for(message["location"])
+                if bus is not None:
+                    bus.deliver(message["event"])
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Order event relay: bad message ignored: {e}")
+
+
+def _unlink_stale(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _bus_for(location: Optional[str]) -> Optional[OrderEventBus]:
+    """This process's bus for a location (None if nobody here can be subscribed to it)."""
+    if location is None:
+        return order_events
+    from .tenants import get_tenant_registry
+
+    registry = get_tenant_registry()
+    tenant = registry.peek(location) if registry is not None else None
+    return tenant.created_events if tenant is not None else None
+
+
+# Global order event bus (default location)
+order_events = OrderEventBus(max_buffer=settings.sse_buffer_size)
+
+# Cross-worker relay (started by the lifespan when running under app.server with several workers)
+event_relay: Optional[EventRelay] = None
+
+
+def start_event_relay(directory: str) -> EventRelay:
+    """Start relaying this worker's order events through ``directory`` (call from the event loop)."""
+    global event_relay
+    relay = EventRelay(directory)
+    relay.start()
+    event_relay = relay
+    return relay
+
+
+def stop_event_relay() -> None:
+    global event_relay
+    if event_relay is not None:
+        event_relay.stop()
+        event_relay = None
+
+
+def current_order_events() -> OrderEventBus:
+    """The event bus of the request's location."""
+    tenant = current_tenant()
+    return tenant.events if tenant is not None else order_events
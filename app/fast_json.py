@@ -0,0 +1,97 @@
+"""
+Opt-in fast JSON path (``FAST_JSON=true``).
+
+By default request bodies are decoded with ``json.loads`` and then validated,
+and FastAPI serializes responses by re-validating the returned model against
+``response_model``, running ``jsonable_encoder`` and ``json.dumps``.
+The fast path instead:
+
+- validates request bodies straight from bytes with ``model_validate_json``
+- serializes response models directly with ``model_dump_json``
+- uses orjson for plain-dict responses (when ``orjson`` is installed)
+
+See ``benchmarks/bench_json.py`` for the per-endpoint difference.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Optional, TypeVar, Union
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from .config import settings
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401  (ORJSONResponse imports it lazily)
+
+    FastJSONResponse: type[JSONResponse] = ORJSONResponse
+except ImportError:  # Optional dependency
+    FastJSONResponse = JSONResponse
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def default_response_class() -> type[JSONResponse]:
+    """Response class for plain (non-model) endpoint results."""
+    return FastJSONResponse if settings.fast_json else JSONResponse
+
+
+def model_response(
+    model: BaseModel, status_code: int = 200, headers: Optional[dict[str, str]] = None
+) -> Union[BaseModel, Response]:
+    """
+    Return a response model, pre-serialized when the fast path is enabled.
+
+    Returning a ``Response`` makes FastAPI skip re-validating the model
+    against ``response_model``; the declared model still documents the API.
+    """
+    if not settings.fast_json:
+        if status_code == 200 and not headers:
+            return model
+        return JSONResponse(status_code=status_code, content=model.model_dump(), headers=headers)
+    return Response(
+        content=model.model_dump_json(), status_code=status_code, media_type="application/json", headers=headers
+    )
+
+
+def json_body(model: type[ModelT]) -> Callable[[Request], Any]:
+    """
+    Dependency that parses and validates a JSON request body.
+
+    On the fast path the body is validated straight from bytes with
+    ``model_validate_json``; otherwise it is decoded with ``json.loads`` and
+    validated, as FastAPI does by default. Errors are reported like FastAPI's
+    own (422, ``loc`` starting with "body").
+    """
+
+    async def parse(request: Request) -> ModelT:
+        body = await request.body()
+        with span("validate", model=model.__name__, bytes=len(body)):
+            try:
+                if settings.fast_json:
+                    return model.model_validate_json(body)
+                try:
+                    data = json.loads(body)
+                except json.JSONDecodeError as e:
+                    error = {"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}}
+                    raise RequestValidationError([{**error, "ctx": {"error": e.msg}}], body=body)
+                return model.model_validate(data)
+            except ValidationError as e:
+                errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+                raise RequestValidationError(errors, body=body)
+
+    return parse
+
+
+def json_body_openapi(model: type[BaseModel]) -> dict:
+    """``openapi_extra`` documenting a body parsed by ``json_body`` (nested models must be in components)."""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
@@ -0,0 +1,169 @@
+"""
+Load-adaptive llama-server generation parameters.
+
+A CPU llama-server slows down for everyone once more requests arrive than
+it has slots for, and past a point requests time out and fall back to
+templates anyway. The ``GenerationController`` steps generation cost down
+before that happens and back up once load eases:
+
+====  ===========  ==========  ==================  ==========================================
+Step  Name         Max tokens  Prompt budget       Answered from templates instead of the LLM
+====  ===========  ==========  ==================  ==========================================
+0     full         100         100%, with history  nothing
+1     reduced      64          75%, with history   greetings
+2     lean         40          50%, no history     + VIP welcome, menu overview, prices, recommendations
+3     minimal      24          35%, no history     + questions about specific menu items
+====  ===========  ==========  ==================  ==========================================
+
+Load is the number of llama-server calls in flight from this worker (the
+queue llama-server sees) and an exponential moving average of their
+latency. The controller steps down at most once per
+``llm_adapt_step_seconds`` while either is above its limit and steps back
+up at most once per ``llm_adapt_recover_seconds`` once both are well below
+(the gap keeps it from oscillating). The current step is exported at
+``GET /metrics``.
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GenerationLevel:
+    """Generation parameters at one load step."""
+
+    name: str
+    max_tokens: int
+    prompt_budget_fraction: float  # Of ``llm_prompt_token_budget``
+    history: bool  # Include earlier turns of the conversation
+    template_intents: frozenset[str] = frozenset()  # Answer paths served by templates at this step
+
+    def prompt_budget(self, base: int) -> int:
+        """Token budget for the prompt (``base`` 0 means unlimited and stays unlimited)."""
+        return max(1, int(base * self.prompt_budget_fraction)) if base > 0 else 0
+
+
+_LOW_VALUE = frozenset({"greeting", "vip", "menu", "price", "recommendation"})
+
+GENERATION_LEVELS = (
+    GenerationLevel("full", max_tokens=100, prompt_budget_fraction=1.0, history=True),
+    GenerationLevel(
+        "reduced", max_tokens=64, prompt_budget_fraction=0.75, history=True, template_intents=frozenset({"greeting"})
+    ),
+    GenerationLevel("lean", max_tokens=40, prompt_budget_fraction=0.5, history=False, template_intents=_LOW_VALUE),
+    GenerationLevel(
+        "minimal",
+        max_tokens=24,
+        prompt_budget_fraction=0.35,
+        history=False,
+        template_intents=_LOW_VALUE | {"menu_item", "menu_items"},
+    ),
+)
+
+# Load must fall below this fraction of the limits before stepping back up
+RECOVER_FRACTION = 0.7
+
+
+class GenerationController:
+    """Picks the generation level from in-flight llama-server calls and their latency."""
+
+    def __init__(
+        self,
+        target_latency: float,
+        max_in_flight: int,
+        step_seconds: float = 5.0,
+        recover_seconds: float = 30.0,
+        smoothing: float = 0.2,
+        enabled: bool = True,
+    ):
+        self.target_latency = target_latency
+        self.max_in_flight = max_in_flight
+        self.step_seconds = step_seconds
+        self.recover_seconds = recover_seconds
+        self.smoothing = smoothing
+        self.enabled = enabled
+        self.step = 0
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.step_changes = 0
+        self._changed_at = self._sampled_at = -math.inf  # Last step change / latency sample
+        self._lock = threading.Lock()
+
+    @property
+    def level(self) -> GenerationLevel:
+        return GENERATION_LEVELS[self.step]
+
+    def current(self, now: Optional[float] = None) -> GenerationLevel:
+        """Re-evaluate load and return the level for a new llama-server call."""
+        if not self.enabled:
+            return GENERATION_LEVELS[0]
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._adjust(now)
+            return self.level
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a llama-server call as in flight for the duration of the block."""
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def record_latency(self, seconds: float, now: Optional[float] = None) -> None:
+        """Feed one llama-server response time into the controller."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.latency_ewma is None:
+                self.latency_ewma = seconds
+            else:
+                self.latency_ewma += self.smoothing * (seconds - self.latency_ewma)
+            self._sampled_at = now
+            if self.enabled:
+                self._adjust(now)
+
+    def _adjust(self, now: float) -> None:
+        latency = self.latency_ewma or 0.0
+        if self.in_flight == 0 and now - self._sampled_at > self.recover_seconds:
+            latency = 0.0  # No recent calls (everything shed to templates, or no traffic): the average is stale
+        overloaded = latency > self.target_latency or self.in_flight > self.max_in_flight
+        eased = (
+            latency < self.target_latency * RECOVER_FRACTION and self.in_flight <= self.max_in_flight * RECOVER_FRACTION
+        )
+        elapsed = now - self._changed_at
+        if overloaded and self.step < len(GENERATION_LEVELS) - 1 and elapsed >= self.step_seconds:
+            self._set_step(self.step + 1, now)
+        elif eased and self.step > 0 and elapsed >= self.recover_seconds:
+            self._set_step(self.step - 1, now)
+
+    def _set_step(self, step: int, now: float) -> None:
+        previous, self.step = self.level, step
+        self._changed_at = now
+        self.step_changes += 1
+        log = logger.warning if step > 0 else logger.info
+        log(
+            f"LLM generation {previous.name} -> {self.level.name} "
+            f"(latency {self.latency_ewma or 0.0:.2f}s, {self.in_flight} in flight)"
+        )
+
+
+# Global controller for this worker's llama-server calls
+generation_controller = GenerationController(
+    target_latency=settings.llm_latency_target_seconds,
+    max_in_flight=settings.llm_max_in_flight,
+    step_seconds=settings.llm_adapt_step_seconds,
+    recover_seconds=settings.llm_adapt_recover_seconds,
+    enabled=settings.llm_adaptive_generation,
+)
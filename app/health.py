@@ -0,0 +1,135 @@
+"""
+Background health monitoring with cached results.
+
+Probes the order store and llama-server on a fixed interval, off the request
+path, so ``/health``, ``/health/live`` and ``/health/ready`` answer from
+memory instead of opening a database connection per probe.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from .config import settings
+from .database import OrderStore
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Periodically probes components and caches their status."""
+
+    def __init__(self, interval_seconds: float = 10.0, probe_timeout: float = 2.0):
+        self.interval_seconds = interval_seconds
+        self.probe_timeout = probe_timeout
+        self.started_at = time.monotonic()
+        self.components: dict[str, dict] = {}
+        self.last_check: Optional[str] = None
+        self._probe_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe_database(self, store: OrderStore) -> dict:
+        start = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(asyncio.to_thread(store.health_check), timeout=self.probe_timeout)
+            detail = None if ok else "health check failed"
+        except asyncio.TimeoutError:
+            ok, detail = False, f"timed out after {self.probe_timeout}s"
+        return self._result("up" if ok else "down", start, detail)
+
+    async def _probe_llama_server(self) -> dict:
+        if not (settings.use_local_ai and settings.llama_server_url):
+            return {"status": "disabled", "detail": "template mode", "latency_ms": None, "checked_at": _now()}
+
+        import httpx  # Deferred: only needed when llama-server is configured
+
+        start = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(timeout=self.probe_timeout) as client:
+                response = await client.get(f"{settings.llama_server_url}/health")
+            ok = response.status_code == 200
+            detail = None if ok else f"HTTP {response.status_code}"
+        except Exception as e:
+            ok, detail = False, str(e) or type(e).__name__
+        return self._result("up" if ok else "down", start, detail)
+
+    @staticmethod
+    def _result(status: str, start: float, detail: Optional[str]) -> dict:
+        return {
+            "status": status,
+            "detail": detail,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "checked_at": _now(),
+        }
+
+    async def probe_once(self, store: OrderStore) -> dict[str, dict]:
+        """Probe every component once and cache the results (one probe round at a time)."""
+        async with self._probe_lock:
+            database, llama_server = await asyncio.gather(self._probe_database(store), self._probe_llama_server())
+            previous = self.components
+            self.components = {"database": database, "llama_server": llama_server}
+            self.last_check = _now()
+
+        for name, component in self.components.items():
+            if previous.get(name, {}).get("status") != component["status"]:
+                detail = f" ({component['detail']})" if component["detail"] else ""
+                log = logger.warning if component["status"] == "down" else logger.info
+                log(f"Health: {name} is {component['status']}{detail}")
+        return self.components
+
+    async def _run(self, get_store: Callable[[], OrderStore]) -> None:
+        while True:
+            try:
+                await self.probe_once(get_store())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self, get_store: Callable[[], OrderStore]) -> None:
+        """Start background probing."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(get_store))
+
+    async def stop(self) -> None:
+        """Stop background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Ready to serve traffic: the order store is up (llama-server is optional, Tobi falls back to templates)."""
+        return self.components.get("database", {}).get("status") == "up"
+
+    @property
+    def uptime_seconds(self) -> float:
+        """Seconds since the monitor was created."""
+        return round(time.monotonic() - self.started_at, 3)
+
+    def readiness(self) -> dict:
+        """Cached readiness report with component-level detail."""
+        llama_down = self.components.get("llama_server", {}).get("status") == "down"
+        if not self.is_ready:
+            status = "unavailable"
+        elif llama_down:
+            status = "degraded"
+        else:
+            status = "ready"
+        return {"status": status, "last_check": self.last_check, "components": self.components}
+
+
+def _now() -> str:
+    """Current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# Global health monitor, started on application startup
+health_monitor = HealthMonitor(interval_seconds=settings.health_check_interval_seconds)
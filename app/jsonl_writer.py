@@ -0,0 +1,78 @@
+"""
+Append-only JSON Lines files written from a background thread.
+
+Request handlers only put records on a bounded queue; one thread per file
+encodes them in batches and appends them. When the queue is full records
+are dropped (and counted) rather than blocking, so a slow disk never adds
+request latency. Files ending in ``.gz`` are gzip-compressed, one gzip
+member per batch (readers such as ``gzip.open`` see one continuous stream).
+"""
+
+import gzip
+import json
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Records encoded and appended per file write
+BATCH_SIZE = 100
+
+
+class JSONLinesWriter:
+    """Appends one JSON object per record to ``path``."""
+
+    def __init__(self, path: str, encode: Optional[Callable[[Any], dict]] = None, max_pending: int = 10000):
+        """
+        Args:
+            path: File to append to (gzip-compressed if it ends in ``.gz``)
+            encode: Converts a submitted record to a JSON-serializable dict
+                (runs on the writer thread; default: records are dicts already)
+            max_pending: Records queued before new ones are dropped
+        """
+        self.path = path
+        self.encode = encode
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        threading.Thread(target=self._run, name=f"jsonl-writer:{path}", daemon=True).start()
+
+    def submit(self, record: Any) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every submitted record has been written (or failed)."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"Could not write {len(batch)} records to {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list) -> None:
+        encode = self.encode
+        lines = "".join(
+            json.dumps(encode(record) if encode else record, separators=(",", ":"), ensure_ascii=False) + "\n"
+            for record in batch
+        )
+        if self.path.endswith(".gz"):
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(lines)
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
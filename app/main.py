@@ -3,32 +3,145 @@ Restaurant AI - FastAPI Application
 Main application with all endpoints, logging, and error handling.
 """
 
+import asyncio
+import functools
+import hmac
+import json
 import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException
+from pydantic import ValidationError
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-
-from .config import settings
-from .models import ChatRequest, ChatResponse, OrderRequest, OrderResponse, OrderStatus, HealthResponse
-from .database import db
-from .tobi_ai import get_tobi_response_async
-from .menu_data import MENU_DATA, get_next_order_number
-
-# ===== Logging Configuration =====
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=getattr(logging, settings.log_level),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(settings.log_file), logging.StreamHandler()],
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from .archival import archival_loop
+from .chat_capture import capture_chat
+from .chat_orders import order_turn
+from .config import ensure_directories, settings
+from .models import (
+    AnalyticsResponse,
+    BulkStatusRequest,
+    BulkStatusResponse,
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+    ImportResult,
+    LivenessResponse,
+    MenuVersionInfo,
+    OrderItemRequest,
+    OrderRequest,
+    OrderResponse,
+    OrderStatus,
+    OrderStatusUpdate,
+    ProfileInfo,
+    ReadinessResponse,
+    StatusChangeResult,
+    TraceInfo,
+)
+from .database import OrderStore, get_db
+from .events import current_order_events, event_stream, start_event_relay, stop_event_relay
+from .fast_json import default_response_class, json_body, json_body_openapi, model_response
+from .generation import generation_controller
+from .health import health_monitor
+from .logging_config import setup_logging
+from .sessions import current_chat_sessions
+from .static_assets import StaticAssets
+from .tenants import TenantMiddleware, current_tenant, get_tenant_registry
+from .tobi_ai import answer_path, get_tobi_response_async, is_magic_password, stream_tobi_response
+from .menu_cache import menu_response
+from .menu_data import get_next_order_number
+from .menu_index import UnknownMenuItemError
+from .menu_versions import (
+    MenuValidationError,
+    MenuVersion,
+    MenuVersionMiddleware,
+    current_menu,
+    current_menu_versions,
+    menu_versions,
+    pinned_menu,
 )
+from .rate_limit import chat_rate_limits, retry_after_header
+from .orders_io import EXPORT_FORMATS, encode_orders, import_stream
+from .profiling import ProfilingMiddleware, list_profiles, read_profile_summary
+from .tracing import TracingMiddleware, span, trace, traces
 
 logger = logging.getLogger(__name__)
 
+# Order creation retries when a concurrent request takes the same order number
+ORDER_NUMBER_ATTEMPTS = 3
+
+
+# ===== Startup/Shutdown =====
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup and shutdown.
+
+    Every side effect (logging handlers, directories, database schema,
+    background tasks) happens here rather than on import, so importing
+    ``app.main`` stays cheap for tests, CLI tools and worker processes.
+    """
+    setup_logging()
+    ensure_directories()
+
+    logger.info("Starting Restaurant AI v1.0.0")
+    logger.info(f"Environment: {settings.environment}")
+    logger.info(f"Database: {settings.database_url}")
+    logger.info(f"CORS Origins: {settings.allowed_origins_list}")
+
+    # Check database health, then keep probing in the background
+    await health_monitor.probe_once(get_db())
+    if health_monitor.is_ready:
+        logger.info("Database connection successful")
+    else:
+        logger.error("Database connection failed!")
+    health_monitor.start(get_db)
+
+    # Move old orders to cold storage in the background (app.server runs it in one worker only)
+    archival_task = None
+    if settings.archive_after_days > 0 and getattr(app.state, "run_archival", True):
+        archival_task = asyncio.create_task(archival_loop(get_db))
+
+    # Pick up menu file edits without a restart
+    menu_task = None
+    if settings.menu_file:
+        logger.info(f"Menu version {current_menu().version} from {settings.menu_file}, watching for changes")
+        menu_task = asyncio.create_task(menu_versions.watch())
+
+    # Share order events with the sibling workers (app.server sets the relay directory)
+    relay_dir = getattr(app.state, "event_relay_dir", None)
+    if relay_dir:
+        start_event_relay(relay_dir)
+
+    # Hash and compress static files once, before the first tablet asks for them
+    static_assets.build()
+
+    # Other locations are loaded on first use; their menu files are watched while loaded
+    tenants_task = None
+    if settings.tenants_file:
+        tenants_task = asyncio.create_task(get_tenant_registry().watch())
+
+    yield
+
+    logger.info("Shutting down Restaurant AI")
+
+    await health_monitor.stop()
+
+    if archival_task is not None:
+        archival_task.cancel()
+    if menu_task is not None:
+        menu_task.cancel()
+    if tenants_task is not None:
+        tenants_task.cancel()
+    stop_event_relay()
+
+
 # ===== FastAPI Application =====
 app = FastAPI(
     title="Restaurant AI",
@@ -36,6 +149,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs" if settings.is_development else None,
     redoc_url="/api/redoc" if settings.is_development else None,
+    default_response_class=default_response_class(),
+    lifespan=lifespan,
 )
 
 # ===== CORS Middleware =====
@@ -47,32 +162,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ===== Static Files =====
-static_dir = Path(__file__).parent.parent / "static"
-if static_dir.exists():
-    app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+# Every request sees one menu version, even if the menu is reloaded mid-request
+app.add_middleware(MenuVersionMiddleware)
 
+# Route /locations/{id}/... and per-location hosts (outside the menu middleware, so it pins the location's menu)
+app.add_middleware(TenantMiddleware)
 
-# ===== Startup/Shutdown Events =====
-@app.on_event("startup")
-async def startup_event():
-    """Run on application startup."""
-    logger.info("Starting Restaurant AI v1.0.0")
-    logger.info(f"Environment: {settings.environment}")
-    logger.info(f"Database: {settings.database_url}")
-    logger.info(f"CORS Origins: {settings.allowed_origins_list}")
-
-    # Check database health
-    if db.health_check():
-        logger.info("Database connection successful")
-    else:
-        logger.error("Database connection failed!")
+# Per-stage request spans for /debug/traces (sees the original /locations/... path)
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
 
+# Opt-in request profiling (outermost, so it sees the whole request)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Run on application shutdown."""
-    logger.info("Shutting down Restaurant AI")
+# ===== Static Files =====
+# Precompressed and fingerprinted at startup (see static_assets)
+static_dir = Path(__file__).parent.parent / "static"
+static_assets = StaticAssets(static_dir, mount_path="/static", rescan=settings.is_development)
+if static_dir.exists():
+    app.mount("/static", static_assets, name="static")
 
 
 # ===== API Endpoints =====
@@ -83,62 +192,218 @@ async def root():
     """Root endpoint with basic info."""
     return {
         "status": "running",
-        "restaurant": settings.restaurant_name,
+        "restaurant": current_menu().menu["restaurant_name"],
         "message": "Tobi is ready to serve you!",
         "version": "1.0.0",
         "docs": "/api/docs" if settings.is_development else None,
     }
 
 
-@app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+def require_default_location() -> None:
+    """Health is reported for the process and its default order store, so it is not served under a location."""
+    if current_tenant() is not None:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/health", response_model=HealthResponse, tags=["Health"], dependencies=[Depends(require_default_location)])
+async def health_check(db: OrderStore = Depends(get_db)):
     """
     Health check endpoint for monitoring.
     Used by Docker, Kubernetes, load balancers, etc.
+
+    Served from the background health monitor's cached results.
     """
-    db_status = "connected" if db.health_check() else "disconnected"
+    if health_monitor.last_check is None:
+        await health_monitor.probe_once(db)
+
+    db_status = "connected" if health_monitor.is_ready else "disconnected"
 
     if db_status == "disconnected":
         logger.warning("Health check failed: Database disconnected")
         raise HTTPException(status_code=503, detail="Database unavailable")
 
-    return HealthResponse(status="healthy", environment=settings.environment, database=db_status, version="1.0.0")
+    return model_response(
+        HealthResponse(status="healthy", environment=settings.environment, database=db_status, version="1.0.0")
+    )
+
+
+@app.get(
+    "/health/live",
+    response_model=LivenessResponse,
+    tags=["Health"],
+    dependencies=[Depends(require_default_location)],
+)
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responding."""
+    return model_response(LivenessResponse(uptime_seconds=health_monitor.uptime_seconds))
+
+
+@app.get(
+    "/health/ready",
+    response_model=ReadinessResponse,
+    tags=["Health"],
+    dependencies=[Depends(require_default_location)],
+)
+async def readiness(db: OrderStore = Depends(get_db)):
+    """
+    Readiness probe with per-component status and last-check timestamps.
+
+    Returns 503 while the order store is down. A down llama-server only
+    degrades readiness, since Tobi falls back to template responses.
+    """
+    if health_monitor.last_check is None:
+        await health_monitor.probe_once(db)
+
+    report = ReadinessResponse(**health_monitor.readiness())
+    return model_response(report, status_code=200 if health_monitor.is_ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    """
+    Load and degradation gauges of this worker in Prometheus text format.
+
+    Includes the LLM generation step (0 = full quality; higher steps use
+    fewer tokens and shorter prompts and answer simple intents from
+    templates), llama-server calls in flight, their average latency, and
+    the adaptive global chat rate.
+    """
+    controller = generation_controller
+    samples = [
+        ("llm_generation_step", "gauge", "Generation step (0 = full, higher = cheaper)", controller.step),
+        ("llm_generation_step_changes_total", "counter", "Generation step changes", controller.step_changes),
+        ("llm_in_flight", "gauge", "llama-server calls in flight", controller.in_flight),
+        ("llm_latency_ewma_seconds", "gauge", "Average llama-server latency", controller.latency_ewma or 0.0),
+        ("chat_global_rate", "gauge", "Adaptive global chat rate (requests/s)", chat_rate_limits.global_limit.rate),
+        ("ws_connections", "gauge", "Open /ws/chat connections", _ws_connections),
+    ]
+    lines = []
+    for name, kind, description, value in samples:
+        lines += [f"# HELP restaurant_{name} {description}", f"# TYPE restaurant_{name} {kind}"]
+        lines.append(f"restaurant_{name} {value}")
+    lines += [
+        "# HELP restaurant_llm_generation_level Current generation level",
+        "# TYPE restaurant_llm_generation_level gauge",
+        f'restaurant_llm_generation_level{{level="{controller.level.name}"}} 1',
+    ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 
 @app.get("/menu", tags=["Menu"])
-async def get_menu():
-    """Get the full restaurant menu."""
+async def get_menu(request: Request):
+    """
+    Get the full restaurant menu.
+
+    The JSON body is serialized and compressed once per menu version and
+    served with a strong `ETag`; send `If-None-Match` to get `304 Not Modified`.
+    """
     logger.debug("Menu requested")
-    return MENU_DATA
+    return menu_response(request, current_menu().payload)
 
 
-@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
-async def chat(request: ChatRequest):
+@app.get("/menu/version", response_model=MenuVersionInfo, tags=["Menu"])
+async def get_menu_version():
+    """The menu version being served and where it was loaded from."""
+    return model_response(_menu_version_info(current_menu()))
+
+
+@app.post("/menu/reload", response_model=MenuVersionInfo, tags=["Menu"])
+async def reload_menu():
+    """
+    Re-read the menu file (`MENU_FILE`, or the location's `menu_file`) now
+    instead of waiting for the next change check.
+
+    Returns `422` (and keeps serving the current version) if the file is not
+    a valid menu.
+    """
+    try:
+        version, changed = await asyncio.to_thread(current_menu_versions().reload)
+    except MenuValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return model_response(_menu_version_info(version, changed))
+
+
+def _menu_version_info(version: MenuVersion, changed: bool = False) -> MenuVersionInfo:
+    return MenuVersionInfo(
+        version=version.version,
+        fingerprint=version.fingerprint,
+        source=version.source,
+        items=len(version.index),
+        changed=changed,
+    )
+
+
+@app.post("/chat", response_model=ChatResponse, tags=["Chat"], openapi_extra=json_body_openapi(ChatRequest))
+async def chat(
+    http_request: Request, request: ChatRequest = Depends(json_body(ChatRequest)), db: OrderStore = Depends(get_db)
+):
     """
     Chat with Tobi, the AI assistant.
 
     - **message**: Customer's message (1-500 characters)
     - **session_id**: Optional session identifier
+
+    - **draft_order**: The `draft_order` of the previous response, if any
+
+    Orders said in chat ("two smash burgers and a negroni") are read back as
+    `draft_order` and placed when the customer says yes (`order_number`).
+    Send the draft back with the next message: any worker can then place it.
+
+    Rate limited per client IP, per session and globally (the global limit
+    tightens while llama-server is slow); over the limit returns `429` with
+    `Retry-After`.
     """
+    client_ip = http_request.client.host if http_request.client else None
+    limited = chat_rate_limits.check(client_ip, request.session_id)
+    if limited is not None:
+        limit, wait = limited
+        logger.warning(f"Chat rate limited ({limit}) - IP: {client_ip} | Retry after {wait:.1f}s")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests ({limit} limit), slow down dude!",
+            headers={"Retry-After": retry_after_header(wait)},
+        )
+
     try:
         # Generate or use provided session ID
         session_id = request.session_id or str(uuid.uuid4())
 
         # Check for magic password
-        has_magic_password = False
-        if settings.enable_magic_password:
-            has_magic_password = settings.magic_password.lower() in request.message.lower()
-
-        # Get Tobi's response (async)
-        ai_response = await get_tobi_response_async(request.message, has_magic_password)
+        has_magic_password = is_magic_password(request.message)
+
+        # Orders are handled locally; everything else gets Tobi's response (async)
+        start = time.perf_counter()
+        draft = request.draft_order
+        ordered = await order_turn(request.message, draft, session_id, functools.partial(_place_order, db))
+        if ordered is not None and ordered.order is not None:
+            _publish_order_created(ordered.order, session_id)
+        if ordered is not None:
+            ai_response, path, draft = ordered.response, ordered.path, ordered.draft
+        else:
+            ai_response = await get_tobi_response_async(request.message, has_magic_password)
+            path = answer_path()
+        capture_chat(
+            "http", session_id, request.message, has_magic_password, path, time.perf_counter() - start, ai_response
+        )
 
-        logger.info(f"Chat - Session: {session_id[:8]}... | VIP: {has_magic_password}")
+        logger.info(
+            "Chat - Session: %s... | VIP: %s | Path: %s",
+            session_id[:8],
+            has_magic_password,
+            path,
+            extra={"session": session_id[:8], "vip": has_magic_password, "answer_path": path},
+        )
 
-        return ChatResponse(
-            response=ai_response,
-            session_id=session_id,
-            has_magic_password=has_magic_password,
-            restaurant=settings.restaurant_name,
+        return model_response(
+            ChatResponse(
+                response=ai_response,
+                session_id=session_id,
+                has_magic_password=has_magic_password,
+                restaurant=current_menu().menu["restaurant_name"],
+                draft_order=draft,
+                order_number=ordered.order.order_number if ordered and ordered.order else None,
+            ),
+            headers={"X-Answer-Path": path} if path else None,
         )
 
     except Exception as e:
@@ -146,12 +411,150 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
 
-@app.post("/order", response_model=OrderResponse, tags=["Orders"])
-async def create_order(request: OrderRequest):
+# Open /ws/chat connections (for the connection limit)
+_ws_connections = 0
+
+
+@app.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket, session_id: Optional[str] = None, db: OrderStore = Depends(get_db)):
+    """
+    Chat with Tobi over one persistent WebSocket.
+
+    Connect to `/ws/chat` (optionally `?session_id=...` to resume a session).
+    The server first sends `{"type": "session", "session_id", "restaurant"}`.
+    Each client message `{"message": "..."}` is answered with
+    `{"type": "start"}`, one `{"type": "token", "text"}` per generated chunk,
+    then `{"type": "end", "response", "has_magic_password"}`. Problems are
+    reported as `{"type": "error", "status", "detail"}` (429s add `retry_after`).
+    Orders said in chat are read back as a draft (`"draft_order"` in the end
+    event) and placed when the customer says yes (`"order_number"`); the
+    draft is kept on the session, or taken from the message's `draft_order`.
+
+    The session (recent turns, VIP status) persists across turns and
+    reconnects. Messages are handled one at a time, a client that stops
+    reading is disconnected after `WS_SEND_TIMEOUT_SECONDS`, and idle
+    connections are closed after `WS_IDLE_TIMEOUT_SECONDS`.
+    """
+    global _ws_connections
+    if _ws_connections >= settings.ws_max_connections:
+        await websocket.close(code=1013, reason="Too many connections")
+        return
+
+    await websocket.accept()
+    _ws_connections += 1
+    session = current_chat_sessions().get_or_create(session_id)
+    client_ip = websocket.client.host if websocket.client else None
+
+    async def send(payload: dict) -> None:
+        # A client that stops reading must not pin the server's buffers forever
+        await asyncio.wait_for(websocket.send_json(payload), timeout=settings.ws_send_timeout_seconds)
+
+    try:
+        await send(
+            {"type": "session", "session_id": session.session_id, "restaurant": current_menu().menu["restaurant_name"]}
+        )
+        while True:
+            try:
+                text = await asyncio.wait_for(websocket.receive_text(), timeout=settings.ws_idle_timeout_seconds)
+            except asyncio.TimeoutError:
+                await websocket.close(code=1000, reason="Idle timeout")
+                return
+
+            with trace("WS /ws/chat", session=session.session_id[:8]):  # One trace per turn
+                try:
+                    with span("validate", model="ChatRequest", bytes=len(text)):
+                        data = json.loads(text)
+                        if not isinstance(data, dict):
+                            raise ValueError("Expected a JSON object")
+                        request = ChatRequest.model_validate({**data, "session_id": session.session_id})
+                except ValidationError as e:
+                    await send({"type": "error", "status": 422, "detail": json.loads(e.json(include_url=False))})
+                    continue
+                except ValueError as e:  # Includes json.JSONDecodeError
+                    await send({"type": "error", "status": 422, "detail": str(e)})
+                    continue
+
+                limited = chat_rate_limits.check(client_ip, session.session_id)
+                if limited is not None:
+                    limit, wait = limited
+                    await send(
+                        {
+                            "type": "error",
+                            "status": 429,
+                            "detail": f"Too many requests ({limit} limit), slow down dude!",
+                            "retry_after": int(retry_after_header(wait)),
+                        }
+                    )
+                    continue
+
+                session.is_vip = session.is_vip or is_magic_password(request.message)
+                await send({"type": "start"})
+                chunks = []
+                start = time.perf_counter()
+                with pinned_menu():  # One menu version per turn
+                    ordered = await order_turn(
+                        request.message,
+                        request.draft_order or session.draft_order,
+                        session.session_id,
+                        functools.partial(_place_order, db),
+                    )
+                    if ordered is not None and ordered.order is not None:
+                        _publish_order_created(ordered.order, session.session_id)
+                    if ordered is not None:
+                        session.draft_order = ordered.draft
+                        path = ordered.path
+                        chunks.append(ordered.response)
+                        await send({"type": "token", "text": ordered.response})
+                    else:
+                        async for chunk in stream_tobi_response(
+                            request.message, session.is_vip, tuple(session.history)
+                        ):
+                            chunks.append(chunk)
+                            await send({"type": "token", "text": chunk})
+                        path = answer_path()
+                response = "".join(chunks)
+                capture_chat(
+                    "ws",
+                    session.session_id,
+                    request.message,
+                    session.is_vip,
+                    path,
+                    time.perf_counter() - start,
+                    response,
+                )
+                session.add_turn(request.message, response)
+                end = {"type": "end", "response": response, "has_magic_password": session.is_vip}
+                if session.draft_order is not None:
+                    end["draft_order"] = session.draft_order.model_dump()
+                if ordered is not None and ordered.order is not None:
+                    end["order_number"] = ordered.order.order_number
+                await send(end)
+
+            logger.info(
+                "WS chat - Session: %s... | Turn: %s | VIP: %s",
+                session.session_id[:8],
+                session.turns,
+                session.is_vip,
+                extra={"session": session.session_id[:8], "turn": session.turns, "vip": session.is_vip},
+            )
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        logger.warning(f"WS chat - Session: {session.session_id[:8]}... too slow to read, disconnecting")
+        try:
+            await asyncio.wait_for(websocket.close(code=1008, reason="Send timeout"), timeout=1.0)
+        except Exception:
+            pass  # The connection is unusable anyway
+    finally:
+        _ws_connections -= 1
+
+
+@app.post("/order", response_model=OrderResponse, tags=["Orders"], openapi_extra=json_body_openapi(OrderRequest))
+async def create_order(request: OrderRequest = Depends(json_body(OrderRequest)), db: OrderStore = Depends(get_db)):
     """
     Create a new order.
 
-    - **items**: List of order items with name, price, and quantity
+    - **items**: List of order items with name and quantity (prices are taken from the menu)
     - **session_id**: Optional session identifier
     """
     try:
@@ -162,26 +565,15 @@ async def create_order(request: OrderRequest):
         if not request.items:
             raise HTTPException(status_code=400, detail="Order must contain at least one item")
 
-        # Calculate total
-        total = sum(item.price * item.quantity for item in request.items)
-
-        # Get next order number
-        order_count = db.get_order_count()
-        order_number = get_next_order_number(order_count)
-
-        # Create order in database
-        db.create_order(order_number, session_id, request.items, total)
-
-        logger.info(f"Order created: #{order_number} | Total: ${total:.2f} | Session: {session_id[:8]}...")
-
-        return OrderResponse(
-            success=True,
-            order_number=order_number,
-            items=request.items,
-            total=total,
-            message=f"Order #{order_number} confirmed! Your food will be ready shortly.",
-        )
+        try:
+            order = _place_order(db, request.items, session_id)
+        except UnknownMenuItemError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        _publish_order_created(order, session_id)
+        return model_response(order)
 
+    except HTTPException:
+        raise
     except ValueError as e:
         # Order number conflict
         logger.warning(f"Order creation failed: {e}")
@@ -191,8 +583,107 @@ async def create_order(request: OrderRequest):
         raise HTTPException(status_code=500, detail=f"Failed to create order: {str(e)}")
 
 
+def _place_order(db: OrderStore, items: list[OrderItemRequest], session_id: str) -> OrderResponse:
+    """
+    Price and store an order (``POST /order`` and orders confirmed in chat).
+
+    Blocking, and safe to run in a worker thread: the caller publishes the
+    ``order_created`` event (see ``_publish_order_created``) on the event loop.
+
+    Raises:
+        UnknownMenuItemError: If any item is not on the menu
+        ValueError: If no free order number was found
+    """
+    # Price from the menu (client-sent prices are ignored); total in cents avoids float drift
+    items, total_cents = current_menu().index.price_order(items)
+    total = total_cents / 100
+
+    # Get the next order number and create the order; with several worker
+    # processes another one may claim the same number first, so retry
+    for attempt in range(ORDER_NUMBER_ATTEMPTS):
+        order_number = get_next_order_number(db.get_order_count())
+        try:
+            db.create_order(order_number, session_id, items, total)
+            break
+        except ValueError:
+            if attempt == ORDER_NUMBER_ATTEMPTS - 1:
+                raise
+
+    logger.info(
+        "Order created: #%s | Total: $%.2f | Session: %s...",
+        order_number,
+        total,
+        session_id[:8],
+        extra={"order_number": order_number, "total": total, "session": session_id[:8]},
+    )
+
+    return OrderResponse(
+        success=True,
+        order_number=order_number,
+        items=items,
+        total=total,
+        message=f"Order #{order_number} confirmed! Your food will be ready shortly.",
+    )
+
+
+def _publish_order_created(order: OrderResponse, session_id: str) -> None:
+    """Notify subscribers of a new order (call from the event loop thread)."""
+    current_order_events().publish(
+        "order_created", {"order_number": order.order_number, "session_id": session_id, "status": "confirmed"}
+    )
+
+
+# Matches the orders table timestamp format (UTC)
+TIMESTAMP_PATTERN = r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$"
+
+
+@app.get("/orders/export", tags=["Orders"])
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    since: Optional[str] = Query(None, pattern=TIMESTAMP_PATTERN, description="UTC, YYYY-MM-DD HH:MM:SS"),
+    until: Optional[str] = Query(None, pattern=TIMESTAMP_PATTERN, description="UTC, exclusive"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    db: OrderStore = Depends(get_db),
+):
+    """
+    Stream orders as NDJSON or CSV, oldest first.
+
+    Orders are read and encoded in fixed-size chunks, so memory use is
+    constant regardless of how many orders match.
+    """
+    chunks = db.iter_orders(since=since, until=until, chunk_size=chunk_size)
+    logger.info(f"Order export started | Format: {format} | Since: {since} | Until: {until}")
+    return StreamingResponse(
+        encode_orders(chunks, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
+
+
+@app.post("/orders/import", response_model=ImportResult, tags=["Orders"])
+async def import_orders(
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000),
+    db: OrderStore = Depends(get_db),
+):
+    """
+    Bulk-load orders from an NDJSON body (or CSV with `Content-Type: text/csv`).
+
+    The body is read as a stream and written in batched transactions.
+    Existing order numbers are skipped; invalid lines are reported in `errors`.
+    """
+    try:
+        is_csv = request.headers.get("content-type", "").startswith("text/csv")
+        result = await import_stream(db, request.stream(), is_csv=is_csv, batch_size=batch_size)
+        logger.info(f"Order import: {result['imported']} imported | {result['skipped']} skipped")
+        return model_response(ImportResult(**result))
+    except Exception as e:
+        logger.error(f"Order import error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to import orders: {str(e)}")
+
+
 @app.get("/order/{order_number}", response_model=OrderStatus, tags=["Orders"])
-async def get_order(order_number: int):
+async def get_order(order_number: int, db: OrderStore = Depends(get_db)):
     """
     Retrieve an order by order number.
 
@@ -207,7 +698,7 @@ async def get_order(order_number: int):
 
         logger.debug(f"Order retrieved: #{order_number}")
 
-        return OrderStatus(**order)
+        return model_response(OrderStatus(**order))
 
     except HTTPException:
         raise
@@ -216,10 +707,184 @@ async def get_order(order_number: int):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve order: {str(e)}")
 
 
+@app.patch("/order/{order_number}/status", response_model=OrderStatus, tags=["Orders"])
+async def update_order_status(order_number: int, update: OrderStatusUpdate, db: OrderStore = Depends(get_db)):
+    """
+    Move an order to its next status and notify `/orders/events` subscribers.
+
+    - **status**: confirmed -> preparing -> ready -> served, or cancelled
+      before it is served; other changes return `409`
+    """
+    (result,) = await asyncio.to_thread(db.transition_order_statuses, [(order_number, update.status)])
+    if result["previous_status"] is None:
+        raise HTTPException(status_code=404, detail=result["error"])
+    if not result["ok"]:
+        raise HTTPException(status_code=409, detail=result["error"])
+
+    _publish_status_changes([result])
+    order = await asyncio.to_thread(db.get_order, order_number)
+    return model_response(OrderStatus(**order))
+
+
+@app.post("/orders/status", response_model=BulkStatusResponse, tags=["Orders"])
+async def bulk_update_order_status(request: BulkStatusRequest, db: OrderStore = Depends(get_db)):
+    """
+    Change the status of many orders in one transaction (kitchen display).
+
+    Changes are applied in order through the same state machine as
+    `PATCH /order/{order_number}/status`. Invalid transitions and unknown
+    orders are reported per order; the valid changes are still applied.
+    """
+    changes = [(update.order_number, update.status) for update in request.updates]
+    results = await asyncio.to_thread(db.transition_order_statuses, changes)
+    _publish_status_changes(results)
+
+    updated = sum(result["ok"] for result in results)
+    logger.info(f"Bulk status update: {updated} updated | {len(results) - updated} failed")
+    return model_response(
+        BulkStatusResponse(
+            updated=updated,
+            failed=len(results) - updated,
+            results=[StatusChangeResult(**result) for result in results],
+        )
+    )
+
+
+def _publish_status_changes(results: list[dict]) -> None:
+    """Notify subscribers of every successful status change."""
+    for result in results:
+        if result["ok"]:
+            current_order_events().publish("status_changed", result, previous_status=result["previous_status"])
+            logger.info(f"Order #{result['order_number']} status: {result['previous_status']} -> {result['status']}")
+
+
+@app.get("/orders/events", tags=["Orders"])
+async def order_event_stream(
+    order_number: Optional[int] = Query(None, description="Follow one order"),
+    session_id: Optional[str] = Query(None, description="Follow every order of a session"),
+    db: OrderStore = Depends(get_db),
+):
+    """
+    Subscribe to order events as Server-Sent Events.
+
+    Follow one order (`?order_number=`), one session (`?session_id=`), or,
+    with neither, the whole kitchen feed. Events: `order_created`,
+    `status_changed` (JSON data with `order_number`, `session_id`, `status`,
+    `previous_status`, `at`); when following one order the stream starts
+    with a `snapshot` of its current state. An `overflow` event means the
+    client fell behind and missed `dropped` events.
+    """
+    initial = None
+    if order_number is not None:
+        order = db.get_order(order_number)
+        if not order:
+            raise HTTPException(status_code=404, detail=f"Order #{order_number} not found")
+        initial = OrderStatus(**order).model_dump()
+
+    events = current_order_events()
+    logger.debug(f"SSE subscriber added ({events.subscriber_count + 1} total)")
+    return StreamingResponse(
+        event_stream(events, order_number, session_id, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/analytics", response_model=AnalyticsResponse, tags=["Analytics"])
+async def get_analytics(
+    top: int = Query(5, ge=1, le=50, description="Number of best-selling items"),
+    hours: int = Query(24, ge=1, le=168, description="Number of recent hours of revenue"),
+    db: OrderStore = Depends(get_db),
+):
+    """
+    Sales analytics for managers: totals, top items, category and hourly revenue.
+
+    Served from incrementally maintained rollups, so the cost does not grow
+    with the number of orders.
+    """
+    try:
+        return model_response(AnalyticsResponse(**db.get_sales_summary(top_n=top, hours=hours)))
+    except Exception as e:
+        logger.error(f"Analytics error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to load analytics: {str(e)}")
+
+
+# ===== Debug Endpoints =====
+def require_debug_token(x_debug_token: Optional[str] = Header(None)) -> None:
+    """Reject /debug/* requests without the configured ``DEBUG_TOKEN`` (open when it is not set)."""
+    token = settings.debug_token
+    if token and not hmac.compare_digest((x_debug_token or "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Debug token required")
+
+
+@app.get(
+    "/debug/profiles",
+    response_model=list[ProfileInfo],
+    tags=["Debug"],
+    dependencies=[Depends(require_debug_token)],
+)
+async def get_profiles(limit: int = Query(50, ge=1, le=500)):
+    """
+    Recent request profiles, newest first (`PROFILING_ENABLED` only).
+
+    Profile a request by sending the `X-Profile` header; the response's
+    `X-Profile-Id` names its files under `PROFILING_DIR`.
+    """
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    profiles = await asyncio.to_thread(list_profiles, limit)
+    return [ProfileInfo(**profile) for profile in profiles]
+
+
+@app.get(
+    "/debug/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    tags=["Debug"],
+    dependencies=[Depends(require_debug_token)],
+)
+async def get_profile(profile_id: str):
+    """Text summary of one profile: top functions by cumulative time and allocation sites."""
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    summary = await asyncio.to_thread(read_profile_summary, profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return PlainTextResponse(summary)
+
+
+@app.get("/debug/traces", response_model=list[TraceInfo], tags=["Debug"], dependencies=[Depends(require_debug_token)])
+async def get_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    min_ms: float = Query(0.0, ge=0, description="Only requests that took at least this long"),
+):
+    """
+    Recent traced requests of this worker, newest first (`TRACING_ENABLED` only).
+
+    Each trace lists its spans (validation, intent routing, menu lookup,
+    prompt build, llama-server wait, database connect/query/commit) and a
+    per-stage `breakdown` of where the time went.
+    """
+    if not settings.tracing_enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    return [recent.to_dict() for recent in traces.recent(limit, min_duration_ms=min_ms)]
+
+
+@app.get(
+    "/debug/traces/{trace_id}", response_model=TraceInfo, tags=["Debug"], dependencies=[Depends(require_debug_token)]
+)
+async def get_trace(trace_id: str):
+    """One traced request with all of its spans."""
+    found = traces.get(trace_id) if settings.tracing_enabled else None
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return found.to_dict()
+
+
 # ===== Main Entry Point =====
 if __name__ == "__main__":
     import uvicorn
 
+    setup_logging()
     logger.info("=" * 60)
     logger.info("Starting Tobi's Restaurant AI...")
     logger.info(f"Server: http://{settings.host}:{settings.port}")
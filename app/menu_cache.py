@@ -0,0 +1,57 @@
+"""
+Pre-serialized /menu response.
+
+The menu is serialized to JSON once per menu version and pre-compressed, so
+serving ``GET /menu`` is a dictionary lookup plus a header comparison.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+
+from .compression import choose_encoding, compress_variants, etag_matches, strong_etag, variant_etag
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MenuPayload:
+    """Serialized menu body in every encoding, with its ETag."""
+
+    etag: str  # Of the identity body (see ``variant_etag`` for the others)
+    variants: dict[str, bytes]
+
+
+def build_menu_payload(menu: dict) -> MenuPayload:
+    """Serialize and pre-compress a menu."""
+    body = json.dumps(menu, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    payload = MenuPayload(etag=strong_etag(body), variants=compress_variants(body))
+    logger.info(
+        f"Menu payload built: {len(body)} bytes, ETag {payload.etag}, "
+        f"encodings: {', '.join(sorted(payload.variants))}"
+    )
+    return payload
+
+
+def menu_response(request: Request, payload: MenuPayload) -> Response:
+    """
+    Serve a menu payload with ETag, Cache-Control and content negotiation.
+
+    Returns 304 Not Modified when the client's ``If-None-Match`` matches.
+    """
+    encoding = choose_encoding(request.headers.get("accept-encoding"), payload.variants)
+    headers = {
+        "ETag": variant_etag(payload.etag, encoding),
+        "Cache-Control": f"public, max-age={settings.menu_cache_max_age}",
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload.variants[encoding], media_type="application/json", headers=headers)
@@ -26,6 +26,9 @@ PRESIDENTIAL_YEARS = [
     1881,
 ]
 
+# Menu categories in display order
+MENU_CATEGORIES = ["starters", "mains", "desserts", "drinks"]
+
 # The Common House Menu Data
 MENU_DATA = {
     "restaurant_name": "The Common House",
@@ -0,0 +1,122 @@
+"""
+Server-side menu index.
+
+Built once per menu version (see ``menu_versions``): normalized item name ->
+menu entry, with prices held in integer cents. Orders are validated and
+priced from this index (never from client-sent prices), and the chat path
+uses it for exact item lookups and pre-lowered search fields.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from .menu_data import MENU_CATEGORIES
+from .models import OrderItem, OrderItemRequest
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize an item name for lookup.
+
+    Case, punctuation and spacing are ignored, and "&" matches "and", so
+    "lobster mac and cheese" finds "Lobster Mac & Cheese".
+    """
+    return _NON_WORD.sub(" ", name.casefold().replace("&", " and ")).strip()
+
+
+def to_cents(price: float) -> int:
+    """Convert a menu price in dollars to integer cents."""
+    return round(price * 100)
+
+
+@dataclass(frozen=True)
+class MenuEntry:
+    """One menu item as stored in the index."""
+
+    name: str
+    category: str
+    description: str
+    price_cents: int
+    item: dict  # The original menu entry
+    name_lower: str  # Pre-lowered for substring search
+    description_lower: str
+
+    @property
+    def price(self) -> float:
+        return self.price_cents / 100
+
+
+class UnknownMenuItemError(ValueError):
+    """Raised when an order names items that are not on the menu."""
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        super().__init__(f"Unknown menu items: {', '.join(names)}")
+
+
+class MenuIndex:
+    """Normalized name -> ``MenuEntry`` index over one menu version."""
+
+    def __init__(self, menu: dict):
+        entries = []
+        for category in MENU_CATEGORIES:
+            for item in menu.get(category, []):
+                entries.append(
+                    MenuEntry(
+                        name=item["name"],
+                        category=category,
+                        description=item["description"],
+                        price_cents=to_cents(item["price"]),
+                        item=item,
+                        name_lower=item["name"].lower(),
+                        description_lower=item["description"].lower(),
+                    )
+                )
+        self.entries: tuple[MenuEntry, ...] = tuple(entries)
+        self._by_name = {normalize_name(entry.name): entry for entry in self.entries}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._by_name
+
+    def get(self, name: str) -> Optional[MenuEntry]:
+        """Look up an item by name (normalized), or None if it is not on the menu."""
+        return self._by_name.get(normalize_name(name))
+
+    def category(self, name: str) -> str:
+        """Menu category of an item, or "other" for items not on the menu."""
+        entry = self.get(name)
+        return entry.category if entry else "other"
+
+    def price_order(self, items: Iterable[OrderItemRequest]) -> tuple[list[OrderItem], int]:
+        """
+        Validate order items and price them from the menu.
+
+        Args:
+            items: Items as sent by the client (their prices are ignored)
+
+        Returns:
+            (items with canonical names and menu prices, total in cents)
+
+        Raises:
+            UnknownMenuItemError: If any item is not on the menu
+        """
+        priced, unknown, total_cents = [], [], 0
+        for item in items:
+            entry = self.get(item.name)
+            if entry is None:
+                unknown.append(item.name)
+                continue
+            priced.append(OrderItem(name=entry.name, price=entry.price, quantity=item.quantity))
+            total_cents += entry.price_cents * item.quantity
+        if unknown:
+            raise UnknownMenuItemError(unknown)
+        return priced, total_cents
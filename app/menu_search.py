@@ -0,0 +1,158 @@
+"""
+Semantic menu search over hashed n-gram embeddings.
+
+Every menu item is encoded once per menu version into a fixed-size vector:
+its words, character trigrams (for typos) and the food concepts its words
+belong to ("salmon" -> fish, "vodka" -> boozy) are hashed into
+``menu_search_dim`` buckets and the vector is L2-normalized. The vectors
+form one contiguous float32 matrix, so a query is encoded the same way and
+scored against every item with a single matrix-vector product, and a batch
+of queries with a single matrix-matrix product.
+
+No model or network is involved: "something light and fishy" finds the
+salmon bowl because both sides share the fish/light concept features.
+NumPy is only imported when the first index is built.
+"""
+
+import logging
+import re
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable
+
+from .config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .menu_index import MenuEntry
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that mean the same thing to a hungry customer; both queries and items gain the concept feature
+FOOD_CONCEPTS = {
+    "fish": {"fish", "seafood", "salmon", "cod", "tuna", "ahi", "lobster", "shrimp", "crab", "miso"},
+    "light": {"light", "fresh", "healthy", "salad", "bowl", "tartare", "lemon", "avocado", "cobb", "arugula", "snap"},
+    "boozy": {
+        "boozy",
+        "booze",
+        "alcohol",
+        "cocktail",
+        "drink",
+        "vodka",
+        "gin",
+        "bourbon",
+        "whiskey",
+        "tequila",
+        "liqueur",
+        "campari",
+        "vermouth",
+    },
+    "coffee": {"coffee", "espresso", "caffeine", "latte"},
+    "sweet": {"sweet", "dessert", "chocolate", "caramel", "cake", "torte", "pudding", "sugar", "cream", "vanilla"},
+    "meat": {"meat", "meaty", "beef", "steak", "sirloin", "burger", "patty", "rib", "bacon"},
+    "chicken": {"chicken", "poultry", "wing"},
+    "pasta": {"pasta", "noodle", "pappardelle", "spaghetti", "cavatappi", "mac", "risotto"},
+    "cheese": {"cheese", "cheesy", "parmesan", "cheddar", "gruyère", "goat", "burrata", "pecorino", "mascarpone"},
+    "spicy": {"spicy", "hot", "chili", "heat"},
+    "veggie": {"vegetarian", "veggie", "vegetable", "mushroom", "tomato", "brussel", "greens"},
+    "snack": {"snack", "share", "appetizer", "starter", "fries", "flatbread", "bite"},
+}
+_CONCEPT_OF = {word: concept for concept, words in FOOD_CONCEPTS.items() for word in words}
+
+# Relative weight of each feature kind
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.3
+CONCEPT_WEIGHT = 2.0
+
+
+def _stem(word: str) -> str:
+    """Crude plural/adjective stripping: "fishy" -> "fish", "burgers" -> "burger"."""
+    for suffix in ("ies", "es", "s", "y"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def features(text: str) -> Counter:
+    """Weighted features of a text: words, character trigrams and food concepts."""
+    weights: Counter = Counter()
+    for word in _WORD.findall(text.casefold()):
+        stem = _stem(word)
+        weights["w:" + stem] += WORD_WEIGHT
+        concept = _CONCEPT_OF.get(word) or _CONCEPT_OF.get(stem)
+        if concept:
+            weights["c:" + concept] += CONCEPT_WEIGHT
+        padded = f"<{stem}>"
+        for i in range(len(padded) - 2):
+            weights["t:" + padded[i : i + 3]] += TRIGRAM_WEIGHT
+    return weights
+
+
+def encode(texts: Iterable[str], dim: int) -> "np.ndarray":
+    """
+    Encode texts as L2-normalized hashed feature vectors.
+
+    Returns:
+        C-contiguous float32 matrix with one row per text
+    """
+    import numpy as np
+
+    texts = list(texts)
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature, weight in features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            # The hash's top bit picks the sign, so colliding features tend to cancel out
+            matrix[row, h % dim] += weight if h & 0x80000000 else -weight
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class MenuSearchIndex:
+    """Item embedding matrix for one menu version."""
+
+    def __init__(self, entries: Iterable["MenuEntry"], dim: int = 0):
+        self.entries = tuple(entries)
+        self.dim = dim or settings.menu_search_dim
+        # Names count twice: "espresso martini" should beat items merely served with espresso
+        self.matrix = encode(
+            (f"{entry.name} {entry.name} {entry.description} {entry.category}" for entry in self.entries), self.dim
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> list[tuple["MenuEntry", float]]:
+        """
+        Top-k items by cosine similarity to the query.
+
+        Returns:
+            (entry, score) pairs, best first, with scores of at least ``min_score``
+        """
+        if not self.entries:
+            return []
+        return self._top_k(self.matrix @ encode([query], self.dim)[0], k, min_score)
+
+    def search_batch(
+        self, queries: list[str], k: int = 3, min_score: float = 0.0
+    ) -> list[list[tuple["MenuEntry", float]]]:
+        """Top-k items for several queries with one matrix product."""
+        if not self.entries or not queries:
+            return [[] for _ in queries]
+        scores = encode(queries, self.dim) @ self.matrix.T  # (queries, items)
+        return [self._top_k(row, k, min_score) for row in scores]
+
+    def _top_k(self, scores: "np.ndarray", k: int, min_score: float) -> list[tuple["MenuEntry", float]]:
+        import numpy as np
+
+        if k < len(scores):
+            # Unordered top-k in linear time, then sort just those k
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.entries[i], float(scores[i])) for i in ranked if scores[i] >= min_score]
@@ -0,0 +1,286 @@
+"""
+Versioned, hot-reloadable menu.
+
+The menu comes from ``MENU_FILE`` (JSON, same shape as ``MENU_DATA``) or,
+when that is unset, the built-in ``MENU_DATA``. Each distinct menu becomes
+an immutable ``MenuVersion`` holding every derived artifact: the lookup
+index, the semantic search matrix, the chat order parser, the serialized
+and compressed ``/menu`` body and the LLM prompt pieces. A new version is
+validated and fully built before it replaces the current one in a single
+reference assignment, so readers never see a half-built menu and nothing
+is rebuilt per request.
+
+A request pins the version that was current when it started (see
+``MenuVersionMiddleware`` and ``pinned_menu``), so a reload in the middle of
+a request does not mix prices from two menus. Each location (see
+``tenants``) has its own ``MenuVersions``; ``current_menu`` picks the one of
+the request's location.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from pydantic import ValidationError
+
+from .config import settings
+from .menu_cache import MenuPayload, build_menu_payload
+from .menu_data import MENU_CATEGORIES, MENU_DATA
+from .menu_index import MenuIndex, normalize_name
+from .menu_search import MenuSearchIndex
+from .models import MenuCategory
+from .order_parser import OrderParser
+from .prompts import MenuPrompt, build_menu_prompt
+from .tenants import current_tenant
+
+logger = logging.getLogger(__name__)
+
+
+class MenuValidationError(ValueError):
+    """Raised when a menu source does not describe a valid menu."""
+
+
+@dataclass(frozen=True)
+class MenuVersion:
+    """One menu and everything derived from it."""
+
+    version: int  # Increases by one per distinct menu loaded by this process
+    fingerprint: str  # Content hash, the same in every worker for the same menu
+    source: str
+    menu: dict
+    index: MenuIndex
+    search: MenuSearchIndex
+    orders: OrderParser
+    payload: MenuPayload
+    prompt: MenuPrompt
+
+
+def validate_menu(data, restaurant_name: Optional[str] = None) -> dict:
+    """
+    Validate menu data against ``MenuCategory`` and return it in canonical form.
+
+    Args:
+        data: Parsed menu source
+        restaurant_name: Used when the menu does not name the restaurant
+            (default: ``settings.restaurant_name``)
+
+    Raises:
+        MenuValidationError: If the data is not a valid menu or names an item twice
+    """
+    if not isinstance(data, dict):
+        raise MenuValidationError("Menu must be a JSON object")
+    try:
+        categories = MenuCategory.model_validate(data)
+    except ValidationError as e:
+        raise MenuValidationError(f"Invalid menu: {e}") from e
+
+    restaurant_name = data.get("restaurant_name", restaurant_name or settings.restaurant_name)
+    if not isinstance(restaurant_name, str) or not restaurant_name:
+        raise MenuValidationError("restaurant_name must be a non-empty string")
+
+    menu = {"restaurant_name": restaurant_name}
+    seen = set()
+    for category in MENU_CATEGORIES:
+        items = [item.model_dump() for item in getattr(categories, category)]
+        for item in items:
+            key = normalize_name(item["name"])
+            if not key:
+                raise MenuValidationError(f"Item in {category} has no name")
+            if key in seen:
+                raise MenuValidationError(f"Item listed twice: {item['name']}")
+            seen.add(key)
+        menu[category] = items
+    return menu
+
+
+def menu_fingerprint(menu: dict) -> str:
+    """Content hash of a validated menu."""
+    canonical = json.dumps(menu, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def build_menu_version(menu: dict, version: int, source: str) -> MenuVersion:
+    """Build every derived artifact for a validated menu."""
+    index = MenuIndex(menu)
+    return MenuVersion(
+        version=version,
+        fingerprint=menu_fingerprint(menu),
+        source=source,
+        menu=menu,
+        index=index,
+        search=MenuSearchIndex(index.entries),
+        orders=OrderParser(index.entries),
+        payload=build_menu_payload(menu),
+        prompt=build_menu_prompt(menu),
+    )
+
+
+_pinned: contextvars.ContextVar[Optional[MenuVersion]] = contextvars.ContextVar("menu_version", default=None)
+
+
+class MenuVersions:
+    """Holds the current ``MenuVersion`` and swaps in new ones on change."""
+
+    def __init__(self, path: Optional[str] = None, restaurant_name: Optional[str] = None):
+        self._path = path
+        self.restaurant_name = restaurant_name
+        self._current: Optional[MenuVersion] = None
+        self._lock = threading.Lock()
+        self._file_state: Optional[tuple[int, int]] = None  # (mtime_ns, size) of the last file read
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path if self._path is not None else settings.menu_file
+
+    def current(self) -> MenuVersion:
+        """The version pinned by the current request, else the latest (loaded on first use)."""
+        version = _pinned.get()
+        if version is not None:
+            return version
+        version = self._current
+        if version is None:
+            with self._lock:
+                if self._current is None:
+                    self._load_locked()
+                version = self._current
+        return version
+
+    @contextmanager
+    def pinned(self) -> Iterator[MenuVersion]:
+        """Use the current version for everything inside the block, even across a reload."""
+        version = self.current()
+        token = _pinned.set(version)
+        try:
+            yield version
+        finally:
+            _pinned.reset(token)
+
+    def reload(self) -> tuple[MenuVersion, bool]:
+        """
+        Re-read the menu source and swap in a new version if the menu changed.
+
+        Returns:
+            (current version, whether it changed)
+
+        Raises:
+            MenuValidationError: If the source is unreadable or invalid (the
+                current version stays in place)
+        """
+        with self._lock:
+            previous = self._current
+            self._load_locked()
+            return self._current, self._current is not previous
+
+    def check_for_changes(self) -> Optional[MenuVersion]:
+        """
+        Reload if the menu file changed since it was last read.
+
+        Invalid files are logged and ignored, so a bad edit never takes the
+        menu down. Returns the new version, or None if nothing changed.
+        """
+        path = self.path
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.error(f"Menu file unavailable, keeping version {self.current().version}: {e}")
+            return None
+        if (stat.st_mtime_ns, stat.st_size) == self._file_state:
+            return None
+        try:
+            version, changed = self.reload()
+        except MenuValidationError as e:
+            logger.error(f"Menu file rejected, keeping version {self.current().version}: {e}")
+            return None
+        return version if changed else None
+
+    async def watch(self) -> None:
+        """Poll the menu file every ``menu_reload_interval_seconds`` and reload on change."""
+        while True:
+            await asyncio.sleep(settings.menu_reload_interval_seconds)
+            try:
+                await asyncio.to_thread(self.check_for_changes)
+            except Exception as e:
+                logger.error(f"Menu reload check failed: {e}", exc_info=True)
+
+    def _read_source(self) -> tuple[dict, str]:
+        path = self.path
+        if not path:
+            if self.restaurant_name:
+                return {**MENU_DATA, "restaurant_name": self.restaurant_name}, "built-in"
+            return MENU_DATA, "built-in"
+        try:
+            stat = os.stat(path)
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise MenuValidationError(f"Cannot read menu file {path}: {e}") from e
+        self._file_state = (stat.st_mtime_ns, stat.st_size)
+        return data, path
+
+    def _load_locked(self) -> None:
+        start = time.perf_counter()
+        data, source = self._read_source()
+        menu = validate_menu(data, self.restaurant_name)
+        previous = self._current
+        if previous is not None and previous.fingerprint == menu_fingerprint(menu):
+            return
+
+        version = build_menu_version(menu, (previous.version if previous else 0) + 1, source)
+        self._current = version  # The swap: one reference assignment
+        logger.info(
+            f"Menu version {version.version} ({version.fingerprint}) loaded from {source}: "
+            f"{len(version.index)} items in {time.perf_counter() - start:.3f}s"
+        )
+
+
+class MenuVersionMiddleware:
+    """Pins the current menu version for the duration of each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with pinned_menu():
+            await self.app(scope, receive, send)
+
+
+# Global menu versions
+menu_versions = MenuVersions()
+
+
+def current_menu_versions() -> MenuVersions:
+    """The menu versions of the request's location."""
+    tenant = current_tenant()
+    return tenant.menu_versions if tenant is not None else menu_versions
+
+
+def current_menu() -> MenuVersion:
+    """The pinned menu version, else the latest one of the request's location."""
+    version = _pinned.get()
+    if version is not None:
+        return version
+    return current_menu_versions().current()
+
+
+@contextmanager
+def pinned_menu() -> Iterator[MenuVersion]:
+    """Use the request's current menu version for everything inside the block."""
+    version = current_menu()
+    token = _pinned.set(version)
+    try:
+        yield version
+    finally:
+        _pinned.reset(token)
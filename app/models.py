@@ -2,7 +2,7 @@
 Pydantic models for request/response validation.
 """
 
-from typing import Optional
+from typing import Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -24,12 +24,70 @@ class MenuCategory(BaseModel):
     drinks: list[MenuItem]
 
 
+class MenuVersionInfo(BaseModel):
+    """The menu version being served."""
+
+    version: int
+    fingerprint: str
+    source: str
+    items: int
+    changed: bool = False  # Whether a reload swapped in a new version
+
+
+class TenantConfig(BaseModel):
+    """One location in TENANTS_FILE."""
+
+    restaurant_name: str = Field(..., min_length=1)
+    hosts: list[str] = Field(default_factory=list, description="Host names routed to this location")
+    menu_file: Optional[str] = Field(None, description="JSON menu (default: the built-in menu)")
+    database_url: Optional[str] = Field(None, description="Default: sqlite:///./data/orders-{id}.db")
+
+
+# ===== Debug Models =====
+class ProfileInfo(BaseModel):
+    """One recorded request profile."""
+
+    id: str
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    trigger: Literal["header", "sample"]
+    created_at: str
+
+
+class SpanInfo(BaseModel):
+    """One timed stage of a request."""
+
+    name: str
+    span_id: str
+    parent_id: Optional[str] = None
+    offset_ms: float = Field(description="Start, relative to the start of the request")
+    duration_ms: float
+    attributes: dict[str, Any] = {}
+    error: Optional[str] = None
+
+
+class TraceInfo(BaseModel):
+    """One traced request (or WebSocket chat turn)."""
+
+    trace_id: str
+    name: str
+    start_time: str
+    duration_ms: float
+    error: Optional[str] = None
+    attributes: dict[str, Any] = {}
+    breakdown: dict[str, float] = Field(description="Total milliseconds per stage name")
+    spans: list[SpanInfo]
+
+
 # ===== Chat Models =====
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
 
     message: str = Field(..., min_length=1, max_length=500, description="Customer message")
     session_id: Optional[str] = Field(None, description="Session identifier")
+    draft_order: Optional["OrderRequest"] = Field(None, description="Draft order returned by the previous message")
 
 
 class ChatResponse(BaseModel):
@@ -39,21 +97,29 @@ class ChatResponse(BaseModel):
     session_id: str
     has_magic_password: bool = False
     restaurant: str
+    draft_order: Optional["OrderRequest"] = None  # Order taken in chat, waiting for the customer's yes
+    order_number: Optional[int] = None  # Set when this message placed the draft order
 
 
 # ===== Order Models =====
-class OrderItem(BaseModel):
-    """Item in an order."""
+class OrderItemRequest(BaseModel):
+    """Item as a client orders it (priced from the menu)."""
 
     name: str
-    price: float = Field(gt=0)
+    price: Optional[float] = Field(None, gt=0, description="Ignored: prices are taken from the menu")
     quantity: int = Field(default=1, gt=0)
 
 
+class OrderItem(OrderItemRequest):
+    """Item in an order, at its menu price."""
+
+    price: float = Field(gt=0)
+
+
 class OrderRequest(BaseModel):
     """Request to create a new order."""
 
-    items: list[OrderItem] = Field(..., min_length=1)
+    items: list[OrderItemRequest] = Field(..., min_length=1)
     session_id: Optional[str] = None
 
 
@@ -77,6 +143,111 @@ class OrderStatus(BaseModel):
     created_at: str
 
 
+# Statuses an order can be set to
+OrderStatusValue = Literal["confirmed", "preparing", "ready", "served", "cancelled"]
+
+
+class OrderStatusUpdate(BaseModel):
+    """Request to change an order's status."""
+
+    status: OrderStatusValue
+
+
+class OrderStatusChange(BaseModel):
+    """One status change in a bulk update."""
+
+    order_number: int
+    status: OrderStatusValue
+
+
+class BulkStatusRequest(BaseModel):
+    """Request to change the status of many orders at once."""
+
+    updates: list[OrderStatusChange] = Field(..., min_length=1, max_length=500)
+
+
+class StatusChangeResult(BaseModel):
+    """Outcome of one status change."""
+
+    order_number: int
+    ok: bool
+    previous_status: Optional[str] = None
+    status: Optional[str] = None  # Status after the change (unchanged if it failed)
+    error: Optional[str] = None
+
+
+class BulkStatusResponse(BaseModel):
+    """Per-order outcome of a bulk status update."""
+
+    updated: int
+    failed: int
+    results: list[StatusChangeResult]
+
+
+class OrderRecord(BaseModel):
+    """A full order row, as exported and bulk-imported."""
+
+    order_number: int
+    session_id: Optional[str] = None
+    items: list[OrderItem] = Field(..., min_length=1)
+    total: float = Field(ge=0)
+    status: str = "confirmed"
+    created_at: Optional[str] = Field(
+        None, pattern=r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$", description="UTC, YYYY-MM-DD HH:MM:SS"
+    )
+
+
+class ImportResult(BaseModel):
+    """Outcome of a bulk order import."""
+
+    imported: int
+    skipped: int
+    errors: list[str] = []
+
+
+# ===== Analytics Models =====
+class SalesTotals(BaseModel):
+    """All-time sales totals."""
+
+    orders: int
+    items_sold: int
+    revenue: float
+
+
+class ItemSales(BaseModel):
+    """Sales for a single menu item."""
+
+    name: str
+    category: str
+    quantity: int
+    revenue: float
+
+
+class CategorySales(BaseModel):
+    """Sales for a menu category."""
+
+    category: str
+    quantity: int
+    revenue: float
+
+
+class HourlyRevenue(BaseModel):
+    """Orders and revenue for one hour bucket (UTC)."""
+
+    hour: str
+    orders: int
+    revenue: float
+
+
+class AnalyticsResponse(BaseModel):
+    """Sales analytics served from the rollup tables."""
+
+    totals: SalesTotals
+    top_items: list[ItemSales]
+    categories: list[CategorySales]
+    hourly_revenue: list[HourlyRevenue]
+
+
 # ===== Health Check =====
 class HealthResponse(BaseModel):
     """Health check response."""
@@ -85,3 +256,27 @@ class HealthResponse(BaseModel):
     environment: str
     database: str
     version: str = "1.0.0"
+
+
+class ComponentHealth(BaseModel):
+    """Cached probe result for one dependency."""
+
+    status: str = Field(description="up, down or disabled")
+    detail: Optional[str] = None
+    latency_ms: Optional[float] = None
+    checked_at: str
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response with component-level detail."""
+
+    status: str = Field(description="ready, degraded or unavailable")
+    last_check: Optional[str] = None
+    components: dict[str, ComponentHealth]
+
+
+class LivenessResponse(BaseModel):
+    """Liveness probe response."""
+
+    status: str = "alive"
+    uptime_seconds: float
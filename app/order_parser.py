@@ -0,0 +1,361 @@
+"""
+Deterministic order extraction from chat messages.
+
+Built once per menu version (see ``menu_versions``) from the menu index: every
+run of consecutive words in an item name is a phrase the customer may use for
+it ("smash burger", "mac and cheese", "negroni"), with plurals folded, and the
+phrases shared by several items ("chicken") are kept as ambiguous. A message
+is scanned left to right for the longest known phrase, each match taking the
+quantity said before it ("two", "a", "3") or after it ("x2"):
+
+    "two smash burgers and a negroni" -> 2 x House Smash Burger, 1 x Negroni
+
+Only messages that read like an order are parsed: an ordering phrase ("I'll
+have", "give me"), a quantity right before an item ("2 burgers"), or just
+items and "please" ("fries please"), in a message that is neither a question
+nor asks about the menu. "Is the negroni strong?", "what do you add to the
+smash burger?" and "tell me about the 2 burgers" stay questions about the
+menu; requests phrased as questions ("can I get two smash burgers?") are
+orders.
+No model or network is involved.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .menu_index import MenuEntry, normalize_name, to_cents
+from .models import OrderItem
+
+logger = logging.getLogger(__name__)
+
+# Largest quantity accepted per item from a chat message
+MAX_QUANTITY = 20
+
+NUMBER_WORDS = {
+    "a": 1,
+    "an": 1,
+    "one": 1,
+    "another": 1,
+    "two": 2,
+    "couple": 2,
+    "pair": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "dozen": 12,
+}
+
+# Requests phrased as a question that are still orders ("can I get two burgers?"), at the start of a message
+REQUEST_PHRASES = (
+    "can i get",
+    "can i have",
+    "could i get",
+    "could i have",
+    "can we get",
+    "can we have",
+    "could we get",
+    "could we have",
+    "may i have",
+    "may i get",
+)
+_REQUEST_PHRASE = re.compile(r"^(?:" + "|".join(REQUEST_PHRASES) + r")\b")
+
+# Phrases (normalized) that make a message an order
+ORDER_PHRASES = REQUEST_PHRASES + (
+    "i ll have",
+    "i ll take",
+    "i will have",
+    "i will take",
+    "i ll get",
+    "i ll do",
+    "ill have",
+    "ill take",
+    "i d like",
+    "id like",
+    "i would like",
+    "i want",
+    "we ll have",
+    "we ll take",
+    "we d like",
+    "we want",
+    "let me get",
+    "lemme get",
+    "get me",
+    "give me",
+)
+_ORDER_PHRASE = re.compile(r"\b(?:" + "|".join(ORDER_PHRASES) + r")\b")
+
+# Phrases (normalized) that ask about the menu rather than order from it ("I want to know if...")
+INFO_PHRASES = ("tell me", "know", "about", "explain", "describe", "wondering", "curious")
+_INFO_PHRASE = re.compile(r"\b(?:" + "|".join(INFO_PHRASES) + r")\b")
+
+# Words that start a question rather than an order
+QUESTION_WORDS = frozenset({"what", "which", "how", "is", "are", "does", "do", "whats", "who", "why", "when"})
+
+# Words that end the reach of a quantity ("two burgers and fries" is one order of fries)
+CONJUNCTIONS = frozenset({"and", "plus", "with", "then", "also"})
+NEGATIONS = frozenset({"no", "without"})
+
+# Name words that are no phrase of their own ("house" does not mean the House Smash Burger)
+GENERIC_WORDS = frozenset(
+    {
+        "and",
+        "the",
+        "of",
+        "with",
+        "house",
+        "old",
+        "warm",
+        "roasted",
+        "grilled",
+        "seared",
+        "smoked",
+        "crispy",
+        "spicy",
+        "salted",
+        "glazed",
+        "fried",
+        "oil",
+    }
+)
+
+# Whole replies read as a yes or a no (a reply may string several together: "yep, do it")
+YES_PHRASES = frozenset(
+    {
+        "yes",
+        "yeah",
+        "yep",
+        "yup",
+        "ya",
+        "sure",
+        "ok",
+        "okay",
+        "confirm",
+        "correct",
+        "perfect",
+        "do it",
+        "sounds good",
+        "place it",
+        "place the order",
+        "lock it in",
+        "that s it",
+        "that s right",
+    }
+)
+NO_PHRASES = frozenset(
+    {
+        "no",
+        "nope",
+        "nah",
+        "cancel",
+        "cancel that",
+        "cancel it",
+        "cancel the order",
+        "nevermind",
+        "never mind",
+        "forget it",
+        "scratch that",
+        "stop",
+    }
+)
+# Allowed around a yes or no ("yes please", "no thanks")
+POLITE_WORDS = frozenset({"please", "thanks", "thank", "you"})
+
+# Words a negation may skip to reach its item ("without the fries")
+NEGATION_FILLER = frozenset({"the", "any", "more"})
+
+# Words a quantity may skip to reach its item ("a couple of burgers")
+QUANTITY_FILLER = frozenset({"of"})
+
+# Words allowed besides items and quantities in a terse order ("the fries please")
+TERSE_FILLER = frozenset({"the", "of"})
+
+_TRAILING_QUANTITY = re.compile(r"^x(\d+)$")
+_LEADING_QUANTITY = re.compile(r"^(\d+)x?$")
+
+
+def singular(word: str) -> str:
+    """Fold a plural word: "burgers" -> "burger", "fries" -> "fry", "sandwiches" -> "sandwich"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "sses", "xes", "oes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _words(text: str) -> list[str]:
+    return [singular(word) for word in normalize_name(text).split()]
+
+
+@dataclass
+class ParsedOrder:
+    """Items found in one message."""
+
+    items: list[OrderItem] = field(default_factory=list)  # Canonical names and menu prices, one per item
+    ambiguous: dict[str, list[str]] = field(default_factory=dict)  # Phrase -> the items it could mean
+
+    @property
+    def total_cents(self) -> int:
+        return sum(to_cents(item.price) * item.quantity for item in self.items)
+
+
+class OrderParser:
+    """Menu phrase table and the scanner that matches messages against it."""
+
+    def __init__(self, entries: Iterable[MenuEntry]):
+        phrases: dict[tuple[str, ...], set[str]] = defaultdict(set)
+        self._entries: dict[str, MenuEntry] = {}
+        for entry in entries:
+            self._entries[entry.name] = entry
+            words = tuple(_words(entry.name))
+            for start in range(len(words)):
+                for end in range(start + 1, len(words) + 1):
+                    phrase = words[start:end]
+                    if all(word in GENERIC_WORDS for word in phrase):
+                        continue
+                    phrases[phrase].add(entry.name)
+        self._phrases = {phrase: sorted(names) for phrase, names in phrases.items()}
+        self._longest = max((len(phrase) for phrase in self._phrases), default=0)
+
+    def parse(self, message: str) -> Optional[ParsedOrder]:
+        """
+        Extract the items and quantities of an order from a chat message.
+
+        Args:
+            message: Customer's message
+
+        Returns:
+            The items found, or None if the message does not read like an order
+            or names nothing on the menu
+        """
+        words = _words(message)
+        normalized = " ".join(normalize_name(message).split())
+        quantities: dict[str, int] = {}
+        ambiguous: dict[str, list[str]] = {}
+        explicit = False  # A quantity right before or after an item
+        pending: Optional[int] = None
+        adjacent = False  # Whether ``pending`` still directly precedes the next word
+        negated = False
+        polite = other = False  # "please"/"thanks" seen; a word that is not an item, quantity or filler seen
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if word in CONJUNCTIONS:
+                pending, adjacent, negated = None, False, False
+                i += 1
+                continue
+            if word in NEGATIONS:
+                negated, other = True, True
+                i += 1
+                continue
+            phrase = self._phrase_at(words, i)
+            if phrase is None:
+                quantity = self._quantity(word)
+                if quantity is not None:
+                    pending, adjacent = quantity, True
+                elif word not in QUANTITY_FILLER:
+                    adjacent = False
+                if word not in NEGATION_FILLER:
+                    negated = False  # "no, I want two burgers" negates nothing
+                if word in POLITE_WORDS:
+                    polite = True
+                elif quantity is None and word not in TERSE_FILLER:
+                    other = True
+                i += 1
+                continue
+            i += len(phrase)
+            # "negroni x2" / "negroni x 2"
+            trailing = _TRAILING_QUANTITY.match(words[i]) if i < len(words) else None
+            if trailing:
+                pending, adjacent = int(trailing.group(1)), True
+                i += 1
+            elif i + 1 < len(words) and words[i] == "x" and words[i + 1].isdigit():
+                pending, adjacent = int(words[i + 1]), True
+                i += 2
+
+            names = self._phrases[phrase]
+            if negated or pending == 0:
+                pass  # "no fries", "0 burgers"
+            elif len(names) > 1:
+                ambiguous[" ".join(phrase)] = names
+            else:
+                explicit = explicit or adjacent
+                quantities[names[0]] = quantities.get(names[0], 0) + (pending or 1)
+            pending, adjacent, negated = None, False, False
+
+        if not quantities and not ambiguous:
+            return None
+        if _INFO_PHRASE.search(normalized):
+            return None
+        if _is_question(message, words) and not _REQUEST_PHRASE.match(normalized):
+            return None
+        if not explicit and not _ORDER_PHRASE.search(normalized) and not (polite and not other):
+            return None
+
+        items = [
+            OrderItem(name=name, price=self._entries[name].price, quantity=min(quantity, MAX_QUANTITY))
+            for name, quantity in quantities.items()
+        ]
+        return ParsedOrder(items=items, ambiguous=ambiguous)
+
+    def _phrase_at(self, words: list[str], i: int) -> Optional[tuple[str, ...]]:
+        """Longest menu phrase starting at ``words[i]``."""
+        for length in range(min(self._longest, len(words) - i), 0, -1):
+            phrase = tuple(words[i : i + length])
+            if phrase in self._phrases:
+                return phrase
+        return None
+
+    @staticmethod
+    def _quantity(word: str) -> Optional[int]:
+        if word in NUMBER_WORDS:
+            return NUMBER_WORDS[word]
+        match = _LEADING_QUANTITY.match(word)
+        return int(match.group(1)) if match else None
+
+
+def _is_question(message: str, words: list[str]) -> bool:
+    return message.rstrip().endswith("?") or (bool(words) and words[0] in QUESTION_WORDS)
+
+
+def confirmation(message: str) -> Optional[bool]:
+    """
+    Read a reply to "say yes to confirm".
+
+    The whole reply must be a yes or a no (optionally with "please" or
+    "thanks"); anything more, or a question, is left to the chat.
+
+    Returns:
+        True for a yes ("yes", "yep, do it"), False for a no ("no thanks",
+        "cancel that"), None for anything else
+    """
+    if message.rstrip().endswith("?"):
+        return None
+    words = [word for word in normalize_name(message).split() if word not in POLITE_WORDS]
+    if _spelled_with(words, NO_PHRASES):
+        return False
+    if _spelled_with(words, YES_PHRASES):
+        return True
+    return None
+
+
+def _spelled_with(words: list[str], phrases: frozenset[str]) -> bool:
+    """Whether ``words`` is one or more of ``phrases`` in a row (and not empty)."""
+    reachable = [True] + [False] * len(words)  # reachable[i]: words[:i] is made of phrases
+    for end in range(1, len(words) + 1):
+        reachable[end] = any(
+            reachable[start] and " ".join(words[start:end]) in phrases for start in range(max(0, end - 3), end)
+        )
+    return bool(words) and reachable[-1]
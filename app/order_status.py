@@ -0,0 +1,69 @@
+"""
+Order status state machine.
+
+    confirmed -> preparing -> ready -> served
+         \\            \\         \\
+          +------------+---------+--> cancelled
+
+``served`` and ``cancelled`` are final. Orders stored before statuses were
+tracked may still say ``pending``; they move like ``confirmed``.
+"""
+
+from typing import Optional
+
+ORDER_TRANSITIONS: dict[str, frozenset[str]] = {
+    "pending": frozenset({"preparing", "cancelled"}),
+    "confirmed": frozenset({"preparing", "cancelled"}),
+    "preparing": frozenset({"ready", "cancelled"}),
+    "ready": frozenset({"served", "cancelled"}),
+    "served": frozenset(),
+    "cancelled": frozenset(),
+}
+
+
+def transition_error(current: str, new: str) -> Optional[str]:
+    """
+    Check a status change against the state machine.
+
+    Returns:
+        None if allowed, otherwise a human-readable reason
+    """
+    allowed = ORDER_TRANSITIONS.get(current, frozenset())
+    if new in allowed:
+        return None
+    if not allowed:
+        return f"Order is already {current}"
+    return f"Cannot change status from {current} to {new} (allowed: {', '.join(sorted(allowed))})"
+
+
+def apply_transitions(current: dict[int, dict], changes: list[tuple[int, str]]) -> tuple[list[dict], dict[int, str]]:
+    """
+    Validate a batch of status changes against the orders' current state.
+
+    Changes are applied in order, so one batch may move an order through
+    several steps (preparing, then ready).
+
+    Args:
+        current: order_number -> {"status", "session_id"} for the orders that exist
+        changes: (order_number, new status) pairs
+
+    Returns:
+        (per-change results, order_number -> final status for every changed order)
+    """
+    statuses = {order_number: order["status"] for order_number, order in current.items()}
+    results, writes = [], {}
+    for order_number, status in changes:
+        result = {"order_number": order_number, "ok": False, "previous_status": None, "status": None, "error": None}
+        if order_number not in statuses:
+            result["error"] = f"Order #{order_number} not found"
+        else:
+            previous = statuses[order_number]
+            result.update(previous_status=previous, status=previous, session_id=current[order_number]["session_id"])
+            error = transition_error(previous, status)
+            if error:
+                result["error"] = error
+            else:
+                result.update(ok=True, status=status)
+                statuses[order_number] = writes[order_number] = status
+        results.append(result)
+    return results, writes
@@ -0,0 +1,231 @@
+"""
+Streaming order export (NDJSON/CSV) and bulk import.
+
+Both directions work chunk by chunk, so memory use does not depend on the
+number of orders. Also usable from the command line:
+
+    python -m app.orders_io export --format csv --since "2024-06-01 00:00:00" -o orders.csv
+    python -m app.orders_io import orders.ndjson
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import sys
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+from pydantic import ValidationError
+
+from .database import OrderStore, get_db
+from .models import OrderRecord
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CSV_FIELDS = ["order_number", "session_id", "created_at", "status", "total", "items"]
+
+# Cap on per-line errors reported back from an import
+MAX_REPORTED_ERRORS = 20
+
+
+def iter_ndjson(chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+    """Encode chunks of orders as NDJSON, one bytes block per chunk."""
+    for chunk in chunks:
+        yield "".join(json.dumps(order, separators=(",", ":")) + "\n" for order in chunk).encode("utf-8")
+
+
+def iter_csv(chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+    """Encode chunks of orders as CSV (items as a JSON column), one bytes block per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    yield buffer.getvalue().encode("utf-8")
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [
+                order["order_number"],
+                order["session_id"] or "",
+                order["created_at"],
+                order["status"],
+                order["total"],
+                json.dumps(order["items"], separators=(",", ":")),
+            ]
+            for order in chunk
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_orders(chunks: Iterable[list[dict]], fmt: str) -> Iterator[bytes]:
+    """Encode order chunks in an export format ("ndjson" or "csv")."""
+    if fmt == "csv":
+        return iter_csv(chunks)
+    return iter_ndjson(chunks)
+
+
+def _parse_row(raw: dict, line_number: int, errors: list[str]) -> Optional[dict]:
+    """Validate one raw order; record the error and return None if invalid."""
+    try:
+        return OrderRecord.model_validate(raw).model_dump()
+    except ValidationError as e:
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(f"line {line_number}: {e.errors()[0]['msg']}")
+        return None
+
+
+def parse_ndjson(lines: Iterable[str], errors: list[str], first_line: int = 1) -> Iterator[dict]:
+    """
+    Parse and validate NDJSON order lines, skipping blank and invalid ones.
+
+    Args:
+        lines: NDJSON lines
+        errors: Receives a message per invalid line (capped)
+        first_line: Line number of the first line, for error messages
+    """
+    for line_number, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"line {line_number}: invalid JSON ({e.msg})")
+            continue
+        order = _parse_row(raw, line_number, errors)
+        if order is not None:
+            yield order
+
+
+def parse_csv(lines: Iterable[str], errors: list[str], header: list[str], first_line: int = 2) -> Iterator[dict]:
+    """
+    Parse and validate CSV order lines (without the header), skipping invalid ones.
+
+    Args:
+        lines: CSV data lines
+        errors: Receives a message per invalid line (capped)
+        header: Column names from the header line
+        first_line: Line number of the first line, for error messages
+    """
+    for line_number, row in enumerate(csv.reader(lines), start=first_line):
+        if not row:
+            continue
+        raw: dict = dict(zip(header, row))
+        try:
+            raw["items"] = json.loads(raw.get("items") or "[]")
+        except json.JSONDecodeError as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"line {line_number}: invalid items JSON ({e.msg})")
+            continue
+        raw["session_id"] = raw.get("session_id") or None
+        order = _parse_row(raw, line_number, errors)
+        if order is not None:
+            yield order
+
+
+async def aiter_lines(byte_chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split an async stream of byte chunks (e.g. a request body) into text lines."""
+    pending = b""
+    async for chunk in byte_chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8").rstrip("\r")
+
+
+async def import_stream(
+    store: OrderStore, byte_chunks: AsyncIterable[bytes], is_csv: bool = False, batch_size: int = 500
+) -> dict:
+    """
+    Bulk-import orders from a streamed NDJSON or CSV body, one batch at a time.
+
+    Returns:
+        Dict with "imported", "skipped" and per-line "errors"
+    """
+    errors: list[str] = []
+    totals = {"imported": 0, "skipped": 0}
+    header: Optional[list[str]] = None
+    batch: list[str] = []
+    batch_start = 1
+
+    async def flush() -> None:
+        if is_csv:
+            orders = list(parse_csv(batch, errors, header or [], first_line=batch_start))
+        else:
+            orders = list(parse_ndjson(batch, errors, first_line=batch_start))
+        if orders:
+            result = await asyncio.to_thread(store.import_orders, orders, batch_size)
+            totals["imported"] += result["imported"]
+            totals["skipped"] += result["skipped"]
+
+    line_number = 0
+    async for line in aiter_lines(byte_chunks):
+        line_number += 1
+        if is_csv and header is None:
+            header = next(csv.reader([line]), [])
+            batch_start = line_number + 1
+            continue
+        batch.append(line)
+        if len(batch) >= batch_size:
+            await flush()
+            batch = []
+            batch_start = line_number + 1
+    if batch:
+        await flush()
+
+    return {**totals, "errors": errors}
+
+
+def _main(argv: Optional[list[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m app.orders_io", description="Export or import orders.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream orders to a file or stdout")
+    export_parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    export_parser.add_argument("--since", help='UTC timestamp, e.g. "2024-06-01 00:00:00"')
+    export_parser.add_argument("--until", help="UTC timestamp (exclusive)")
+    export_parser.add_argument("--chunk-size", type=int, default=500)
+    export_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+
+    import_parser = commands.add_parser("import", help="Bulk-load orders from an NDJSON or CSV file")
+    import_parser.add_argument("file", help="Input file (.ndjson/.jsonl or .csv)")
+    import_parser.add_argument("--batch-size", type=int, default=500)
+
+    args = parser.parse_args(argv)
+    store = get_db()
+
+    if args.command == "export":
+        chunks = store.iter_orders(since=args.since, until=args.until, chunk_size=args.chunk_size)
+        output = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for block in encode_orders(chunks, args.format):
+                output.write(block)
+        finally:
+            if args.output:
+                output.close()
+        return 0
+
+    errors: list[str] = []
+    with open(args.file, encoding="utf-8", newline="") as f:
+        if args.file.endswith(".csv"):
+            header = next(csv.reader([f.readline()]), [])
+            orders = parse_csv(f, errors, header)
+        else:
+            orders = parse_ndjson(f, errors)
+        result = store.import_orders(orders, batch_size=args.batch_size)
+
+    print(f"Imported {result['imported']} orders, skipped {result['skipped']} duplicates")
+    for error in errors:
+        print(f"  {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,167 @@
+"""
+Opt-in per-request profiling.
+
+With ``PROFILING_ENABLED=true`` a request is profiled when it carries the
+``X-Profile`` header (matching ``PROFILING_TOKEN`` if one is set) or is
+picked by ``PROFILING_SAMPLE_RATE``. The request then runs under cProfile
+and tracemalloc, and three files are written to ``PROFILING_DIR``:
+
+- ``{id}.prof``: pstats data (``python -m pstats``, snakeviz, ...)
+- ``{id}.txt``: top functions by cumulative time and top allocation sites
+- ``{id}.json``: request metadata, listed by ``GET /debug/profiles``
+
+The response carries ``X-Profile-Id: {id}``. Only one request is profiled at
+a time per process, and since cProfile follows the thread, the profile also
+contains whatever other coroutines ran on the event loop meanwhile.
+
+When profiling is disabled the middleware is not installed at all, and
+untriggered requests only pay for a header lookup and a random draw.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rows in the text summary
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 20
+
+_active = threading.Lock()  # One profile at a time (cProfile cannot nest)
+
+
+def profile_dir() -> Path:
+    return Path(settings.profiling_dir)
+
+
+def _triggered(scope) -> Optional[str]:
+    """Why this request should be profiled ("header" or "sample"), or None."""
+    header = settings.profiling_header.lower().encode("latin-1")
+    for name, value in scope["headers"]:
+        if name == header:
+            token = settings.profiling_token
+            if not token or value.decode("latin-1") == token:
+                return "header"
+            break
+    if settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate:
+        return "sample"
+    return None
+
+
+class ProfilingMiddleware:
+    """Profiles triggered HTTP requests (see module docstring)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = _triggered(scope)
+        if trigger is None or not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"  # Sorts by time
+        status = 0
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _active.release()
+
+            info = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                "trigger": trigger,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            # Formatting and writing can take a while; keep it off the event loop
+            await asyncio.to_thread(write_profile, info, profiler, snapshot)
+
+
+def write_profile(info: dict, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> None:
+    """Write one profile's files and prune the oldest beyond ``profiling_max_files``."""
+    directory = profile_dir()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / info["id"]
+        profiler.dump_stats(str(base.with_suffix(".prof")))
+
+        summary = io.StringIO()
+        summary.write(f"{info['method']} {info['path']} -> {info['status']} in {info['duration_ms']} ms\n\n")
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        summary.write(f"\nTop {TOP_ALLOCATIONS} allocation sites (live at end of request):\n")
+        allocations = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics("lineno")
+        for stat in allocations[:TOP_ALLOCATIONS]:
+            summary.write(f"{stat}\n")
+        base.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+        base.with_suffix(".json").write_text(json.dumps(info), encoding="utf-8")
+
+        for old in sorted(directory.glob("*.json"))[: -settings.profiling_max_files]:
+            for suffix in (".json", ".prof", ".txt"):
+                old.with_suffix(suffix).unlink(missing_ok=True)
+    except OSError as e:
+        logger.error(f"Could not write profile {info['id']}: {e}")
+        return
+    logger.info(f"Profile {info['id']} written: {info['method']} {info['path']} took {info['duration_ms']} ms")
+
+
+def list_profiles(limit: int = 50) -> list[dict]:
+    """Metadata of the most recent profiles (from every worker), newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), reverse=True)[:limit]:
+        try:
+            profiles.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue  # Being written or pruned by another worker
+    return profiles
+
+
+def read_profile_summary(profile_id: str) -> Optional[str]:
+    """Text summary of one profile, or None if there is no such profile."""
+    if not profile_id.replace("-", "").isalnum():
+        return None
+    try:
+        return (profile_dir() / f"{profile_id}.txt").read_text(encoding="utf-8")
+    except OSError:
+        return None
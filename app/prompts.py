@@ -0,0 +1,254 @@
+"""
+LLM prompt assembly under a token budget.
+
+Prefill time on a CPU llama-server grows with prompt length, so instead of
+the whole menu each prompt carries the items the customer is asking about
+in full, plus as much recent conversation and as many one-line category
+summaries as the ``llm_prompt_token_budget`` allows.
+
+The menu pieces are the same for every request of a menu version, so their
+sizes are measured once with llama-server's ``/tokenize`` endpoint and
+cached per text. Text that differs per request (the customer's message,
+conversation turns) would never hit the cache, so its size is estimated
+from the length instead of costing a ``/tokenize`` call per request. When
+llama-server cannot tokenize, every size is estimated.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from .config import settings
+from .menu_data import MENU_CATEGORIES
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+RELEVANT_HEADING = "\nItems the customer may be asking about:\n"
+SUMMARY_HEADING = "\nOur Menu:\n"
+VIP_NOTE = "\n\nIMPORTANT: This customer is a VIP! Be extra friendly and enthusiastic!"
+INSTRUCTIONS = "\n\nRespond to the customer in 1-2 short sentences. Keep it casual and fun!\n\n"
+
+# Seconds to stop asking llama-server for token counts after it failed
+TOKENIZE_RETRY_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class MenuPrompt:
+    """Prompt pieces for one menu version, built once per version."""
+
+    header: str  # Persona
+    items: dict[str, str]  # Item name -> "- Name: description ($price)"
+    summaries: tuple[tuple[str, str], ...]  # Per category: (line with item names, compact line)
+
+
+def build_menu_prompt(menu: dict) -> MenuPrompt:
+    """
+    Build the menu-dependent pieces of the llama-server prompt.
+
+    Args:
+        menu: Validated menu data (same shape as MENU_DATA)
+    """
+    header = f"""You are Tobi, a super chill surfer dude who works at {menu['restaurant_name']}.
+You're laid-back, friendly, and use casual surfer language (dude, bro, rad, sick, gnarly, etc).
+"""
+    items, summaries = {}, []
+    for category in MENU_CATEGORIES:
+        category_items = menu.get(category, [])
+        for item in category_items:
+            items[item["name"]] = f"- {item['name']}: {item['description']} (${item['price']:.2f})\n"
+        if not category_items:
+            continue
+        prices = [item["price"] for item in category_items]
+        price_range = f"${min(prices):.2f}-${max(prices):.2f}"
+        names = ", ".join(item["name"] for item in category_items)
+        summaries.append(
+            (
+                f"{category.upper()} ({price_range}): {names}\n",
+                f"{category.upper()}: {len(category_items)} items, {price_range}\n",
+            )
+        )
+    return MenuPrompt(header=header, items=items, summaries=tuple(summaries))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return math.ceil(len(text) / 4)
+
+
+class TokenCounter:
+    """Token counts from llama-server ``/tokenize``, cached per text (LRU); for text that repeats."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._retry_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    async def count(self, texts: list[str], client: Optional["httpx.AsyncClient"] = None) -> list[int]:
+        """
+        Token counts for ``texts``; cache misses are tokenized concurrently.
+
+        Args:
+            texts: Prompt pieces
+            client: HTTP client to reuse (a short-lived one is created if None)
+        """
+        missing = list({text for text in texts if text not in self._counts})
+        measured: dict[str, int] = {}
+        if missing and settings.llama_server_url and time.monotonic() >= self._retry_at:
+            measured = await self._tokenize_all(missing, client)
+
+        counts = []
+        for text in texts:
+            if text in self._counts:
+                self._counts.move_to_end(text)
+                counts.append(self._counts[text])
+            elif text in measured:
+                counts.append(measured[text])
+            else:
+                counts.append(estimate_tokens(text))  # Not cached: measure it next time
+        return counts
+
+    async def _tokenize_all(self, texts: list[str], client: Optional["httpx.AsyncClient"]) -> dict[str, int]:
+        import httpx  # Deferred: template mode never loads it
+
+        async def tokenize(http: "httpx.AsyncClient", text: str) -> int:
+            response = await http.post(f"{settings.llama_server_url}/tokenize", json={"content": text}, timeout=2.0)
+            response.raise_for_status()
+            return len(response.json()["tokens"])
+
+        try:
+            if client is not None:
+                counts = await asyncio.gather(*(tokenize(client, text) for text in texts))
+            else:
+                async with httpx.AsyncClient() as http:
+                    counts = await asyncio.gather(*(tokenize(http, text) for text in texts))
+        except Exception as e:
+            self._retry_at = time.monotonic() + TOKENIZE_RETRY_SECONDS
+            logger.warning(f"llama-server /tokenize failed, estimating prompt size: {e}")
+            return {}
+
+        measured = dict(zip(texts, counts))
+        self._counts.update(measured)
+        while len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+        return measured
+
+
+@dataclass
+class PromptStats:
+    """Size of one assembled prompt (logged per request)."""
+
+    prompt_tokens: int
+    prompt_chars: int
+    menu_items: int  # Items included in full
+    summaries: int  # Category summary lines included
+    history_turns: int  # Earlier lines of conversation included
+    budget: int
+
+
+async def build_prompt(
+    menu_prompt: MenuPrompt,
+    message: str,
+    relevant: Iterable[str] = (),
+    is_vip: bool = False,
+    history: Iterable[tuple[str, str]] = (),
+    budget: Optional[int] = None,
+    counter: Optional[TokenCounter] = None,
+    client: Optional["httpx.AsyncClient"] = None,
+) -> tuple[str, PromptStats]:
+    """
+    Assemble a prompt that fits the token budget.
+
+    The persona, instructions and customer message are always included.
+    The rest is added in priority order while it fits: relevant items in
+    full, the most recent conversation lines, then one summary line per
+    category (falling back to a compact line with just count and prices).
+
+    Args:
+        menu_prompt: Pieces of the current menu version
+        message: Customer's message
+        relevant: Names of the menu items matching the message, best first
+        is_vip: Whether the customer said the magic password
+        history: Earlier (speaker, text) lines of the conversation, oldest first
+        budget: Token budget (default ``llm_prompt_token_budget``; 0 = unlimited)
+        counter: Token counter (default: the shared cache)
+        client: HTTP client for ``/tokenize`` calls
+
+    Returns:
+        (prompt ending with "Tobi:", its size)
+    """
+    budget = settings.llm_prompt_token_budget if budget is None else budget
+    counter = token_counter if counter is None else counter
+
+    fixed = [menu_prompt.header, (VIP_NOTE if is_vip else "") + INSTRUCTIONS, f"Customer: {message}\nTobi:"]
+    items = [menu_prompt.items[name] for name in dict.fromkeys(relevant) if name in menu_prompt.items]
+    items = items[: settings.llm_prompt_max_items]
+    turns = [f"{speaker}: {text}\n" for speaker, text in history]
+    full_summaries = [full for full, _ in menu_prompt.summaries]
+    compact_summaries = [compact for _, compact in menu_prompt.summaries]
+
+    # Measure the pieces that repeat across requests; estimate the ones that are new every time
+    repeating = [*fixed[:2], RELEVANT_HEADING, SUMMARY_HEADING, *items, *full_summaries, *compact_summaries]
+    sizes = dict(zip(repeating, await counter.count(repeating, client)))
+    sizes.update((piece, estimate_tokens(piece)) for piece in (fixed[2], *turns))
+    limit = budget if budget > 0 else math.inf
+    used = sum(sizes[piece] for piece in fixed)
+
+    def fits(*candidates: str) -> bool:
+        nonlocal used
+        size = sum(sizes[piece] for piece in candidates)
+        if used + size > limit:
+            return False
+        used += size
+        return True
+
+    kept_items = []
+    for line in items:
+        heading = () if kept_items else (RELEVANT_HEADING,)
+        if not fits(line, *heading):
+            break
+        kept_items.append(line)
+
+    kept_turns = []
+    for line in reversed(turns):  # Newest first; an older line is useless without the newer ones
+        if not fits(line):
+            break
+        kept_turns.insert(0, line)
+
+    kept_summaries = []
+    for full, compact in zip(full_summaries, compact_summaries):
+        heading = () if kept_summaries else (SUMMARY_HEADING,)
+        if fits(full, *heading):
+            kept_summaries.append(full)
+        elif fits(compact, *heading):
+            kept_summaries.append(compact)
+
+    menu_context = menu_prompt.header
+    if kept_items:
+        menu_context += RELEVANT_HEADING + "".join(kept_items)
+    if kept_summaries:
+        menu_context += SUMMARY_HEADING + "".join(kept_summaries)
+    text = menu_context + fixed[1] + "".join(kept_turns) + fixed[2]
+
+    stats = PromptStats(
+        prompt_tokens=used,
+        prompt_chars=len(text),
+        menu_items=len(kept_items),
+        summaries=len(kept_summaries),
+        history_turns=len(kept_turns),
+        budget=budget,
+    )
+    return text, stats
+
+
+# Shared token count cache
+token_counter = TokenCounter(max_entries=settings.llm_token_cache_size)
@@ -0,0 +1,224 @@
+"""
+In-process rate limiting and load shedding for ``/chat``.
+
+Three token buckets guard each chat request:
+
+- per client IP and per ``session_id``, so one client cannot flood the bot
+- one global bucket whose refill rate adapts to observed llama-server
+  latency: it backs off multiplicatively while responses are slower than
+  the target and recovers additively once they are fast again
+
+A rejected request gets ``429 Too Many Requests`` with ``Retry-After`` and
+uses up no tokens (those taken by the limits it passed are given back).
+Buckets are two floats each and idle ones are evicted (a bucket that has
+refilled completely carries no state worth keeping).
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens/second up to ``burst``."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """
+        Try to take one token.
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / rate if rate > 0 else math.inf
+
+    def refund(self, burst: float) -> None:
+        """Give back a token taken for a request that was rejected elsewhere."""
+        self.tokens = min(burst, self.tokens + 1.0)
+
+
+class RateLimiter:
+    """Keyed token buckets with idle eviction."""
+
+    def __init__(self, rate: float, burst: float, idle_seconds: float = 600.0):
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = idle_seconds
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Take a token from ``key``'s bucket.
+
+        Returns:
+            0.0 if allowed, otherwise seconds to wait before retrying
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._last_sweep >= self.idle_seconds:
+                self._evict_idle(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.burst, now)
+            return bucket.take(self.rate, self.burst, now)
+
+    def refund(self, key: str) -> None:
+        """Give back the token ``check`` took from ``key``'s bucket."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.refund(self.burst)
+
+    def _evict_idle(self, now: float) -> None:
+        cutoff = now - self.idle_seconds
+        idle = [key for key, bucket in self._buckets.items() if bucket.updated < cutoff]
+        for key in idle:
+            del self._buckets[key]
+        self._last_sweep = now
+        if idle:
+            logger.debug(f"Rate limiter evicted {len(idle)} idle buckets, {len(self._buckets)} remain")
+
+
+class AdaptiveLimiter:
+    """
+    Global token bucket whose rate tracks llama-server latency (AIMD).
+
+    Each observed latency updates an exponential moving average. While the
+    average exceeds ``target_latency`` the rate is multiplied by
+    ``decrease_factor`` (down to ``min_rate``); otherwise it grows by
+    ``increase_step`` (up to ``max_rate``).
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float,
+        burst: float,
+        target_latency: float,
+        decrease_factor: float = 0.8,
+        increase_step: float = 1.0,
+        smoothing: float = 0.2,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.smoothing = smoothing
+        self.rate = max_rate
+        self.latency_ewma: Optional[float] = None
+        self._bucket = TokenBucket(burst, time.monotonic())
+        self._lock = threading.Lock()
+
+    def check(self, now: Optional[float] = None) -> float:
+        """Take a token from the global bucket (0.0 if allowed, else seconds to wait)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._bucket.take(self.rate, self.burst, now)
+
+    def refund(self) -> None:
+        """Give back the token ``check`` took."""
+        with self._lock:
+            self._bucket.refund(self.burst)
+
+    def record_latency(self, seconds: float) -> None:
+        """Feed one llama-server response time into the controller."""
+        with self._lock:
+            if self.latency_ewma is None:
+                self.latency_ewma = seconds
+            else:
+                self.latency_ewma += self.smoothing * (seconds - self.latency_ewma)
+            previous = self.rate
+            if self.latency_ewma > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+        if self.rate < previous and previous == self.max_rate:
+            logger.warning(
+                f"LLM latency {self.latency_ewma:.2f}s above {self.target_latency:.2f}s target, "
+                f"shedding chat load (global rate {self.rate:.1f}/s)"
+            )
+
+
+class ChatRateLimits:
+    """Per-IP, per-session and global adaptive limits for chat requests."""
+
+    def __init__(self):
+        self.per_ip = RateLimiter(
+            settings.chat_rate_per_ip, settings.chat_burst_per_ip, settings.rate_limit_idle_seconds
+        )
+        self.per_session = RateLimiter(
+            settings.chat_rate_per_session, settings.chat_burst_per_session, settings.rate_limit_idle_seconds
+        )
+        self.global_limit = AdaptiveLimiter(
+            max_rate=settings.chat_global_max_rate,
+            min_rate=settings.chat_global_min_rate,
+            burst=settings.chat_global_burst,
+            target_latency=settings.llm_latency_target_seconds,
+        )
+
+    def check(self, client_ip: Optional[str], session_id: Optional[str]) -> Optional[tuple[str, float]]:
+        """
+        Check a chat request against every limit.
+
+        A rejected request is not charged: tokens taken by the limits checked
+        before the one that rejected it are refunded.
+
+        Returns:
+            None if allowed, otherwise (limit name, seconds to wait)
+        """
+        if not settings.rate_limit_enabled:
+            return None
+        checks = []  # (limit name, take a token, give it back)
+        if client_ip:
+            checks.append(("ip", lambda: self.per_ip.check(client_ip), lambda: self.per_ip.refund(client_ip)))
+        if session_id:
+            checks.append(
+                ("session", lambda: self.per_session.check(session_id), lambda: self.per_session.refund(session_id))
+            )
+        checks.append(("global", self.global_limit.check, self.global_limit.refund))
+
+        taken = []
+        for name, check, refund in checks:
+            wait = check()
+            if wait > 0:
+                for give_back in taken:
+                    give_back()
+                return name, wait
+            taken.append(refund)
+        return None
+
+    def record_llm_latency(self, seconds: float) -> None:
+        """Report a llama-server response time to the global limiter."""
+        self.global_limit.record_latency(seconds)
+
+
+def retry_after_header(wait_seconds: float) -> str:
+    """``Retry-After`` value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(min(wait_seconds, 3600))))
+
+
+# Global limits for the chat endpoint
+chat_rate_limits = ChatRateLimits()
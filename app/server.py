@@ -0,0 +1,282 @@
+"""
+Production server: a pre-forking master running N uvicorn workers.
+
+The master imports the application, builds the shared read-only state (the
+current menu version with its index, /menu payload and LLM prompt prefix,
+and the database schema) and binds the listening socket once, then forks
+the workers, so every worker starts with that work already done and shares
+the memory copy-on-write. A worker drops the connection pool it inherits
+and opens its own connections.
+
+Signals (sent to the master):
+
+- ``SIGTERM`` / ``SIGINT``: graceful shutdown of every worker
+- ``SIGHUP``: rolling restart, one worker at a time; each replacement is
+  serving before the worker it replaces is asked to finish its requests.
+  Replacements are forked from the master, so they run the code and
+  settings the master loaded at startup: it recycles workers (memory,
+  connections) but does not deploy new code or configuration, which needs
+  a full restart. Menu file changes are picked up without either (see
+  ``menu_versions``).
+
+Workers share order events (SSE streams) through a relay directory the
+master creates (see ``events.EventRelay``). Each worker logs to its own
+file next to ``LOG_FILE`` (``logs/app.worker-1.log``; the master keeps
+``logs/app.log``), since every process rotates the file it writes, and only
+worker 0 runs the archival job. Workers that die unexpectedly are replaced.
+Platforms without ``fork`` (Windows) and ``--workers 1`` run a single
+in-process server instead.
+
+Usage:
+    python -m app.server [--host HOST] [--port PORT] [--workers N]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long a new worker gets to start serving during a rolling restart
+WORKER_STARTUP_TIMEOUT = 30.0
+
+
+def default_workers() -> int:
+    """Worker count: ``WORKERS`` if set, otherwise one per CPU."""
+    return settings.workers if settings.workers > 0 else (os.cpu_count() or 1)
+
+
+def worker_log_file(slot: int) -> str:
+    """``logs/app.log`` -> ``logs/app.worker-<slot>.log``."""
+    path = Path(settings.log_file)
+    return str(path.with_name(f"{path.stem}.worker-{slot}{path.suffix}"))
+
+
+def preload() -> None:
+    """Build everything workers would otherwise each build on first request."""
+    start = time.perf_counter()
+    from . import main  # noqa: F401  (builds the FastAPI app and its routes)
+    from .database import get_db
+    from .menu_versions import current_menu
+
+    current_menu()  # Menu index, search matrix, /menu payload and prompt pieces
+    get_db()  # Creates the schema and backfills rollups once, not once per worker
+    logger.info(f"Preloaded app, menu index, /menu payload, prompt and schema in {time.perf_counter() - start:.3f}s")
+
+
+class _NotifyingServer(uvicorn.Server):
+    """uvicorn server that tells the master (through a pipe) once it is serving."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets: Optional[list[socket.socket]] = None) -> None:
+        await super().startup(sockets)
+        try:
+            if self.started:
+                os.write(self.ready_fd, b"1")
+        except OSError:
+            pass  # Nobody is waiting (initial start or respawn)
+        finally:
+            os.close(self.ready_fd)
+
+
+class Master:
+    """Forks, supervises and restarts workers sharing one listening socket."""
+
+    def __init__(self, host: str, port: int, workers: int):
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.workers: dict[int, int] = {}  # pid -> worker slot
+        self.sock: Optional[socket.socket] = None
+        self.relay_dir: Optional[str] = None  # Order event relay sockets of the workers
+        self._stopping = False
+        self._reload_requested = False
+
+    def bind(self) -> None:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def spawn(self, slot: int) -> tuple[int, int]:
+        """
+        Fork one worker.
+
+        Returns:
+            (worker pid, read end of its readiness pipe)
+        """
+        from .logging_config import setup_logging, shutdown_logging
+
+        ready_r, ready_w = os.pipe()
+        # The log listener thread does not survive fork; stop it so no record is mid-flight
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:  # Worker
+            os.close(ready_r)
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            setup_logging(worker_log_file(slot))
+            self._run_worker(slot, ready_w)
+            os._exit(0)
+
+        setup_logging()
+        os.close(ready_w)
+        self.workers[pid] = slot
+        logger.info(f"Worker {slot} started (pid {pid})")
+        return pid, ready_r
+
+    def _run_worker(self, slot: int, ready_fd: int) -> None:
+        from .database import get_db
+        from .main import app
+
+        # Keep the preloaded store but not the master's pooled connections (shared sockets after fork)
+        get_db().after_fork()
+        app.state.event_relay_dir = self.relay_dir
+        # One worker is enough to run the archival job
+        app.state.run_archival = slot == 0
+
+        config = uvicorn.Config(
+            app,
+            log_level=settings.log_level.lower(),
+            log_config=None,  # Keep the application's logging setup
+            timeout_graceful_shutdown=settings.graceful_timeout_seconds,
+        )
+        try:
+            _NotifyingServer(config, ready_fd).run(sockets=[self.sock])
+        except Exception as e:
+            logger.error(f"Worker {slot} crashed: {e}", exc_info=True)
+            os._exit(1)
+
+    def _wait_ready(self, pid: int, ready_fd: int) -> bool:
+        """Block until a worker reports it is serving (False if it died or timed out)."""
+        import select
+
+        try:
+            readable, _, _ = select.select([ready_fd], [], [], WORKER_STARTUP_TIMEOUT)
+            return bool(readable) and os.read(ready_fd, 1) == b"1"
+        finally:
+            os.close(ready_fd)
+
+    def _stop_worker(self, pid: int, timeout: float) -> None:
+        """Ask a worker to finish in-flight requests and exit; kill it after ``timeout``."""
+        try:
+            os.kill(pid, signal.SIGTERM)
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+                if done:
+                    self.workers.pop(pid, None)
+                    return
+                time.sleep(0.1)
+        except (ProcessLookupError, ChildProcessError):
+            self.workers.pop(pid, None)
+            return
+        logger.warning(f"Worker pid {pid} did not exit within {timeout:.0f}s, killing it")
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def rolling_restart(self) -> None:
+        """Replace workers one at a time without dropping capacity."""
+        logger.info(f"Rolling restart of {len(self.workers)} workers")
+        for old_pid, slot in list(self.workers.items()):
+            new_pid, ready_fd = self.spawn(slot)
+            if not self._wait_ready(new_pid, ready_fd):
+                logger.error(f"Replacement for worker {slot} failed to start; keeping pid {old_pid}")
+                self._stop_worker(new_pid, timeout=5.0)
+                continue
+            self._stop_worker(old_pid, timeout=settings.graceful_timeout_seconds + 5)
+        logger.info("Rolling restart complete")
+
+    def _reap(self) -> None:
+        """Replace workers that exited on their own."""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            if slot is not None and not self._stopping:
+                logger.error(f"Worker {slot} (pid {pid}) exited with status {status}, restarting it")
+                _, ready_fd = self.spawn(slot)
+                os.close(ready_fd)
+
+    def _handle_stop(self, sig: int, frame) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, sig: int, frame) -> None:
+        self._reload_requested = True
+
+    def run(self) -> None:
+        self.bind()
+        self.relay_dir = tempfile.mkdtemp(prefix="restaurant-events-")
+        preload()
+        logger.info(f"Master pid {os.getpid()} serving http://{self.host}:{self.port} with {self.num_workers} workers")
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        for slot in range(self.num_workers):
+            _, ready_fd = self.spawn(slot)
+            os.close(ready_fd)
+
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                self.rolling_restart()
+            self._reap()
+            time.sleep(0.5)
+
+        logger.info("Shutting down workers")
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.workers):
+            self._stop_worker(pid, timeout=settings.graceful_timeout_seconds + 5)
+        self.sock.close()
+        shutil.rmtree(self.relay_dir, ignore_errors=True)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run Restaurant AI with multiple worker processes")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Default: WORKERS or CPU count")
+    args = parser.parse_args(argv)
+
+    from .logging_config import setup_logging
+
+    setup_logging()
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        preload()
+        from .main import app
+
+        uvicorn.run(app, host=args.host, port=args.port, log_level=settings.log_level.lower(), log_config=None)
+        return 0
+
+    Master(args.host, args.port, args.workers).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
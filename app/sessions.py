@@ -0,0 +1,94 @@
+"""
+Chat session state shared across turns (and reconnects) of one customer.
+
+Sessions live in process memory, keyed by ``session_id``. Each keeps the
+last few turns for the LLM prompt and whether the customer has unlocked VIP
+mode, plus the order being put together in chat (see ``chat_orders``).
+Least-recently-used sessions are evicted beyond ``max_sessions`` and
+idle ones after ``idle_seconds``.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .config import settings
+from .models import OrderRequest
+from .tenants import current_tenant
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatSession:
+    """State for one customer's conversation."""
+
+    session_id: str
+    history: deque = field(default_factory=lambda: deque(maxlen=settings.chat_history_turns * 2))
+    is_vip: bool = False
+    turns: int = 0
+    last_active: float = field(default_factory=time.monotonic)
+    draft_order: Optional[OrderRequest] = None  # Waiting for the customer's yes (/ws/chat)
+
+    def add_turn(self, message: str, response: str) -> None:
+        """Record one customer message and Tobi's reply."""
+        self.history.append(("Customer", message))
+        self.history.append(("Tobi", response))
+        self.turns += 1
+        self.last_active = time.monotonic()
+
+
+class SessionStore:
+    """LRU map of ``session_id`` -> ``ChatSession`` with idle expiry."""
+
+    def __init__(self, max_sessions: int = 10000, idle_seconds: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        """
+        Return the session for ``session_id``, creating it if unknown or expired.
+
+        Args:
+            session_id: Client-supplied identifier (a new one is generated if None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None and now - session.last_active > self.idle_seconds:
+                session = None
+            if session is None:
+                session = ChatSession(session_id=session_id or str(uuid.uuid4()))
+                self._sessions[session.session_id] = session
+                self._evict(now)
+            else:
+                self._sessions.move_to_end(session.session_id)
+            session.last_active = now
+            return session
+
+    def _evict(self, now: float) -> None:
+        # Oldest first: stop at the first session that is recent and within capacity
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_active <= self.idle_seconds:
+                break
+            del self._sessions[oldest.session_id]
+
+
+# Global session store for chat (the default location's; see ``current_chat_sessions``)
+chat_sessions = SessionStore(max_sessions=settings.chat_session_max, idle_seconds=settings.chat_session_idle_seconds)
+
+
+def current_chat_sessions() -> SessionStore:
+    """The chat sessions of the request's location."""
+    tenant = current_tenant()
+    return tenant.sessions if tenant is not None else chat_sessions
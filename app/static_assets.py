@@ -0,0 +1,206 @@
+"""
+Precompressed, fingerprinted static files.
+
+Every file under ``static/`` is read once at startup, compressed (gzip, and
+brotli when installed; text types only) and given strong ETags from its
+content hash (one per encoding, see ``compression``). Each file is served at two URLs:
+
+- ``/static/restaurant_chat.html``: the plain name, cached for
+  ``STATIC_CACHE_MAX_AGE`` seconds and then revalidated (a cheap ``304``
+  while the file is unchanged)
+- ``/static/restaurant_chat.3f2a9c1b7d04.html``: the fingerprinted name,
+  which changes with the content, so it is cached for a year as
+  ``immutable`` and never revalidated
+
+``/static/asset-manifest.json`` maps plain names to fingerprinted URLs for
+clients that link assets. Files are served from memory in the best encoding
+the client accepts; only files present at startup are served. In
+development the directory is rescanned on each request so edits show up
+without a restart.
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+
+from .compression import choose_encoding, compress_variants, etag_matches, strong_etag, variant_etag
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cache-Control for fingerprinted URLs (their content never changes)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MANIFEST_NAME = "asset-manifest.json"
+
+# Hex digits of the content hash in fingerprinted names
+FINGERPRINT_LENGTH = 12
+
+# Media types worth compressing (images and fonts are compressed already)
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml", "application/xml")
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """One static file in every encoding."""
+
+    name: str  # Path relative to the static directory, "/"-separated
+    url: str  # Fingerprinted URL
+    media_type: str
+    etag: str  # Of the identity body (see ``variant_etag`` for the others)
+    variants: dict[str, bytes]
+
+
+def fingerprinted_name(name: str, digest: str) -> str:
+    """``css/app.css`` -> ``css/app.<digest>.css``."""
+    stem, dot, extension = name.rpartition(".")
+    if not dot or "/" in extension:  # No extension
+        return f"{name}.{digest}"
+    return f"{stem}.{digest}.{extension}"
+
+
+def build_asset(name: str, body: bytes, mount_path: str = "/static") -> StaticAsset:
+    """Hash and (for text types) pre-compress one file."""
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    digest = hashlib.sha256(body).hexdigest()[:FINGERPRINT_LENGTH]
+    compressible = media_type.startswith(COMPRESSIBLE_TYPES)
+    return StaticAsset(
+        name=name,
+        url=f"{mount_path}/{fingerprinted_name(name, digest)}",
+        media_type=media_type,
+        etag=strong_etag(body),
+        variants=compress_variants(body) if compressible else {"identity": body},
+    )
+
+
+class StaticAssets:
+    """ASGI app serving a directory's files from memory (mount it at ``mount_path``)."""
+
+    def __init__(self, directory: Path, mount_path: str = "/static", rescan: bool = False):
+        """
+        Args:
+            directory: Directory to serve (files starting with "." are skipped)
+            mount_path: URL prefix the app is mounted at (for fingerprinted URLs)
+            rescan: Rebuild when files change (checked on every request; for development)
+        """
+        self.directory = Path(directory)
+        self.mount_path = mount_path
+        self.rescan = rescan
+        self._routes: Optional[dict[str, tuple[StaticAsset, bool]]] = None  # Path -> (asset, fingerprinted)
+        self._assets: dict[str, StaticAsset] = {}
+        self._signature: tuple = ()
+        self._lock = threading.Lock()
+
+    @property
+    def assets(self) -> dict[str, StaticAsset]:
+        """Plain name -> asset (built on first use)."""
+        self._ensure_built()
+        return self._assets
+
+    def url_for(self, name: str) -> str:
+        """Fingerprinted URL of a file, or its plain URL if it is not known."""
+        asset = self.assets.get(name)
+        return asset.url if asset else f"{self.mount_path}/{name}"
+
+    def build(self) -> None:
+        """Read, hash and compress every file (runs at startup)."""
+        with self._lock:
+            self._build_locked(self._scan())
+
+    def _ensure_built(self) -> None:
+        if self._routes is not None and not self.rescan:
+            return
+        files = self._scan()
+        if self._routes is None or self._signature_of(files) != self._signature:
+            with self._lock:
+                if self._routes is None or self._signature_of(files) != self._signature:
+                    self._build_locked(files)
+
+    def _scan(self) -> list[tuple[str, os.stat_result]]:
+        files = []
+        if self.directory.is_dir():
+            for path in sorted(self.directory.rglob("*")):
+                relative = path.relative_to(self.directory)
+                if path.is_file() and not any(part.startswith(".") for part in relative.parts):
+                    files.append((relative.as_posix(), path.stat()))
+        return files
+
+    @staticmethod
+    def _signature_of(files: list[tuple[str, os.stat_result]]) -> tuple:
+        return tuple((name, stat.st_mtime_ns, stat.st_size) for name, stat in files)
+
+    def _build_locked(self, files: list[tuple[str, os.stat_result]]) -> None:
+        assets, routes = {}, {}
+        raw = compressed = 0
+        for name, _ in files:
+            try:
+                body = (self.directory / name).read_bytes()
+            except OSError as e:
+                logger.warning(f"Static file {name} skipped: {e}")
+                continue
+            asset = build_asset(name, body, self.mount_path)
+            assets[name] = asset
+            routes[name] = (asset, False)
+            routes[asset.url[len(self.mount_path) + 1 :]] = (asset, True)
+            raw += len(body)
+            compressed += min(len(variant) for variant in asset.variants.values())
+
+        manifest = json.dumps({name: asset.url for name, asset in assets.items()}, indent=2).encode("utf-8")
+        routes[MANIFEST_NAME] = (build_asset(MANIFEST_NAME, manifest, self.mount_path), False)
+
+        self._assets, self._routes = assets, routes
+        self._signature = self._signature_of(files)
+        logger.info(f"Static assets built: {len(assets)} files, {raw} bytes ({compressed} bytes compressed)")
+
+    def response(self, path: str, headers: Headers) -> Response:
+        """Response for a path below the mount point."""
+        self._ensure_built()
+        found = self._routes.get(path)
+        if found is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        asset, fingerprinted = found
+
+        encoding = choose_encoding(headers.get("accept-encoding"), asset.variants)
+        response_headers = {
+            "ETag": variant_etag(asset.etag, encoding),
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL if fingerprinted else f"public, max-age={settings.static_cache_max_age}"
+            ),
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(headers.get("if-none-match"), asset.etag):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=response_headers)
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        if scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            response = self.response(_route_path(scope).lstrip("/"), Headers(scope=scope))
+        if scope["method"] == "HEAD":
+            # Headers only, Content-Length of the body that GET would send
+            response.body = b""
+        await response(scope, receive, send)
+
+
+def _route_path(scope) -> str:
+    """Request path below the mount point (``Mount`` extends ``root_path``)."""
+    path, root_path = scope["path"], scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        return path[len(root_path) :]
+    return path
@@ -0,0 +1,325 @@
+"""
+Multi-location (tenant) routing.
+
+Locations are listed in ``TENANTS_FILE`` (JSON object: location id ->
+``TenantConfig``). A request belongs to a location when its path starts with
+``/locations/{id}/`` (the prefix is stripped before routing) or its Host is
+one of the location's ``hosts``; every other request is served by the
+default single-location setup.
+
+Each location gets its own menu versions (index, /menu payload, prompt
+prefix), order store (and so its own order-number sequence), chat sessions
+and order event bus. They are built on the location's first request and
+dropped again after ``tenant_idle_seconds`` without traffic, so one process
+can serve many locations while only paying for the busy ones. A location
+whose orders live only in memory (``memory://``) is never dropped once it
+has taken orders. Archival covers every configured location, loaded or not.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from .config import settings
+from .models import TenantConfig
+
+if TYPE_CHECKING:
+    from .database import OrderStore
+    from .events import OrderEventBus
+    from .menu_versions import MenuVersions
+    from .sessions import SessionStore
+
+logger = logging.getLogger(__name__)
+
+PATH_PREFIX = "/locations/"
+
+_current: ContextVar[Optional["Tenant"]] = ContextVar("tenant", default=None)
+
+
+def current_tenant() -> Optional["Tenant"]:
+    """The location of the request being handled, or None for the default location."""
+    return _current.get()
+
+
+class Tenant:
+    """One location's configuration and lazily built state."""
+
+    def __init__(self, tenant_id: str, config: TenantConfig):
+        self.tenant_id = tenant_id
+        self.config = config
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._menu_versions: Optional["MenuVersions"] = None
+        self._db: Optional["OrderStore"] = None
+        self._events: Optional["OrderEventBus"] = None
+        self._sessions: Optional["SessionStore"] = None
+
+    @property
+    def database_url(self) -> str:
+        return self.config.database_url or f"sqlite:///./data/orders-{self.tenant_id}.db"
+
+    # Deferred imports below: those modules look up the current tenant through this one
+
+    @property
+    def menu_versions(self) -> "MenuVersions":
+        if self._menu_versions is None:
+            from .menu_versions import MenuVersions
+
+            with self._lock:
+                if self._menu_versions is None:
+                    # "" (not None) means the built-in menu rather than the global MENU_FILE
+                    self._menu_versions = MenuVersions(
+                        path=self.config.menu_file or "", restaurant_name=self.config.restaurant_name
+                    )
+        return self._menu_versions
+
+    @property
+    def db(self) -> "OrderStore":
+        if self._db is None:
+            from .database import create_database
+
+            with self._lock:
+                if self._db is None:
+                    self._db = create_database(self.database_url)
+        return self._db
+
+    @property
+    def events(self) -> "OrderEventBus":
+        if self._events is None:
+            from .events import OrderEventBus
+
+            with self._lock:
+                if self._events is None:
+                    self._events = OrderEventBus(max_buffer=settings.sse_buffer_size, location=self.tenant_id)
+        return self._events
+
+    @property
+    def sessions(self) -> "SessionStore":
+        if self._sessions is None:
+            from .sessions import SessionStore
+
+            with self._lock:
+                if self._sessions is None:
+                    self._sessions = SessionStore(
+                        max_sessions=settings.chat_session_max, idle_seconds=settings.chat_session_idle_seconds
+                    )
+        return self._sessions
+
+    @property
+    def created_events(self) -> Optional["OrderEventBus"]:
+        """The event bus if it exists yet (nobody can be subscribed before it does)."""
+        return self._events
+
+    @property
+    def in_use(self) -> bool:
+        """Whether the location must stay loaded: clients are streaming from it, or it holds orders only in memory."""
+        from .database import MemoryDatabase
+
+        streaming = self._events is not None and self._events.subscriber_count > 0
+        return streaming or (isinstance(self._db, MemoryDatabase) and self._db.get_order_count() > 0)
+
+    def close(self) -> None:
+        """Release the order store's connections (after eviction)."""
+        if self._db is not None:
+            self._db.close()
+
+
+class TenantRegistry:
+    """Resolves requests to locations and keeps the recently used ones loaded."""
+
+    def __init__(self, configs: dict[str, TenantConfig], idle_seconds: float = 1800.0, max_loaded: int = 50):
+        self.configs = configs
+        self.idle_seconds = idle_seconds
+        self.max_loaded = max_loaded
+        self._by_host = {host.lower(): tenant_id for tenant_id, config in configs.items() for host in config.hosts}
+        self._loaded: OrderedDict[str, Tenant] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "TenantRegistry":
+        """
+        Load location configs from a JSON file.
+
+        Raises:
+            ValueError: If the file is unreadable or a config is invalid
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                configs = TypeAdapter(dict[str, TenantConfig]).validate_python(json.load(f))
+        except (OSError, ValidationError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid tenants file {path}: {e}") from e
+        for tenant_id in configs:
+            if not tenant_id or not tenant_id.replace("-", "").isalnum() or tenant_id != tenant_id.lower():
+                raise ValueError(f"Invalid location id {tenant_id!r} (use lowercase letters, digits and '-')")
+        return cls(configs, idle_seconds=settings.tenant_idle_seconds, max_loaded=settings.tenant_max_loaded)
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self.configs
+
+    @property
+    def loaded(self) -> list[str]:
+        return list(self._loaded)
+
+    def resolve(self, host: Optional[str], path: str) -> tuple[Optional[str], str, str]:
+        """
+        Find the location a request is for.
+
+        Args:
+            host: Host header (port ignored)
+            path: Request path
+
+        Returns:
+            (location id or None, path with any location prefix removed, the removed prefix)
+        """
+        if path.startswith(PATH_PREFIX):
+            tenant_id, _, rest = path[len(PATH_PREFIX) :].partition("/")
+            return tenant_id, "/" + rest, PATH_PREFIX + tenant_id
+        if host:
+            tenant_id = self._by_host.get(host.rsplit(":", 1)[0].lower())
+            if tenant_id is not None:
+                return tenant_id, path, ""
+        return None, path, ""
+
+    def peek(self, tenant_id: str) -> Optional[Tenant]:
+        """A location's state if it is loaded, without loading it or counting as use."""
+        return self._loaded.get(tenant_id)
+
+    def get(self, tenant_id: str) -> Tenant:
+        """Return a location's state, loading it on first use and evicting idle ones."""
+        now = time.monotonic()
+        with self._lock:
+            tenant = self._loaded.get(tenant_id)
+            if tenant is None:
+                tenant = Tenant(tenant_id, self.configs[tenant_id])
+                self._loaded[tenant_id] = tenant
+                logger.info(f"Location {tenant_id} loaded ({len(self._loaded)} loaded)")
+            else:
+                self._loaded.move_to_end(tenant_id)
+            tenant.last_used = now
+            self._evict(now)
+            return tenant
+
+    def _evict(self, now: float) -> None:
+        # Least recently used first; the location just requested (last) and ones with live event streams are kept
+        for tenant_id, tenant in list(self._loaded.items())[:-1]:
+            over_capacity = len(self._loaded) > self.max_loaded
+            if not over_capacity and now - tenant.last_used <= self.idle_seconds:
+                break
+            if tenant.in_use:
+                continue
+            del self._loaded[tenant_id]
+            tenant.close()
+            logger.info(f"Location {tenant_id} evicted after {now - tenant.last_used:.0f}s idle")
+
+    def archive_orders(self, cutoff: str) -> int:
+        """
+        Archive old orders of every configured location.
+
+        Locations that are not loaded get a store opened just for this (and
+        closed again); a failing location is logged and skipped.
+
+        Returns:
+            Orders archived across all locations
+        """
+        from .database import create_database
+
+        archived = 0
+        for tenant_id, config in self.configs.items():
+            tenant = self.peek(tenant_id)
+            store = tenant.db if tenant is not None else create_database(Tenant(tenant_id, config).database_url)
+            try:
+                archived += store.archive_orders(cutoff)
+            except Exception as e:
+                logger.error(f"Order archival failed for location {tenant_id}: {e}", exc_info=True)
+            finally:
+                if tenant is None:
+                    store.close()
+        return archived
+
+    def check_menus(self) -> None:
+        """Reload the menu of every loaded location whose menu file changed."""
+        for tenant in list(self._loaded.values()):
+            if tenant.config.menu_file:
+                tenant.menu_versions.check_for_changes()
+
+    async def watch(self) -> None:
+        """Check loaded locations' menu files every ``menu_reload_interval_seconds``."""
+        while True:
+            await asyncio.sleep(settings.menu_reload_interval_seconds)
+            try:
+                await asyncio.to_thread(self.check_menus)
+            except Exception as e:
+                logger.error(f"Location menu check failed: {e}", exc_info=True)
+
+
+class TenantMiddleware:
+    """Routes HTTP and WebSocket requests to their location."""
+
+    def __init__(self, app, registry: Optional[TenantRegistry] = None):
+        self.app = app
+        self._registry = registry
+
+    @property
+    def registry(self) -> Optional[TenantRegistry]:
+        return self._registry if self._registry is not None else get_tenant_registry()
+
+    async def __call__(self, scope, receive, send):
+        registry = self.registry
+        if registry is None or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        host = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"host"), None)
+        tenant_id, path, prefix = registry.resolve(host, scope["path"])
+        if tenant_id is None:
+            await self.app(scope, receive, send)
+            return
+        if tenant_id not in registry:
+            await _reject(scope, receive, send, f"Unknown location: {tenant_id}")
+            return
+
+        if prefix:
+            scope = dict(scope, path=path, raw_path=path.encode(), root_path=scope.get("root_path", "") + prefix)
+        token = _current.set(registry.get(tenant_id))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+
+
+async def _reject(scope, receive, send, detail: str) -> None:
+    if scope["type"] == "websocket":
+        await send({"type": "websocket.close", "code": 1008, "reason": detail})
+        return
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": 404, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+_registry: Optional[TenantRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_tenant_registry() -> Optional[TenantRegistry]:
+    """The configured locations (loaded from ``TENANTS_FILE`` on first use), or None if unset."""
+    global _registry
+    if _registry is None and settings.tenants_file:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TenantRegistry.from_file(settings.tenants_file)
+                logger.info(f"{len(_registry.configs)} locations configured: {', '.join(sorted(_registry.configs))}")
+    return _registry
+
+
+def set_tenant_registry(registry: Optional[TenantRegistry]) -> None:
+    """Replace the global registry (``None`` reloads it from settings on next use)."""
+    global _registry
+    _registry = registry
@@ -2,15 +2,29 @@
 Tobi AI - Menu-aware chatbot with surfer personality.
 """
 
+import json
 import random
 import logging
-import httpx
-
-from .menu_data import MENU_DATA
+import time
+from contextvars import ContextVar
+from dataclasses import asdict
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Optional
+
+from .menu_versions import current_menu
+from .prompts import build_prompt
+from .generation import GenerationLevel, generation_controller
+from .rate_limit import chat_rate_limits
 from .config import settings
+from .tracing import record_span, span, traced
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+# How the latest response in this context was produced (template name, "llm" or "llm_fallback")
+_answer_path: ContextVar[Optional[str]] = ContextVar("answer_path", default=None)
+
 
 # Tobi's response templates
 TOBI_RESPONSES = {
@@ -39,6 +53,7 @@ TOBI_RESPONSES = {
 }
 
 
+@traced("find_menu_item")
 def find_menu_item(query: str) -> list[tuple[str, dict]]:
     """
     Search for menu items matching the query.
@@ -49,6 +64,14 @@ def find_menu_item(query: str) -> list[tuple[str, dict]]:
     Returns:
         List of tuples containing (category, item_dict)
     """
+    menu = current_menu()
+    menu_index = menu.index
+
+    # Exact item name ("house smash burger") is a single dictionary lookup
+    entry = menu_index.get(query)
+    if entry is not None:
+        return [(entry.category, entry.item)]
+
     query_lower = query.lower()
     matches = []
 
@@ -69,36 +92,42 @@ def find_menu_item(query: str) -> list[tuple[str, dict]]:
     query_words = query_lower.split()
     food_keywords = [w.rstrip("s?!.,") for w in query_words if len(w) > 3]
 
-    # Search through all menu categories
-    for category in ["starters", "mains", "desserts", "drinks"]:
-        for item in MENU_DATA[category]:
-            item_name_lower = item["name"].lower()
-            item_desc_lower = item["description"].lower()
-
-            # Direct match in name or description
-            if query_lower in item_name_lower or item_name_lower in query_lower:
-                matches.append((category, item))
-                continue
-            elif query_lower in item_desc_lower:
-                matches.append((category, item))
-                continue
-
-            # Check food mappings
-            for keyword in food_keywords:
-                if keyword in food_mappings:
-                    # Check if any mapped term is in the item
-                    if any(term in item_name_lower or term in item_desc_lower for term in food_mappings[keyword]):
-                        matches.append((category, item))
-                        break
-                # Direct keyword match
-                elif keyword in item_name_lower or keyword in item_desc_lower:
+    # Search through all menu items (names and descriptions are pre-lowered in the index)
+    for entry in menu_index.entries:
+        category, item = entry.category, entry.item
+        item_name_lower = entry.name_lower
+        item_desc_lower = entry.description_lower
+
+        # Direct match in name or description
+        if query_lower in item_name_lower or item_name_lower in query_lower:
+            matches.append((category, item))
+            continue
+        elif query_lower in item_desc_lower:
+            matches.append((category, item))
+            continue
+
+        # Check food mappings
+        for keyword in food_keywords:
+            if keyword in food_mappings:
+                # Check if any mapped term is in the item
+                if any(term in item_name_lower or term in item_desc_lower for term in food_mappings[keyword]):
                     matches.append((category, item))
                     break
+            # Direct keyword match
+            elif keyword in item_name_lower or keyword in item_desc_lower:
+                matches.append((category, item))
+                break
+
+    if not matches:
+        # Nothing by keyword ("something light and fishy"): fall back to semantic search
+        hits = menu.search.search(query, k=3, min_score=settings.menu_search_min_score)
+        matches = [(entry.category, entry.item) for entry, _ in hits]
 
     logger.debug(f"Found {len(matches)} matches for query: {query}")
     return matches
 
 
+@traced("intent_routing")
 def get_tobi_response(prompt: str, is_vip: bool = False) -> str:
     """
     Generate Tobi's response based on keywords and menu context.
@@ -108,19 +137,26 @@ def get_tobi_response(prompt: str, is_vip: bool = False) -> str:
         is_vip: Whether the user said the magic password
 
     Returns:
-        Tobi's response string
+        Tobi's response string (``answer_path()`` tells which template was used)
     """
+    path, response = _template_response(prompt, is_vip)
+    _answer_path.set(path)
+    return response
+
+
+def _template_response(prompt: str, is_vip: bool) -> tuple[str, str]:
+    """(answer path, response) for a message in template mode."""
     prompt_lower = prompt.lower()
 
     # Check for VIP first
     if is_vip:
-        return random.choice(TOBI_RESPONSES["vip"])
+        return "vip", random.choice(TOBI_RESPONSES["vip"])
 
     # Check for greetings (only if it's JUST a greeting)
     greeting_words = ["hi", "hello", "hey", "sup", "yo"]
     words = prompt_lower.split()
     if len(words) <= 3 and any(word in greeting_words for word in words):
-        return random.choice(TOBI_RESPONSES["greeting"])
+        return "greeting", random.choice(TOBI_RESPONSES["greeting"])
 
     # Search for specific menu items FIRST (more specific)
     menu_matches = find_menu_item(prompt)
@@ -133,7 +169,7 @@ def get_tobi_response(prompt: str, is_vip: bool = False) -> str:
             adj = random.choice(surfer_adjectives)
 
             price_str = f"${item['price']:.2f}"
-            return (
+            return "menu_item", (
                 f"Oh dude, the {item['name']} is {adj}! It's {item['description']} - "
                 f"totally worth the {price_str}. Want me to add it to your order?"
             )
@@ -141,17 +177,17 @@ def get_tobi_response(prompt: str, is_vip: bool = False) -> str:
             # Multiple matches
             item_names = [item[1]["name"] for item in menu_matches[:3]]
             if len(item_names) == 2:
-                return (
+                return "menu_items", (
                     f"Nice! We've got {item_names[0]} and {item_names[1]}. "
                     f"Both are super tasty bro! Which one sounds good?"
                 )
             else:
                 items_str = ", ".join(item_names[:-1]) + f", and {item_names[-1]}"
-                return f"Dude, we've got {items_str}! All of them are awesome. What are you feeling?"
+                return "menu_items", f"Dude, we've got {items_str}! All of them are awesome. What are you feeling?"
 
     # Check if asking about menu in general
     if any(word in prompt_lower for word in ["menu", "what do you have", "what do you serve"]):
-        return random.choice(TOBI_RESPONSES["menu"])
+        return "menu", random.choice(TOBI_RESPONSES["menu"])
 
     # Check for recommendations
     if any(word in prompt_lower for word in ["recommend", "suggest", "best", "popular"]):
@@ -161,88 +197,170 @@ def get_tobi_response(prompt: str, is_vip: bool = False) -> str:
             "The Truffle Fries are a total hit, dude!",
             "Everyone loves the Lobster Mac & Cheese - it's next level!",
         ]
-        return random.choice(popular_items)
+        return "recommendation", random.choice(popular_items)
 
     # Check for price-related questions
     if any(word in prompt_lower for word in ["price", "cost", "how much", "expensive"]):
-        return (
+        return "price", (
             "Our prices are super fair dude! Starters are around $11-16, "
             "mains are $16-32, and drinks are $11-14. Want to see the full menu?"
         )
 
     # Default responses
-    return random.choice(TOBI_RESPONSES["default"])
+    return "default", random.choice(TOBI_RESPONSES["default"])
 
 
-async def get_ai_response(prompt: str, is_vip: bool = False) -> str:
+def answer_path() -> Optional[str]:
     """
-    Get response from local AI model via llama-server.
+    How the latest response of this request or turn was produced.
+
+    A template name ("greeting", "menu_item", "price", ...) in template mode,
+    "llm" for a llama-server answer, or "llm_fallback" when llama-server
+    failed and a template was used instead. None before any response.
+    """
+    return _answer_path.get()
+
+
+@traced("magic_password")
+def is_magic_password(message: str) -> bool:
+    """Check whether a message contains the VIP magic password (if enabled)."""
+    return settings.enable_magic_password and settings.magic_password.lower() in message.lower()
+
+
+async def build_chat_prompt(
+    prompt: str,
+    is_vip: bool = False,
+    history: Iterable[tuple[str, str]] = (),
+    client: Optional["httpx.AsyncClient"] = None,
+    budget: Optional[int] = None,
+) -> str:
+    """
+    Build the llama-server prompt for one customer message.
+
+    Only the menu items matching the message are included in full; the rest
+    of the menu is summarized to keep the prompt within the token budget.
 
     Args:
         prompt: User's message
         is_vip: Whether the user said the magic password
+        history: Earlier (speaker, text) turns of the conversation, oldest first
+        client: HTTP client to reuse for token counting
+        budget: Token budget (default ``llm_prompt_token_budget``)
 
     Returns:
-        AI-generated response string
+        Prompt text ending with "Tobi:" for the model to complete
     """
-    if not settings.llama_server_url:
-        logger.warning("llama_server_url not configured, falling back to templates")
-        return get_tobi_response(prompt, is_vip)
+    with span("prompt_build") as prompt_span:
+        relevant = [item["name"] for _, item in find_menu_item(prompt)]
+        full_prompt, stats = await build_prompt(
+            current_menu().prompt, prompt, relevant, is_vip=is_vip, history=history, budget=budget, client=client
+        )
+        if prompt_span is not None:
+            prompt_span.set(tokens=stats.prompt_tokens, items=stats.menu_items)
+    logger.info(
+        "LLM prompt: %s tokens (budget %s) | %s chars | %s items, %s summaries, %s history lines",
+        stats.prompt_tokens,
+        stats.budget or "none",
+        stats.prompt_chars,
+        stats.menu_items,
+        stats.summaries,
+        stats.history_turns,
+        extra=asdict(stats),
+    )
+    return full_prompt
+
+
+def _completion_request(full_prompt: str, stream: bool = False, max_tokens: int = 100) -> dict:
+    """llama-server /completion request body."""
+    return {
+        "prompt": full_prompt,
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "stop": ["\n", "Customer:", "Tobi:"],
+        "stream": stream,
+    }
 
-    # Build menu context for the AI
-    menu_context = f"""You are Tobi, a super chill surfer dude who works at {settings.restaurant_name}.
-You're laid-back, friendly, and use casual surfer language (dude, bro, rad, sick, gnarly, etc).
 
-Our Menu:
+def _shed_to_template(prompt: str, is_vip: bool, level: GenerationLevel) -> Optional[str]:
+    """Template response if the message's intent is served by templates at this load level, else None."""
+    if not level.template_intents:
+        return None
+    path, response = _template_response(prompt, is_vip)
+    if path not in level.template_intents:
+        return None
+    _answer_path.set(path)
+    return response
 
-STARTERS:
-"""
-    for item in MENU_DATA["starters"]:
-        menu_context += f"- {item['name']}: {item['description']} (${item['price']:.2f})\n"
 
-    menu_context += "\nMAINS:\n"
-    for item in MENU_DATA["mains"]:
-        menu_context += f"- {item['name']}: {item['description']} (${item['price']:.2f})\n"
+def _record_llm_latency(seconds: float) -> None:
+    chat_rate_limits.record_llm_latency(seconds)
+    generation_controller.record_latency(seconds)
+
+
+def _llm_fallback(prompt: str, is_vip: bool) -> str:
+    """Template response used because llama-server failed."""
+    response = get_tobi_response(prompt, is_vip)
+    _answer_path.set("llm_fallback")
+    return response
+
+
+async def get_ai_response(prompt: str, is_vip: bool = False) -> str:
+    """
+    Get response from local AI model via llama-server.
 
-    menu_context += "\nDESSERTS:\n"
-    for item in MENU_DATA["desserts"]:
-        menu_context += f"- {item['name']}: {item['description']} (${item['price']:.2f})\n"
+    Args:
+        prompt: User's message
+        is_vip: Whether the user said the magic password
 
-    menu_context += "\nDRINKS:\n"
-    for item in MENU_DATA["drinks"]:
-        menu_context += f"- {item['name']}: {item['description']} (${item['price']:.2f})\n"
+    Returns:
+        AI-generated response string
+    """
+    if not settings.llama_server_url:
+        logger.warning("llama_server_url not configured, falling back to templates")
+        return get_tobi_response(prompt, is_vip)
 
-    vip_note = "\n\nIMPORTANT: This customer is a VIP! Be extra friendly and enthusiastic!" if is_vip else ""
-    menu_context += vip_note
-    menu_context += "\n\nRespond to the customer in 1-2 short sentences. Keep it casual and fun!"
+    # Under load, simple intents are answered from templates and the rest with a cheaper generation
+    level = generation_controller.current()
+    shed = _shed_to_template(prompt, is_vip, level)
+    if shed is not None:
+        return shed
 
     # Call llama-server API
+    import httpx  # Deferred: template mode never loads it
+
+    start = time.perf_counter()
     try:
         async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{settings.llama_server_url}/completion",
-                json={
-                    "prompt": f"{menu_context}\n\nCustomer: {prompt}\nTobi:",
-                    "max_tokens": 100,
-                    "temperature": 0.7,
-                    "stop": ["\n", "Customer:", "Tobi:"],
-                },
-            )
+            budget = level.prompt_budget(settings.llm_prompt_token_budget)
+            full_prompt = await build_chat_prompt(prompt, is_vip, client=client, budget=budget)
+            with span("llm_wait", level=level.name), generation_controller.track():
+                response = await client.post(
+                    f"{settings.llama_server_url}/completion",
+                    json=_completion_request(full_prompt, max_tokens=level.max_tokens),
+                )
+            _record_llm_latency(time.perf_counter() - start)
             response.raise_for_status()
             result = response.json()
             ai_text = result.get("content", "").strip()
 
             if not ai_text:
                 logger.warning("AI returned empty response, using template fallback")
-                return get_tobi_response(prompt, is_vip)
+                return _llm_fallback(prompt, is_vip)
 
-            logger.info(f"AI response: {ai_text}")
+            logger.debug("AI response: %s", ai_text, extra={"response_chars": len(ai_text)})
+            _answer_path.set("llm")
             return ai_text
 
+    except httpx.TimeoutException as e:
+        # A timeout is the strongest overload signal there is
+        _record_llm_latency(time.perf_counter() - start)
+        logger.error(f"Error calling llama-server: {e}")
+        logger.info("Falling back to template responses")
+        return _llm_fallback(prompt, is_vip)
     except Exception as e:
         logger.error(f"Error calling llama-server: {e}")
         logger.info("Falling back to template responses")
-        return get_tobi_response(prompt, is_vip)
+        return _llm_fallback(prompt, is_vip)
 
 
 async def get_tobi_response_async(prompt: str, is_vip: bool = False) -> str:
@@ -261,3 +379,75 @@ async def get_tobi_response_async(prompt: str, is_vip: bool = False) -> str:
         return await get_ai_response(prompt, is_vip)
     else:
         return get_tobi_response(prompt, is_vip)
+
+
+async def stream_tobi_response(
+    prompt: str, is_vip: bool = False, history: Iterable[tuple[str, str]] = ()
+) -> AsyncIterator[str]:
+    """
+    Stream Tobi's response as it is generated.
+
+    With llama-server configured, tokens are yielded as the model produces
+    them (``"stream": true``); in template mode, or if llama-server fails
+    before producing anything, the template response is yielded whole.
+
+    Args:
+        prompt: User's message
+        is_vip: Whether the user said the magic password
+        history: Earlier (speaker, text) turns of the conversation, oldest first
+
+    Yields:
+        Response text chunks
+    """
+    if not (settings.use_local_ai and settings.llama_server_url):
+        yield get_tobi_response(prompt, is_vip)
+        return
+
+    level = generation_controller.current()
+    shed = _shed_to_template(prompt, is_vip, level)
+    if shed is not None:
+        yield shed
+        return
+
+    import httpx  # Deferred: template mode never loads it
+
+    produced = False
+    start = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            budget = level.prompt_budget(settings.llm_prompt_token_budget)
+            history = history if level.history else ()
+            full_prompt = await build_chat_prompt(prompt, is_vip, history, client, budget)
+            # Spans are recorded by hand: a span() block must not stay open across a yield
+            wait_start = time.time_ns()
+            request = _completion_request(full_prompt, stream=True, max_tokens=level.max_tokens)
+            with generation_controller.track():
+                async with client.stream("POST", f"{settings.llama_server_url}/completion", json=request) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data: "):
+                            continue
+                        chunk = json.loads(line[len("data: ") :])
+                        text = chunk.get("content", "")
+                        if not produced:
+                            text = text.lstrip()
+                        if text:
+                            if not produced:
+                                record_span("llm_wait", wait_start, stream=True)  # Until the first token
+                                _answer_path.set("llm")
+                            produced = True
+                            yield text
+                        if chunk.get("stop"):
+                            break
+            record_span("llm_generate", wait_start)
+        _record_llm_latency(time.perf_counter() - start)
+    except Exception as e:
+        if isinstance(e, httpx.TimeoutException):
+            _record_llm_latency(time.perf_counter() - start)
+        logger.error(f"Error streaming from llama-server: {e}")
+        if produced:
+            return
+        logger.info("Falling back to template responses")
+
+    if not produced:
+        yield _llm_fallback(prompt, is_vip)
@@ -0,0 +1,295 @@
+"""
+In-process request tracing.
+
+Each HTTP request (and each WebSocket chat turn) becomes a trace: a root
+span plus child spans around the stages worth timing (body validation,
+magic-password check, intent routing, ``find_menu_item``, prompt build, the
+llama-server wait, database connect/query/commit). Finished traces are kept
+in a bounded ring buffer and served at ``GET /debug/traces``, so a slow chat
+can be pinned on the LLM, the database or our own code without running a
+collector. Off unless ``TRACING_ENABLED`` is set: traces carry session ids
+and timings of real customers, so set ``DEBUG_TOKEN`` too in production.
+
+With ``TRACING_EXPORT_FILE`` set, every finished trace is also appended to
+that file as one line of OTLP/JSON (the format of the OpenTelemetry
+Collector's file exporter), written by a background thread (``jsonl_writer``).
+
+``span()`` outside a trace does nothing, so instrumented code costs a
+context variable lookup when tracing is disabled.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from .config import settings
+from .jsonl_writer import JSONLinesWriter
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Requests that are not traced: probes, scrapes and static files would crowd out
+# everything else, and event streams stay open for minutes
+UNTRACED_PREFIXES = ("/health", "/metrics", "/static/", "/debug/", "/orders/events")
+
+
+class Span:
+    """One timed stage of a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes (e.g. a status code or row count known only at the end)."""
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """All spans of one request; the first span is the root."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: list[Span] = []
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def to_dict(self) -> dict:
+        """Trace summary with a per-stage breakdown (offsets relative to the start of the request)."""
+        root = self.root
+        breakdown: dict[str, float] = {}
+        for span in self.spans[1:]:
+            breakdown[span.name] = round(breakdown.get(span.name, 0.0) + span.duration_ms, 3)
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "start_time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(root.start_ns / 1e9)) + "Z",
+            "duration_ms": round(root.duration_ms, 3),
+            "error": next((span.error for span in self.spans if span.error), None),
+            "attributes": dict(root.attributes),
+            "breakdown": breakdown,
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "offset_ms": round((span.start_ns - root.start_ns) / 1e6, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                    "attributes": dict(span.attributes),
+                    "error": span.error,
+                }
+                for span in self.spans
+            ],
+        }
+
+    def to_otlp(self) -> dict:
+        """The trace as an OTLP/JSON ``ExportTraceServiceRequest``."""
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                "name": span.name,
+                "kind": 1 if span.parent_id else 2,  # INTERNAL, SERVER
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns if span.end_ns is not None else span.start_ns),
+                "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {},
+            }
+            for span in self.spans
+        ]
+        resource = {"attributes": [_otlp_attribute("service.name", settings.tracing_service_name)]}
+        return {
+            "resourceSpans": [{"resource": resource, "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}]}]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}  # int64 is a string in OTLP/JSON
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span of the current trace, or None outside a trace."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time the block as a child of the current span.
+
+    Yields the span (None outside a trace). Exceptions are recorded on the
+    span and re-raised.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    parent.trace.spans.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current.reset(token)
+
+
+def record_span(name: str, start_ns: int, end_ns: Optional[int] = None, **attributes: Any) -> None:
+    """
+    Add an already finished stage to the current trace.
+
+    For stages that cannot be wrapped in ``span()``, such as the wait for
+    llama-server's first streamed token inside an async generator.
+    """
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    child.start_ns = start_ns
+    child.end_ns = end_ns if end_ns is not None else time.time_ns()
+    parent.trace.spans.append(child)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator: run a (synchronous) function inside ``span(name)``."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)  # Not tracing: skip the context manager
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+@contextmanager
+def trace(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Start a new trace with a root span; when the block ends it goes to the buffer (and export file).
+
+    Yields the root span, or None when tracing is disabled.
+    """
+    if not settings.tracing_enabled:
+        yield None
+        return
+    new = Trace()
+    root = Span(new, name, None, attributes)
+    new.spans.append(root)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _current.reset(token)
+        traces.add(new)
+
+
+class TraceBuffer:
+    """The most recent finished traces (oldest dropped first)."""
+
+    def __init__(self, max_traces: int = 200):
+        self._traces: deque[Trace] = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        self._exporter: Optional[JSONLinesWriter] = None
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def add(self, finished: Trace) -> None:
+        with self._lock:
+            self._traces.append(finished)
+        if settings.tracing_export_file:
+            if self._exporter is None:
+                with self._lock:
+                    if self._exporter is None:
+                        self._exporter = JSONLinesWriter(settings.tracing_export_file, encode=Trace.to_otlp)
+            self._exporter.submit(finished)
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> list[Trace]:
+        """Finished traces, newest first, lasting at least ``min_duration_ms``."""
+        with self._lock:
+            snapshot = list(self._traces)
+        matching = [t for t in reversed(snapshot) if t.root.duration_ms >= min_duration_ms]
+        return matching[:limit]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return next((t for t in self._traces if t.trace_id == trace_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+class TracingMiddleware:
+    """Wraps each HTTP request in a trace."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNTRACED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        with trace(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"]}) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    root.set(**{"http.status_code": message["status"]})
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+
+# Finished traces of this process
+traces = TraceBuffer(max_traces=settings.tracing_buffer_size)
@@ -0,0 +1,70 @@
+"""
+Benchmark semantic menu search on large synthetic menus.
+
+Builds an index of N generated items and times single and batched top-k
+queries (the matrix product plus top-k selection, including query encoding).
+
+    python benchmarks/bench_menu_search.py --items 5000 --queries 2000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.menu_index import MenuEntry  # noqa: E402
+from app.menu_search import MenuSearchIndex  # noqa: E402
+
+WORDS = (
+    "salmon cod tuna vodka espresso cheddar pappardelle burger steak chicken lemon avocado chocolate caramel "
+    "chili garlic basil tomato mushroom rice bowl fries truffle bacon egg gin bourbon lime honey ginger"
+).split()
+
+QUERIES = ["something light and fishy", "a boozy coffee drink", "cheesy pasta", "something sweet", "meaty"]
+
+
+def synthetic_entries(count: int) -> list[MenuEntry]:
+    rng = random.Random(42)
+    entries = []
+    for i in range(count):
+        name = f"{' '.join(rng.sample(WORDS, 2)).title()} {i}"
+        description = ", ".join(rng.sample(WORDS, 4))
+        entries.append(MenuEntry(name, "mains", description, 1500, {}, name.lower(), description))
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = MenuSearchIndex(synthetic_entries(args.items), dim=args.dim)
+    print(f"Index: {args.items} items x {args.dim} dims built in {time.perf_counter() - start:.3f}s")
+
+    for query in QUERIES:  # Warm-up
+        index.search(query, args.k)
+
+    start = time.perf_counter()
+    for i in range(args.queries):
+        index.search(QUERIES[i % len(QUERIES)], args.k)
+    single = (time.perf_counter() - start) / args.queries
+    print(f"Single query:  {single * 1e6:8.1f} us")
+
+    batch = [QUERIES[i % len(QUERIES)] for i in range(64)]
+    start = time.perf_counter()
+    rounds = max(1, args.queries // len(batch))
+    for _ in range(rounds):
+        index.search_batch(batch, args.k)
+    batched = (time.perf_counter() - start) / (rounds * len(batch))
+    print(f"Batched (64):  {batched * 1e6:8.1f} us per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -41,3 +41,11 @@ def sample_order_items():
 def sample_chat_messages():
     """Provide sample chat messages for testing."""
     return ["hello", "what burgers do you have?", "i'm on yelp", "what do you recommend?", "how much does it cost?"]
+
+
+@pytest.fixture
+def memory_db():
+    """Provide a fresh in-memory order store."""
+    from app.database import MemoryDatabase
+
+    return MemoryDatabase()
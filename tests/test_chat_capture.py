@@ -0,0 +1,187 @@
+"""
+Test suite for chat traffic capture and replay.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.chat_capture import (
+    _capture_writer,
+    _main,
+    format_comparison,
+    http_target,
+    in_process_target,
+    read_capture,
+    replay,
+    summarize,
+)
+from app.database import get_db
+from app.main import app
+
+client = TestClient(app)
+
+
+def record(message, path="default", ms=1.0, ts=1000.0, **extra):
+    return {
+        "ts": ts,
+        "channel": "http",
+        "session": "abc",
+        "message": message,
+        "vip": False,
+        "path": path,
+        "ms": ms,
+        **extra,
+    }
+
+
+def write_capture(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+    return str(path)
+
+
+class TestCapture:
+    """Test recording of answered chat messages."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.setattr("app.chat_capture.settings.chat_capture_file", None)
+        assert _capture_writer() is None
+
+    @pytest.mark.parametrize("name", ["chat.jsonl", "chat.jsonl.gz"])
+    def test_http_chat_recorded(self, monkeypatch, tmp_path, name):
+        capture = tmp_path / name
+        monkeypatch.setattr("app.chat_capture.settings.chat_capture_file", str(capture))
+
+        response = client.post("/chat", json={"message": "how much does it cost?", "session_id": "sess-12345"})
+        assert response.status_code == 200
+        assert response.headers["x-answer-path"] == "price"
+        _capture_writer().flush()
+
+        [captured] = read_capture(str(capture))
+        assert captured["channel"] == "http"
+        assert captured["session"] == "sess-123"
+        assert captured["message"] == "how much does it cost?"
+        assert captured["path"] == "price"
+        assert captured["response"] == response.json()["response"]
+        assert captured["ms"] >= 0
+        if name.endswith(".gz"):
+            assert gzip.decompress(capture.read_bytes())
+
+    def test_websocket_turn_recorded(self, monkeypatch, tmp_path):
+        capture = tmp_path / "chat.jsonl"
+        monkeypatch.setattr("app.chat_capture.settings.chat_capture_file", str(capture))
+        with client.websocket_connect("/ws/chat") as ws:
+            ws.receive_json()
+            ws.send_json({"message": "hello"})
+            while ws.receive_json()["type"] != "end":
+                pass
+        _capture_writer().flush()
+
+        [captured] = read_capture(str(capture))
+        assert captured["channel"] == "ws"
+        assert captured["path"] == "greeting"
+
+    def test_malformed_lines_skipped(self, tmp_path):
+        capture = tmp_path / "chat.jsonl"
+        capture.write_text('{"message": "hi"}\nnot json\n[1]\n{"message": "yo"}\n')
+        assert [r["message"] for r in read_capture(str(capture))] == ["hi", "yo"]
+
+
+class TestReplay:
+    """Test replaying captured traffic and the reports."""
+
+    def test_in_process_replay(self):
+        records = [record("hello", "greeting"), record("how much does it cost?", "price")]
+        results = asyncio.run(replay(records, in_process_target(), speed=0, concurrency=2))
+        assert [r["path"] for r in results] == ["greeting", "price"]
+        assert all(r["response"] and "error" not in r for r in results)
+
+    def test_original_pace_scaled(self):
+        records = [record("hello", ts=1000.0), record("hello", ts=1001.0)]
+        start = time.perf_counter()
+        asyncio.run(replay(records, in_process_target(), speed=10))
+        assert time.perf_counter() - start >= 0.09  # One second of traffic at 10x
+
+    def test_target_errors_reported(self):
+        async def broken(message, vip, session):
+            raise ConnectionError("refused")
+
+        [result] = asyncio.run(replay([record("hello")], broken, speed=0))
+        assert result["error"] == "ConnectionError: refused"
+        assert summarize([result])["errors"] == 1
+
+    def test_in_process_orders_per_session(self):
+        """Test each captured session keeps its own draft, and confirming places nothing."""
+        records = [
+            record("two smash burgers please", session="aaa"),
+            record("yes", session="bbb"),
+            record("and a negroni please", session="aaa"),
+            record("yes", session="aaa"),
+        ]
+        results = asyncio.run(replay(records, in_process_target(), speed=0))
+        assert [r["path"] for r in results][0] == "order_draft"
+        assert results[1]["path"] != "order_placed"
+        assert "2x House Smash Burger and 1x Negroni" in results[2]["response"]
+        assert results[3]["path"] == "order_placed"
+
+    def test_http_replay_never_places_orders(self, memory_db):
+        """Test a server replay maps sessions, sends drafts back and skips confirmations."""
+        app.dependency_overrides[get_db] = lambda: memory_db
+        sessions = []
+
+        async def sent(request):
+            sessions.append(json.loads(request.content)["session_id"])
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, event_hooks={"request": [sent]}) as client:
+                records = [
+                    record("two smash burgers please", session="aaa"),
+                    record("a negroni please", session="bbb"),
+                    record("yes", session="aaa"),
+                    record("what do you recommend?", session="aaa"),
+                ]
+                return await replay(records, http_target(client, "http://test"), speed=0)
+
+        try:
+            results = asyncio.run(run())
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+        assert [r["path"] for r in results] == ["order_draft", "order_draft", None, "recommendation"]
+        assert results[2]["skipped"] == "would place an order"
+        assert memory_db.get_order_count() == 0
+        assert sessions[0] == sessions[2] != sessions[1]  # "yes" was not sent
+        assert sessions[0].startswith("replay-")
+        assert summarize(results)["skipped"] == 1
+
+    def test_summarize(self):
+        records = [record("a", "menu_item", ms=ms) for ms in (1, 2, 3, 4)] + [record("b", "llm", ms=100)]
+        summary = summarize(records)
+        assert summary["requests"] == 5
+        assert summary["p50_ms"] == 3
+        assert summary["max_ms"] == 100
+        assert summary["paths"] == {"menu_item": 0.8, "llm": 0.2}
+
+    def test_comparison_counts_changed_paths(self):
+        before = [record("a", "default"), record("b", "price")]
+        after = [record("a", "menu_item"), record("b", "price")]
+        report = format_comparison(before, after, ("capture", "replay"))
+        assert "changed paths: 1 of 2 messages" in report
+        assert "menu_item" in report
+
+    def test_cli_replay_and_compare(self, tmp_path, capsys):
+        capture = write_capture(tmp_path / "capture.jsonl", [record("hello", "greeting"), record("price?", "price")])
+        output = tmp_path / "after.jsonl"
+
+        assert _main(["replay", capture, "--speed", "0", "-o", str(output)]) == 0
+        assert "changed paths: 0 of 2 messages" in capsys.readouterr().out
+        assert [r["path"] for r in read_capture(str(output))] == ["greeting", "price"]
+
+        assert _main(["compare", capture, str(output)]) == 0
+        assert "greeting" in capsys.readouterr().out
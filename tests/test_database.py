@@ -0,0 +1,363 @@
+"""
+Test suite for order storage backends.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+import app.database as database
+from app.archival import archive_cutoff
+from app.database import Database, MemoryDatabase, OrderStore, create_database
+from app.models import OrderItem
+
+
+@pytest.fixture(params=["memory", "sqlite", "sqlalchemy"])
+def store(request, tmp_path) -> OrderStore:
+    """Provide each order store backend in turn."""
+    if request.param == "memory":
+        return MemoryDatabase()
+    if request.param == "sqlite":
+        return Database(tmp_path / "orders.db")
+
+    pytest.importorskip("sqlalchemy")
+    return create_database(f"sqlite+pysqlite:///{tmp_path / 'orders-sa.db'}")
+
+
+class TestOrderStore:
+    """Behaviour shared by every order store."""
+
+    def test_create_and_get_order(self, store):
+        """Test an order round-trips through the store."""
+        items = [OrderItem(name="House Smash Burger", price=16.00, quantity=2)]
+        assert store.create_order(1732, "session-1", items, 32.00) is True
+
+        order = store.get_order(1732)
+        assert order["order_number"] == 1732
+        assert order["items"] == [{"name": "House Smash Burger", "price": 16.00, "quantity": 2}]
+        assert order["total"] == 32.00
+        assert order["status"] == "confirmed"
+        assert order["session_id"] == "session-1"
+        assert isinstance(order["created_at"], str)
+
+    def test_get_missing_order(self, store):
+        """Test unknown order numbers return None."""
+        assert store.get_order(9999) is None
+
+    def test_duplicate_order_number_rejected(self, store):
+        """Test duplicate order numbers raise ValueError."""
+        items = [{"name": "Negroni", "price": 13.00, "quantity": 1}]
+        store.create_order(1735, "session-1", items, 13.00)
+        with pytest.raises(ValueError):
+            store.create_order(1735, "session-2", items, 13.00)
+
+    def test_order_count(self, store):
+        """Test order count tracks inserts."""
+        items = [{"name": "Negroni", "price": 13.00, "quantity": 1}]
+        assert store.get_order_count() == 0
+        store.create_order(1732, "a", items, 13.00)
+        store.create_order(1735, "b", items, 13.00)
+        assert store.get_order_count() == 2
+
+    def test_list_orders_newest_first(self, store):
+        """Test listing orders with pagination and session filter."""
+        items = [{"name": "Negroni", "price": 13.00, "quantity": 1}]
+        store.create_order(1732, "a", items, 13.00)
+        store.create_order(1735, "b", items, 13.00)
+        store.create_order(1743, "a", items, 13.00)
+
+        assert [o["order_number"] for o in store.list_orders()] == [1743, 1735, 1732]
+        assert [o["order_number"] for o in store.list_orders(limit=1, offset=1)] == [1735]
+        assert [o["order_number"] for o in store.list_orders(session_id="a")] == [1743, 1732]
+
+    def test_update_order_status(self, store):
+        """Test updating status of existing and missing orders."""
+        store.create_order(1732, "a", [{"name": "Negroni", "price": 13.00, "quantity": 1}], 13.00)
+        assert store.update_order_status(1732, "ready") is True
+        assert store.get_order(1732)["status"] == "ready"
+        assert store.update_order_status(9999, "ready") is False
+
+    def test_health_check(self, store):
+        """Test a freshly created store is healthy."""
+        assert store.health_check() is True
+
+
+class TestSalesRollups:
+    """Test incrementally maintained sales analytics."""
+
+    def _place_orders(self, store):
+        store.create_order(
+            1732,
+            "a",
+            [{"name": "House Smash Burger", "price": 16.00, "quantity": 2}, {"name": "Negroni", "price": 13.00}],
+            45.00,
+        )
+        store.create_order(1735, "b", [{"name": "Truffle Fries", "price": 12.00, "quantity": 1}], 12.00)
+        store.create_order(1743, "c", [{"name": "House Smash Burger", "price": 16.00, "quantity": 1}], 16.00)
+
+    def test_empty_summary(self, store):
+        """Test analytics on an empty store."""
+        summary = store.get_sales_summary()
+        assert summary["totals"] == {"orders": 0, "items_sold": 0, "revenue": 0.0}
+        assert summary["top_items"] == []
+        assert summary["hourly_revenue"] == []
+
+    def test_incremental_rollups(self, store):
+        """Test rollups are updated on each insert."""
+        self._place_orders(store)
+        summary = store.get_sales_summary(top_n=2)
+
+        assert summary["totals"] == {"orders": 3, "items_sold": 5, "revenue": 73.00}
+        assert summary["top_items"][0] == {
+            "name": "House Smash Burger",
+            "category": "mains",
+            "quantity": 3,
+            "revenue": 48.00,
+        }
+        assert len(summary["top_items"]) == 2
+        categories = {row["category"]: row for row in summary["categories"]}
+        assert categories["mains"]["revenue"] == 48.00
+        assert categories["drinks"]["quantity"] == 1
+        assert sum(row["orders"] for row in summary["hourly_revenue"]) == 3
+        assert sum(row["revenue"] for row in summary["hourly_revenue"]) == 73.00
+
+    def test_rebuild_matches_incremental(self, store):
+        """Test rebuilding from scratch reproduces the incremental rollups."""
+        self._place_orders(store)
+        before = store.get_sales_summary()
+        store.rebuild_rollups()
+        assert store.get_sales_summary() == before
+
+    def test_unknown_items_grouped_as_other(self, store):
+        """Test off-menu items land in the "other" category."""
+        store.create_order(1732, "a", [{"name": "Mystery Special", "price": 5.00, "quantity": 1}], 5.00)
+        assert store.get_sales_summary()["categories"] == [{"category": "other", "quantity": 1, "revenue": 5.00}]
+
+    def test_portable_increment_loses_insert_race(self, tmp_path):
+        """Test the update-then-insert fallback adds to a row another transaction inserted first."""
+        pytest.importorskip("sqlalchemy")
+        store = create_database(f"sqlite+pysqlite:///{tmp_path / 'orders-sa.db'}")
+        table = store.sales_by_category
+        with store.engine.begin() as conn:
+            conn.execute(table.insert().values(category="mains", quantity=1, revenue=16.0))
+
+        class RaceLost:
+            """Connection whose first update misses the row (inserted concurrently)."""
+
+            def __init__(self, conn):
+                self.conn, self.missed = conn, False
+
+            def execute(self, statement):
+                if statement.is_dml and statement.table is table and not self.missed and "UPDATE" in str(statement):
+                    self.missed = True
+                    return type("Result", (), {"rowcount": 0})()
+                return self.conn.execute(statement)
+
+            def begin_nested(self):
+                return self.conn.begin_nested()
+
+        with store.engine.begin() as conn:
+            deltas = {"quantity": 2, "revenue": 32.0}
+            store._increment_portable(
+                RaceLost(conn), table, {"category": "mains"}, deltas, {"category": "mains", **deltas}
+            )
+        assert store.get_sales_summary()["categories"] == [{"category": "mains", "quantity": 3, "revenue": 48.0}]
+
+
+class TestBulkOrders:
+    """Test chunked export reads and batched imports."""
+
+    def _orders(self, count):
+        return [
+            {
+                "order_number": 1000 + i,
+                "session_id": f"s{i}",
+                "items": [{"name": "Negroni", "price": 13.00, "quantity": 1}],
+                "total": 13.00,
+                "status": "served",
+                "created_at": f"2024-01-{i + 1:02d} 12:00:00",
+            }
+            for i in range(count)
+        ]
+
+    def test_import_then_iterate_in_chunks(self, store):
+        """Test imported orders stream back oldest first in fixed-size chunks."""
+        assert store.import_orders(iter(self._orders(5)), batch_size=2) == {"imported": 5, "skipped": 0}
+
+        chunks = list(store.iter_orders(chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        first = chunks[0][0]
+        assert first == self._orders(1)[0]
+
+    def test_iterate_time_window(self, store):
+        """Test since/until filters on created_at."""
+        store.import_orders(self._orders(5))
+        chunks = store.iter_orders(since="2024-01-02 00:00:00", until="2024-01-04 00:00:00")
+        assert [order["order_number"] for chunk in chunks for order in chunk] == [1001, 1002]
+
+    def test_import_skips_duplicates_and_updates_rollups(self, store):
+        """Test duplicate order numbers are skipped and rollups follow imports."""
+        store.import_orders(self._orders(3))
+        assert store.import_orders(self._orders(4)) == {"imported": 1, "skipped": 3}
+        assert store.get_order_count() == 4
+        assert store.get_sales_summary()["totals"]["orders"] == 4
+
+
+class TestStatusTransitions:
+    """Test validated, batched status changes."""
+
+    def test_bulk_transitions(self, store):
+        """Test valid changes are written and invalid ones reported per order."""
+        items = [OrderItem(name="Negroni", price=13.00, quantity=1)]
+        store.create_order(1, "s1", items, 13.00)
+        store.create_order(2, "s2", items, 13.00)
+
+        results = store.transition_order_statuses([(1, "preparing"), (2, "served"), (3, "ready"), (1, "ready")])
+        assert [result["ok"] for result in results] == [True, False, False, True]
+        assert results[1]["previous_status"] == "confirmed"
+        assert results[2]["previous_status"] is None
+        assert store.get_order(1)["status"] == "ready"
+        assert store.get_order(2)["status"] == "confirmed"
+
+    def test_empty_batch(self, store):
+        """Test an empty batch is a no-op."""
+        assert store.transition_order_statuses([]) == []
+
+
+class TestArchival:
+    """Test hot/cold order archival."""
+
+    def _place_order(self, store, monkeypatch, order_number, created_at):
+        monkeypatch.setattr(database, "_utc_timestamp", lambda: created_at)
+        store.create_order(order_number, "a", [{"name": "Negroni", "price": 13.00, "quantity": 1}], 13.00)
+
+    def test_archives_only_old_orders(self, store, monkeypatch):
+        """Test orders before the cutoff leave the hot table."""
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        self._place_order(store, monkeypatch, 1735, "2024-02-03 09:30:00")
+        self._place_order(store, monkeypatch, 1743, "2024-06-01 18:00:00")
+
+        assert store.archive_orders("2024-03-01 00:00:00", batch_size=1) == 2
+        assert store.get_order_count() == 3  # Archived orders still count toward the next order number
+        assert [order["order_number"] for order in store.list_orders()] == [1743]
+        assert store.archive_orders("2024-03-01 00:00:00") == 0
+
+    def test_get_order_falls_back_to_archive(self, store, monkeypatch):
+        """Test archived orders are still retrievable."""
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        store.archive_orders("2024-03-01 00:00:00")
+
+        order = store.get_order(1732)
+        assert order["order_number"] == 1732
+        assert order["created_at"] == "2024-01-15 12:00:00"
+        assert order["items"][0]["name"] == "Negroni"
+        assert store.get_order(1735) is None
+
+    def test_archived_order_numbers_not_reused(self, store, monkeypatch):
+        """Test an archived order number cannot be taken by a new order."""
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        store.archive_orders("2024-03-01 00:00:00")
+
+        with pytest.raises(ValueError):
+            self._place_order(store, monkeypatch, 1732, "2024-06-01 18:00:00")
+        assert store.get_order(1732)["created_at"] == "2024-01-15 12:00:00"
+        assert store.get_order_count() == 1
+
+    def test_import_skips_archived_order_numbers(self, store, monkeypatch):
+        """Test re-importing an old export does not load archived orders back into the live table."""
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        exported = [order for chunk in store.iter_orders() for order in chunk]
+        store.archive_orders("2024-03-01 00:00:00")
+
+        assert store.import_orders(exported) == {"imported": 0, "skipped": 1}
+        assert store.list_orders() == []
+        assert store.get_order_count() == 1
+
+    def test_archive_keeps_orders_whose_number_is_archived(self, tmp_path, monkeypatch):
+        """Test archival never replaces an archived order (a row from before numbers were checked)."""
+        store = Database(tmp_path / "orders.db")
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        store.archive_orders("2024-03-01 00:00:00")
+        with store.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO orders (order_number, items, total, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (1732, "[]", 0.0, "confirmed", "2024-02-01 12:00:00"),
+            )
+
+        assert store.archive_orders("2024-03-01 00:00:00") == 0
+        assert [order["order_number"] for order in store.list_orders()] == [1732]
+        with store.get_connection() as conn:
+            assert conn.execute("SELECT month FROM archived_orders").fetchall() == [("2024-01",)]
+
+    def test_rollups_include_archived_orders(self, store, monkeypatch):
+        """Test analytics survive archival and rebuilds."""
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        self._place_order(store, monkeypatch, 1735, "2024-06-01 18:00:00")
+        store.archive_orders("2024-03-01 00:00:00")
+
+        assert store.get_sales_summary()["totals"]["orders"] == 2
+        store.rebuild_rollups()
+        assert store.get_sales_summary()["totals"]["orders"] == 2
+
+    def test_sqlite_writes_monthly_archive_files(self, tmp_path, monkeypatch):
+        """Test the SQLite store partitions archives by month."""
+        store = Database(tmp_path / "orders.db")
+        self._place_order(store, monkeypatch, 1732, "2024-01-15 12:00:00")
+        self._place_order(store, monkeypatch, 1735, "2024-02-03 09:30:00")
+        store.archive_orders("2024-03-01 00:00:00")
+
+        assert sorted(path.name for path in (tmp_path / "archive").iterdir()) == [
+            "orders-2024-01.db",
+            "orders-2024-02.db",
+        ]
+
+    def test_archive_cutoff(self):
+        """Test cutoff timestamps use the orders table format."""
+        now = datetime(2024, 3, 31, 8, 0, 0, tzinfo=timezone.utc)
+        assert archive_cutoff(30, now=now) == "2024-03-01 08:00:00"
+
+
+class TestCreateDatabase:
+    """Test backend selection from the database URL."""
+
+    def test_memory_scheme(self):
+        assert isinstance(create_database("memory://"), MemoryDatabase)
+
+    def test_sqlite_memory_url_uses_memory_store(self):
+        assert isinstance(create_database("sqlite:///:memory:"), MemoryDatabase)
+
+    def test_sqlite_file_url(self, tmp_path):
+        store = create_database(f"sqlite:///{tmp_path / 'orders.db'}")
+        assert isinstance(store, Database)
+        assert store.db_path == tmp_path / "orders.db"
+
+    def test_sqlite_backfills_rollups(self, tmp_path):
+        """Test rollups are rebuilt for databases that predate them."""
+        store = Database(tmp_path / "orders.db")
+        store.create_order(1732, "a", [{"name": "Negroni", "price": 13.00, "quantity": 1}], 13.00)
+        with store.get_connection() as conn:
+            conn.execute("DELETE FROM sales_totals")
+
+        reopened = Database(tmp_path / "orders.db")
+        assert reopened.get_sales_summary()["totals"]["orders"] == 1
+
+    def test_sqlite_uses_wal_for_multiple_workers(self, tmp_path):
+        """Test the SQLite store can be shared by several worker processes."""
+        store = Database(tmp_path / "orders.db")
+        with store.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.isolation_level == "IMMEDIATE"
+
+    def test_sqlalchemy_after_fork_keeps_parent_connections(self, tmp_path):
+        """Test a forked worker gets a fresh pool without closing the connections the master still owns."""
+        sa = pytest.importorskip("sqlalchemy")
+        store = create_database(f"sqlite+pysqlite:///{tmp_path / 'orders-sa.db'}")
+        assert store.health_check()  # Leaves a pooled connection
+        inherited = store.engine.pool
+        closed = []
+        sa.event.listen(inherited, "close", lambda *args: closed.append(args))
+
+        store.after_fork()
+
+        assert store.engine.pool is not inherited
+        assert closed == []
+        assert store.health_check()
@@ -0,0 +1,124 @@
+"""
+Test suite for order event pub/sub and SSE encoding.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app import events
+from app.events import EventRelay, OrderEventBus, event_stream, format_sse
+
+ORDER = {"order_number": 1732, "session_id": "s1", "status": "preparing"}
+
+
+def parse_frame(frame: str) -> tuple[str, dict]:
+    event, data = frame.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+class TestOrderEventBus:
+    """Test routing and bounded buffers."""
+
+    def test_routes_to_matching_subscribers(self):
+        async def scenario():
+            bus = OrderEventBus()
+            kitchen = bus.subscribe()
+            order = bus.subscribe(order_number=1732)
+            session = bus.subscribe(session_id="s1")
+            other = bus.subscribe(order_number=1735)
+
+            bus.publish("status_changed", ORDER, previous_status="confirmed")
+            results = [await sub.next_batch(timeout=0.01) for sub in (kitchen, order, session, other)]
+            return [len(events) for events, _ in results], results[0][0][0]
+
+        counts, event = asyncio.run(scenario())
+        assert counts == [1, 1, 1, 0]
+        assert event["previous_status"] == "confirmed"
+        assert event["status"] == "preparing"
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def scenario():
+            bus = OrderEventBus(max_buffer=2)
+            sub = bus.subscribe()
+            for status in ("preparing", "ready", "served"):
+                bus.publish("status_changed", {**ORDER, "status": status})
+            return await sub.next_batch(timeout=0.01)
+
+        events, dropped = asyncio.run(scenario())
+        assert [event["status"] for event in events] == ["ready", "served"]
+        assert dropped == 1
+
+    def test_unsubscribe(self):
+        bus = OrderEventBus()
+        sub = bus.subscribe(order_number=1732)
+        assert bus.subscriber_count == 1
+        bus.unsubscribe(sub)
+        assert bus.subscriber_count == 0
+
+
+class TestEventStream:
+    """Test the SSE frame generator."""
+
+    def test_snapshot_then_events_then_cleanup(self, monkeypatch):
+        monkeypatch.setattr("app.events.settings.sse_heartbeat_seconds", 0.01)
+
+        async def scenario():
+            bus = OrderEventBus()
+            stream = event_stream(bus, order_number=1732, initial={"order_number": 1732, "status": "confirmed"})
+            frames = [await stream.__anext__(), await stream.__anext__()]
+            bus.publish("status_changed", ORDER)
+            frames.append(await stream.__anext__())
+            frames.append(await stream.__anext__())  # Nothing pending: heartbeat
+            await stream.aclose()
+            return frames, bus.subscriber_count
+
+        frames, subscribers = asyncio.run(scenario())
+        assert frames[0].startswith("retry:")
+        assert parse_frame(frames[1]) == ("snapshot", {"order_number": 1732, "status": "confirmed"})
+        assert parse_frame(frames[2])[0] == "status_changed"
+        assert frames[3] == ": keep-alive\n\n"
+        assert subscribers == 0
+
+    def test_format_sse(self):
+        assert format_sse("x", {"a": 1}) == 'event: x\ndata: {"a":1}\n\n'
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="Unix sockets only")
+class TestEventRelay:
+    """Test fan-out of order events between worker processes."""
+
+    def test_events_reach_sibling_worker(self, tmp_path, monkeypatch):
+        async def scenario():
+            here, sibling = EventRelay(str(tmp_path), name="here"), EventRelay(str(tmp_path), name="sibling")
+            here.start()
+            sibling.start()
+            (tmp_path / "dead.sock").touch()  # Left behind by a crashed worker
+            monkeypatch.setattr(events, "event_relay", here)
+            kitchen = events.order_events.subscribe()
+            try:
+                # Published here, received by the sibling's socket and delivered to the shared bus
+                here.send(None, {"type": "order_created", **ORDER})
+                received, _ = await kitchen.next_batch(timeout=1.0)
+            finally:
+                events.order_events.unsubscribe(kitchen)
+                here.stop()
+                sibling.stop()
+            return received
+
+        received = asyncio.run(scenario())
+        assert [event["order_number"] for event in received] == [1732]
+        assert not (tmp_path / "dead.sock").exists()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_publish_relays(self, tmp_path, monkeypatch):
+        sent = []
+
+        class Recorder:
+            def send(self, location, event):
+                sent.append((location, event["type"]))
+
+        monkeypatch.setattr(events, "event_relay", Recorder())
+        OrderEventBus(location="downtown").publish("order_created", ORDER)
+        assert sent == [("downtown", "order_created")]
@@ -0,0 +1,59 @@
+"""
+Test suite for the opt-in fast JSON path.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import get_db
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True, params=[False, True], ids=["default", "fast"])
+def json_mode(request, monkeypatch, memory_db):
+    """Run each test with the fast path off and on, against an in-memory store."""
+    monkeypatch.setattr(settings, "fast_json", request.param)
+    app.dependency_overrides[get_db] = lambda: memory_db
+    yield request.param
+    app.dependency_overrides.pop(get_db, None)
+
+
+class TestFastJsonPath:
+    """Responses and validation are identical in both modes."""
+
+    def test_chat_response(self):
+        response = client.post("/chat", json={"message": "hello", "session_id": "abc"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["session_id"] == "abc"
+        assert data["restaurant"] == settings.restaurant_name
+
+    def test_order_roundtrip(self):
+        created = client.post("/order", json={"items": [{"name": "Negroni", "price": 13.0, "quantity": 2}]})
+        assert created.status_code == 200
+        assert created.json()["total"] == 26.0
+
+        fetched = client.get(f"/order/{created.json()['order_number']}")
+        assert fetched.json()["items"] == [{"name": "Negroni", "price": 13.0, "quantity": 2}]
+
+    def test_validation_error_shape(self):
+        response = client.post("/chat", json={"message": ""})
+        assert response.status_code == 422
+        error = response.json()["detail"][0]
+        assert error["loc"] == ["body", "message"]
+        assert error["type"] == "string_too_short"
+
+    def test_invalid_json_rejected(self):
+        response = client.post("/chat", content=b"{not json", headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "json_invalid"
+
+    def test_request_body_documented(self):
+        schema = client.get("/openapi.json").json()
+        body = schema["paths"]["/order"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        assert body["properties"]["items"]["items"] == {"$ref": "#/components/schemas/OrderItemRequest"}
+        assert "OrderItem" in schema["components"]["schemas"]
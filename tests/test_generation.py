@@ -0,0 +1,155 @@
+"""
+Test suite for load-adaptive generation parameters.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.generation import GENERATION_LEVELS, GenerationController
+from app.main import app
+from app.prompts import TokenCounter
+
+
+def controller(**kwargs):
+    defaults = {"target_latency": 2.0, "max_in_flight": 4, "step_seconds": 5.0, "recover_seconds": 30.0}
+    return GenerationController(**{**defaults, **kwargs})
+
+
+class TestGenerationController:
+    """Test stepping down under load and back up once it eases."""
+
+    def test_starts_at_full(self):
+        assert controller().current().name == "full"
+
+    def test_slow_responses_step_down_once_per_interval(self):
+        c = controller()
+        c.record_latency(5.0, now=1000.0)
+        assert c.step == 1
+        c.record_latency(5.0, now=1002.0)
+        assert c.step == 1  # Too soon for another step
+        c.record_latency(5.0, now=1005.0)
+        assert c.step == 2
+
+    def test_never_beyond_last_level(self):
+        c = controller(step_seconds=0.0)
+        for i in range(10):
+            c.record_latency(10.0, now=1000.0 + i)
+        assert c.level is GENERATION_LEVELS[-1]
+
+    def test_queue_depth_steps_down(self):
+        c = controller(step_seconds=0.0)
+        with c.track(), c.track(), c.track(), c.track(), c.track():
+            assert c.in_flight == 5
+            assert c.current(now=1000.0).name == "reduced"
+        assert c.in_flight == 0
+
+    def test_recovers_slowly_with_hysteresis(self):
+        c = controller(step_seconds=0.0)
+        c.record_latency(5.0, now=1000.0)
+        c.record_latency(5.0, now=1001.0)
+        assert c.step == 2
+        c.smoothing = 1.0
+        c.record_latency(1.6, now=1100.0)  # Below target but not well below: hold
+        assert c.step == 2
+        c.record_latency(0.5, now=1110.0)
+        assert c.step == 1
+        c.record_latency(0.5, now=1120.0)
+        assert c.step == 1  # Recovery waits recover_seconds between steps
+        c.record_latency(0.5, now=1140.0)
+        assert c.step == 0
+        assert c.step_changes == 4
+
+    def test_stale_latency_ignored_without_calls(self):
+        c = controller(step_seconds=0.0)
+        c.record_latency(10.0, now=1000.0)
+        assert c.step == 1
+        # Everything is served from templates, so no new latency samples arrive
+        assert c.current(now=1031.0).name == "full"
+
+    def test_disabled(self):
+        c = controller(enabled=False)
+        c.record_latency(50.0, now=1000.0)
+        assert c.current(now=2000.0).name == "full"
+
+    def test_prompt_budget(self):
+        assert GENERATION_LEVELS[0].prompt_budget(1000) == 1000
+        assert GENERATION_LEVELS[2].prompt_budget(1000) == 500
+        assert GENERATION_LEVELS[2].prompt_budget(0) == 0  # Unlimited stays unlimited
+
+
+@pytest.fixture
+def llama_server(monkeypatch):
+    """Route llama-server calls to a mock; yields the /completion request bodies."""
+    import httpx
+
+    completions = []
+
+    def handler(request):
+        if request.url.path == "/tokenize":
+            return httpx.Response(200, json={"tokens": [0] * 10})
+        completions.append(json.loads(request.content))
+        return httpx.Response(200, json={"content": "Right on dude!"})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw))
+    monkeypatch.setattr("app.tobi_ai.settings.use_local_ai", True)
+    monkeypatch.setattr("app.tobi_ai.settings.llama_server_url", "http://llama")
+    monkeypatch.setattr("app.prompts.token_counter", TokenCounter())  # Keep the mock's counts out of the shared cache
+    return completions
+
+
+@pytest.fixture
+def at_level(monkeypatch):
+    from app.generation import generation_controller
+
+    def set_level(step):
+        monkeypatch.setattr(generation_controller, "step", step)
+        monkeypatch.setattr(generation_controller, "latency_ewma", None)
+        monkeypatch.setattr(generation_controller, "recover_seconds", 1e9)  # Hold the level
+
+    return set_level
+
+
+@pytest.mark.asyncio
+class TestDegradedGeneration:
+    """Test what llama-server calls look like at each level."""
+
+    async def test_full_level(self, llama_server, at_level):
+        from app.tobi_ai import answer_path, get_ai_response
+
+        at_level(0)
+        assert await get_ai_response("hello there") == "Right on dude!"
+        assert answer_path() == "llm"
+        assert llama_server[0]["max_tokens"] == 100
+
+    async def test_low_value_intent_served_by_template(self, llama_server, at_level):
+        from app.tobi_ai import TOBI_RESPONSES, answer_path, get_ai_response
+
+        at_level(2)
+        assert await get_ai_response("hello") in TOBI_RESPONSES["greeting"]
+        assert answer_path() == "greeting"
+        assert llama_server == []
+
+    async def test_cheaper_generation_without_history(self, llama_server, at_level):
+        from app.tobi_ai import stream_tobi_response
+
+        at_level(2)
+        history = (("Customer", "hi"), ("Tobi", "Yo!"))
+        [chunk async for chunk in stream_tobi_response("tell me a surf story", history=history)]
+        sent = llama_server[0]
+        assert sent["max_tokens"] == GENERATION_LEVELS[2].max_tokens
+        assert "Customer: hi" not in sent["prompt"]
+
+
+class TestMetrics:
+    """Test the /metrics endpoint."""
+
+    def test_generation_level_exported(self, at_level):
+        at_level(1)
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "restaurant_llm_generation_step 1\n" in response.text
+        assert 'restaurant_llm_generation_level{level="reduced"} 1' in response.text
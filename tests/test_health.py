@@ -0,0 +1,54 @@
+"""
+Test suite for the background health monitor.
+"""
+
+import asyncio
+
+from app.database import MemoryDatabase
+from app.health import HealthMonitor
+
+
+class BrokenStore(MemoryDatabase):
+    """Order store whose health check always fails."""
+
+    def health_check(self) -> bool:
+        return False
+
+
+class TestHealthMonitor:
+    """Test cached component probing."""
+
+    def test_not_ready_before_first_probe(self):
+        monitor = HealthMonitor()
+        assert monitor.last_check is None
+        assert monitor.is_ready is False
+        assert monitor.readiness()["status"] == "unavailable"
+
+    def test_probe_caches_component_status(self):
+        monitor = HealthMonitor()
+        components = asyncio.run(monitor.probe_once(MemoryDatabase()))
+
+        assert components["database"]["status"] == "up"
+        assert components["database"]["latency_ms"] is not None
+        assert components["llama_server"]["status"] == "disabled"
+        assert monitor.last_check is not None
+        assert monitor.readiness()["status"] == "ready"
+
+    def test_database_down_makes_unready(self):
+        monitor = HealthMonitor()
+        asyncio.run(monitor.probe_once(BrokenStore()))
+        assert monitor.is_ready is False
+        assert monitor.readiness()["components"]["database"]["detail"] == "health check failed"
+
+    def test_background_loop_refreshes(self):
+        async def run():
+            monitor = HealthMonitor(interval_seconds=0.01)
+            monitor.start(MemoryDatabase)
+            await asyncio.sleep(0.05)
+            first = monitor.components["database"]["checked_at"]
+            await monitor.stop()
+            return monitor, first
+
+        monitor, first = asyncio.run(run())
+        assert first is not None
+        assert monitor._task is None
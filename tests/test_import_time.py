@@ -0,0 +1,56 @@
+"""
+Import-time budget for the app package.
+
+Cold start matters for autoscaling and every worker process, so importing
+``app.main`` must stay cheap and free of side effects: no logging handlers,
+no directories or database files, and no httpx/sqlite3 until they are used.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Time to import app.main once FastAPI/pydantic themselves are loaded (CI machines are slow)
+IMPORT_BUDGET_SECONDS = 0.5
+
+PROBE = """
+import json, logging, sys, time
+import fastapi, fastapi.staticfiles, pydantic_settings, starlette.middleware.cors
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "modules": sorted(name for name in ("httpx", "sqlite3", "numpy") if name in sys.modules),
+    "handlers": len(logging.getLogger().handlers),
+}))
+"""
+
+
+def run_probe(tmp_path: Path) -> dict:
+    repo_root = Path(__file__).parent.parent
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=repo_root,
+        env={"PATH": "", "PYTHONPATH": str(repo_root), "DATABASE_URL": f"sqlite:///{tmp_path / 'orders.db'}"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportTime:
+    """Test that importing the app is fast and side-effect free."""
+
+    def test_import_within_budget(self, tmp_path):
+        # Best of three runs, to ignore a cold disk cache
+        seconds = min(run_probe(tmp_path)["seconds"] for _ in range(3))
+        assert seconds < IMPORT_BUDGET_SECONDS, f"import app.main took {seconds:.3f}s"
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        probe = run_probe(tmp_path)
+        assert probe["modules"] == []
+        assert probe["handlers"] == 0
+        assert not (tmp_path / "orders.db").exists()
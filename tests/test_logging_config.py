@@ -0,0 +1,80 @@
+"""
+Test suite for the non-blocking logging pipeline.
+"""
+
+import json
+import logging
+import queue
+import sys
+
+from app.logging_config import JSONFormatter, NonBlockingQueueHandler, SamplingFilter, parse_sample_rates
+
+
+def make_record(name="app.main", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestJSONFormatter:
+    """Test structured JSON output."""
+
+    def test_includes_message_and_extra_fields(self):
+        entry = json.loads(JSONFormatter().format(make_record(order_number=1789, session="abcd1234")))
+
+        assert entry["message"] == "hello world"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "app.main"
+        assert entry["order_number"] == 1789
+        assert entry["session"] == "abcd1234"
+        assert "args" not in entry
+
+    def test_includes_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record(level=logging.ERROR)
+            record.exc_info = sys.exc_info()
+
+        entry = json.loads(JSONFormatter().format(record))
+        assert "ValueError: boom" in entry["exc"]
+
+
+class TestSamplingFilter:
+    """Test per-logger sampling."""
+
+    def test_rate_zero_drops_info_but_keeps_warnings(self):
+        sampler = SamplingFilter({"app.main": 0.0})
+        assert sampler.filter(make_record()) is False
+        assert sampler.filter(make_record(level=logging.WARNING)) is True
+
+    def test_rate_applies_to_child_loggers_only(self):
+        sampler = SamplingFilter({"app": 0.0, "app.health": 1.0})
+        assert sampler.filter(make_record(name="app.tobi_ai")) is False
+        assert sampler.filter(make_record(name="app.health")) is True
+        assert sampler.filter(make_record(name="application")) is True
+
+    def test_parse_sample_rates(self):
+        assert parse_sample_rates("app.main=0.1, app.tobi_ai=2") == {"app.main": 0.1, "app.tobi_ai": 1.0}
+        assert parse_sample_rates("") == {}
+
+
+class TestNonBlockingQueueHandler:
+    """Test that a full queue drops records instead of blocking."""
+
+    def test_drops_when_full(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_formatting_is_deferred(self):
+        handler = NonBlockingQueueHandler(queue.Queue())
+        handler.handle(make_record())
+
+        queued = handler.queue.get_nowait()
+        assert queued.args == ("world",)
+        assert queued.getMessage() == "hello world"
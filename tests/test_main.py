@@ -2,13 +2,25 @@
 Test suite for main FastAPI application endpoints.
 """
 
+import json
+
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.database import get_db
 
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def use_memory_db(memory_db):
+    """Run every endpoint test against a fresh in-memory order store."""
+    app.dependency_overrides[get_db] = lambda: memory_db
+    yield
+    app.dependency_overrides.pop(get_db, None)
+
+
 class TestHealthEndpoints:
     """Test health check and basic endpoints."""
 
@@ -28,6 +40,22 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "healthy"
 
+    def test_liveness_endpoint(self):
+        """Test GET /health/live answers without touching dependencies."""
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    def test_readiness_endpoint(self):
+        """Test GET /health/ready reports component detail."""
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["components"]["database"]["status"] == "up"
+        assert "checked_at" in data["components"]["database"]
+        assert data["last_check"] is not None
+
 
 class TestMenuEndpoint:
     """Test menu-related endpoints."""
@@ -56,6 +84,77 @@ class TestMenuEndpoint:
         assert "description" in starter
         assert "price" in starter
 
+    def test_menu_etag_and_cache_headers(self):
+        """Test GET /menu sends a strong ETag and Cache-Control."""
+        response = client.get("/menu")
+        assert response.headers["etag"].startswith('"')
+        assert "max-age" in response.headers["cache-control"]
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    def test_menu_reload_from_file(self, tmp_path, monkeypatch):
+        """Test POST /menu/reload swaps in a new menu for /menu and order pricing."""
+        import copy
+
+        from app.menu_data import MENU_DATA
+        from app.menu_versions import menu_versions
+
+        menu = copy.deepcopy(MENU_DATA)
+        next(item for item in menu["drinks"] if item["name"] == "Negroni")["price"] = 15.0
+        menu_file = tmp_path / "menu.json"
+        menu_file.write_text(json.dumps(menu))
+        old_etag = client.get("/menu").headers["etag"]
+
+        monkeypatch.setattr("app.menu_versions.settings.menu_file", str(menu_file))
+        try:
+            response = client.post("/menu/reload")
+            assert response.status_code == 200
+            assert response.json()["changed"] is True
+            assert response.json()["source"] == str(menu_file)
+            assert client.get("/menu/version").json()["version"] == response.json()["version"]
+
+            assert client.get("/menu").headers["etag"] != old_etag
+            order = client.post("/order", json={"items": [{"name": "Negroni", "price": 13.00}]}).json()
+            assert order["total"] == 15.0
+
+            menu_file.write_text("{}")
+            assert client.post("/menu/reload").status_code == 422
+            assert client.get("/menu/version").json()["version"] == response.json()["version"]
+        finally:
+            monkeypatch.undo()
+            menu_versions.reload()
+        assert client.get("/menu").headers["etag"] == old_etag
+
+    def test_menu_not_modified(self):
+        """Test GET /menu returns 304 for a matching If-None-Match."""
+        etag = client.get("/menu").headers["etag"]
+        response = client.get("/menu", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_menu_gzip(self):
+        """Test GET /menu serves the pre-compressed gzip variant."""
+        response = client.get("/menu", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "mains" in response.json()
+
+    def test_menu_etag_per_encoding(self):
+        """Test each encoding has its own ETag, and any of them revalidates."""
+        gzipped = client.get("/menu", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        plain = client.get("/menu", headers={"Accept-Encoding": "identity"}).headers["etag"]
+        assert gzipped == plain[:-1] + '-gzip"'
+
+        response = client.get("/menu", headers={"Accept-Encoding": "identity", "If-None-Match": gzipped})
+        assert response.status_code == 304
+        assert response.headers["etag"] == plain
+
+    def test_menu_identity(self):
+        """Test GET /menu without compression."""
+        response = client.get("/menu", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert "starters" in response.json()
+
 
 class TestChatEndpoint:
     """Test chat endpoint with Tobi."""
@@ -99,6 +198,176 @@ class TestChatEndpoint:
         assert response.status_code == 422
 
 
+class TestChatRateLimit:
+    """Test /chat load shedding."""
+
+    def test_rate_limited_returns_429_with_retry_after(self, monkeypatch):
+        """Test a session over its limit gets 429 and Retry-After."""
+        from app.rate_limit import RateLimiter, chat_rate_limits
+
+        monkeypatch.setattr(chat_rate_limits, "per_session", RateLimiter(rate=0.01, burst=1))
+        assert client.post("/chat", json={"message": "hi", "session_id": "flood"}).status_code == 200
+
+        response = client.post("/chat", json={"message": "hi", "session_id": "flood"})
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+
+class TestOrderStatusUpdates:
+    """Test the status update API and its events."""
+
+    def test_update_status_publishes_event(self):
+        """Test PATCH /order/{n}/status updates the order and notifies subscribers."""
+        from app.events import order_events
+
+        order_number = client.post("/order", json={"items": [{"name": "Negroni", "price": 13.00}]}).json()[
+            "order_number"
+        ]
+        subscription = order_events.subscribe(order_number=order_number)
+        try:
+            response = client.patch(f"/order/{order_number}/status", json={"status": "preparing"})
+            assert response.status_code == 200
+            assert response.json()["status"] == "preparing"
+            assert client.get(f"/order/{order_number}").json()["status"] == "preparing"
+
+            (event,) = list(subscription._events)
+            assert event["type"] == "status_changed"
+            assert event["previous_status"] == "confirmed"
+        finally:
+            order_events.unsubscribe(subscription)
+
+    def test_update_status_off_event_loop(self, memory_db, monkeypatch):
+        """Test the blocking status write runs in a worker thread, not on the event loop."""
+        import asyncio
+
+        order_number = client.post("/order", json={"items": [{"name": "Negroni"}]}).json()["order_number"]
+        on_loop = []
+        transition = memory_db.transition_order_statuses
+
+        def recording_transition(changes):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return transition(changes)
+
+        monkeypatch.setattr(memory_db, "transition_order_statuses", recording_transition)
+        assert client.patch(f"/order/{order_number}/status", json={"status": "preparing"}).status_code == 200
+        assert on_loop == [False]
+
+    def test_update_unknown_order(self):
+        """Test updating a missing order returns 404."""
+        assert client.patch("/order/9999/status", json={"status": "ready"}).status_code == 404
+
+    def test_invalid_status_rejected(self):
+        """Test unknown statuses are rejected."""
+        order_number = client.post("/order", json={"items": [{"name": "Negroni", "price": 13.00}]}).json()[
+            "order_number"
+        ]
+        assert client.patch(f"/order/{order_number}/status", json={"status": "eaten"}).status_code == 422
+
+    def test_invalid_transition_conflicts(self):
+        """Test skipping a step returns 409 and leaves the order unchanged."""
+        order_number = client.post("/order", json={"items": [{"name": "Negroni", "price": 13.00}]}).json()[
+            "order_number"
+        ]
+        response = client.patch(f"/order/{order_number}/status", json={"status": "served"})
+        assert response.status_code == 409
+        assert "confirmed" in response.json()["detail"]
+        assert client.get(f"/order/{order_number}").json()["status"] == "confirmed"
+
+    def test_bulk_update_reports_per_order(self):
+        """Test POST /orders/status applies valid changes and reports the rest."""
+        from app.events import order_events
+
+        first, second = (
+            client.post("/order", json={"items": [{"name": "Negroni", "price": 13.00}]}).json()["order_number"]
+            for _ in range(2)
+        )
+        subscription = order_events.subscribe()
+        try:
+            response = client.post(
+                "/orders/status",
+                json={
+                    "updates": [
+                        {"order_number": first, "status": "preparing"},
+                        {"order_number": second, "status": "served"},
+                        {"order_number": 9999, "status": "ready"},
+                    ]
+                },
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert (data["updated"], data["failed"]) == (1, 2)
+            assert [result["ok"] for result in data["results"]] == [True, False, False]
+            assert data["results"][1]["status"] == "confirmed"
+            assert [event["order_number"] for event in subscription._events] == [first]
+        finally:
+            order_events.unsubscribe(subscription)
+
+        assert client.get(f"/order/{first}").json()["status"] == "preparing"
+
+    def test_bulk_update_requires_updates(self):
+        """Test an empty bulk update is rejected."""
+        assert client.post("/orders/status", json={"updates": []}).status_code == 422
+
+    def test_events_for_unknown_order(self):
+        """Test subscribing to a missing order returns 404."""
+        assert client.get("/orders/events?order_number=9999").status_code == 404
+
+
+class TestChatWebSocket:
+    """Test the persistent /ws/chat channel."""
+
+    def test_session_and_streamed_turns(self):
+        """Test one connection handles several turns in the same session."""
+        with client.websocket_connect("/ws/chat") as ws:
+            hello = ws.receive_json()
+            assert hello["type"] == "session"
+            session_id = hello["session_id"]
+
+            for message in ("hello", "what burgers do you have?"):
+                ws.send_json({"message": message})
+                assert ws.receive_json() == {"type": "start"}
+                tokens = []
+                event = ws.receive_json()
+                while event["type"] == "token":
+                    tokens.append(event["text"])
+                    event = ws.receive_json()
+                assert event["type"] == "end"
+                assert event["response"] == "".join(tokens)
+
+        from app.sessions import chat_sessions
+
+        assert chat_sessions.get_or_create(session_id).turns == 2
+
+    def test_resume_session_keeps_vip(self):
+        """Test VIP status sticks to the session across reconnects."""
+        with client.websocket_connect("/ws/chat") as ws:
+            session_id = ws.receive_json()["session_id"]
+            ws.send_json({"message": "i'm on yelp"})
+            events = [ws.receive_json() for _ in range(3)]
+            assert events[-1]["has_magic_password"] is True
+
+        with client.websocket_connect(f"/ws/chat?session_id={session_id}") as ws:
+            assert ws.receive_json()["session_id"] == session_id
+            ws.send_json({"message": "hello"})
+            events = [ws.receive_json() for _ in range(3)]
+            assert events[-1]["has_magic_password"] is True
+
+    def test_invalid_message_reports_error(self):
+        """Test bad messages get an error event and keep the connection open."""
+        with client.websocket_connect("/ws/chat") as ws:
+            ws.receive_json()
+            ws.send_text("not json")
+            assert ws.receive_json()["status"] == 422
+            ws.send_json({"message": ""})
+            assert ws.receive_json()["status"] == 422
+            ws.send_json({"message": "hi"})
+            assert ws.receive_json()["type"] == "start"
+
+
 class TestOrderEndpoint:
     """Test order creation and retrieval."""
 
@@ -130,10 +399,33 @@ class TestOrderEndpoint:
         response = client.post("/order", json={"items": []})
         assert response.status_code == 422
 
+    def test_create_order_uses_menu_prices(self):
+        """Test POST /order ignores client-sent prices and normalizes item names."""
+        response = client.post(
+            "/order", json={"items": [{"name": "lobster mac and cheese", "price": 0.01, "quantity": 3}]}
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["items"] == [{"name": "Lobster Mac & Cheese", "price": 29.00, "quantity": 3}]
+        assert data["total"] == 87.00
+
+    def test_create_order_without_prices(self):
+        """Test POST /order needs only names and quantities."""
+        response = client.post("/order", json={"items": [{"name": "Negroni", "quantity": 2}]})
+        assert response.status_code == 200
+        assert response.json()["items"] == [{"name": "Negroni", "price": 13.00, "quantity": 2}]
+
+    def test_create_order_unknown_item_rejected(self):
+        """Test POST /order rejects items that are not on the menu."""
+        response = client.post("/order", json={"items": [{"name": "Free Lobster", "price": 1.00, "quantity": 1}]})
+        assert response.status_code == 422
+        assert "Free Lobster" in response.json()["detail"]
+
     def test_get_order_exists(self):
         """Test GET /order/{order_number} retrieves order."""
         # First create an order
-        create_response = client.post("/order", json={"items": [{"name": "Test Item", "price": 10.00, "quantity": 1}]})
+        create_response = client.post("/order", json={"items": [{"name": "Negroni", "price": 13.00, "quantity": 1}]})
         order_number = create_response.json()["order_number"]
 
         # Then retrieve it
@@ -144,7 +436,7 @@ class TestOrderEndpoint:
         assert data["order_number"] == order_number
         assert "items" in data
         assert "total" in data
-        assert data["total"] == 10.00
+        assert data["total"] == 13.00
 
     def test_get_order_not_found(self):
         """Test GET /order/{order_number} with invalid number returns 404."""
@@ -152,6 +444,77 @@ class TestOrderEndpoint:
         assert response.status_code == 404
 
 
+class TestOrderExportImport:
+    """Test streaming export and bulk import endpoints."""
+
+    NDJSON = (
+        '{"order_number": 1001, "session_id": "s1", "items": [{"name": "Negroni", "price": 13.0, "quantity": 2}],'
+        ' "total": 26.0, "status": "served", "created_at": "2024-01-01 12:00:00"}\n'
+        '{"order_number": 1002, "items": [{"name": "Truffle Fries", "price": 12.0, "quantity": 1}], "total": 12.0}\n'
+        "not json\n"
+    )
+
+    def test_import_ndjson(self):
+        """Test POST /orders/import loads NDJSON and reports bad lines."""
+        response = client.post("/orders/import", content=self.NDJSON, headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["skipped"] == 0
+        assert data["errors"] == ["line 3: invalid JSON (Expecting value)"]
+
+        assert client.get("/order/1001").json()["status"] == "served"
+
+    def test_export_ndjson_roundtrip(self):
+        """Test GET /orders/export streams NDJSON."""
+        client.post("/orders/import", content=self.NDJSON)
+
+        response = client.get("/orders/export", params={"chunk_size": 1})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert len(lines) == 2
+        assert '"order_number":1001' in lines[0]
+
+    def test_export_csv_and_reimport(self):
+        """Test CSV export can be imported again."""
+        client.post("/orders/import", content=self.NDJSON)
+        exported = client.get("/orders/export", params={"format": "csv"})
+        assert exported.status_code == 200
+        assert exported.text.splitlines()[0] == "order_number,session_id,created_at,status,total,items"
+
+        response = client.post("/orders/import", content=exported.content, headers={"Content-Type": "text/csv"})
+        assert response.json() == {"imported": 0, "skipped": 2, "errors": []}
+
+    def test_export_rejects_bad_timestamp(self):
+        """Test export validates time filters."""
+        response = client.get("/orders/export", params={"since": "yesterday"})
+        assert response.status_code == 422
+
+
+class TestAnalyticsEndpoint:
+    """Test sales analytics endpoint."""
+
+    def test_analytics_reflects_orders(self):
+        """Test GET /analytics summarizes created orders."""
+        client.post("/order", json={"items": [{"name": "House Smash Burger", "price": 16.00, "quantity": 2}]})
+
+        response = client.get("/analytics", params={"top": 3, "hours": 12})
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["totals"]["orders"] == 1
+        assert data["totals"]["revenue"] == 32.00
+        assert data["top_items"][0]["name"] == "House Smash Burger"
+        assert data["top_items"][0]["category"] == "mains"
+        assert len(data["hourly_revenue"]) == 1
+
+    def test_analytics_rejects_bad_params(self):
+        """Test GET /analytics validates query parameters."""
+        response = client.get("/analytics", params={"top": 0})
+        assert response.status_code == 422
+
+
 class TestCORSAndMiddleware:
     """Test CORS and middleware configuration."""
 
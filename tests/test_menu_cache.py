@@ -0,0 +1,80 @@
+"""
+Test suite for the pre-serialized menu response and compression helpers.
+"""
+
+import gzip
+import json
+
+import pytest
+from app.compression import choose_encoding, compress_variants, etag_matches, strong_etag, variant_etag
+from app.menu_cache import build_menu_payload
+from app.menu_data import MENU_DATA
+from app.menu_versions import current_menu
+
+
+class TestChooseEncoding:
+    """Test Accept-Encoding negotiation."""
+
+    AVAILABLE = {"identity", "gzip", "br"}
+
+    def test_missing_header_is_identity(self):
+        assert choose_encoding(None, self.AVAILABLE) == "identity"
+
+    def test_prefers_brotli(self):
+        assert choose_encoding("gzip, deflate, br", self.AVAILABLE) == "br"
+
+    def test_falls_back_when_variant_missing(self):
+        assert choose_encoding("gzip, br", {"identity", "gzip"}) == "gzip"
+
+    def test_respects_q_values(self):
+        assert choose_encoding("br;q=0.5, gzip;q=1.0", self.AVAILABLE) == "gzip"
+        assert choose_encoding("gzip;q=0", self.AVAILABLE) == "identity"
+
+    def test_wildcard(self):
+        assert choose_encoding("*", self.AVAILABLE) == "br"
+
+
+class TestEtags:
+    """Test ETag generation and matching."""
+
+    def test_strong_etag_is_stable(self):
+        assert strong_etag(b"abc") == strong_etag(b"abc")
+        assert strong_etag(b"abc") != strong_etag(b"abd")
+        assert not strong_etag(b"abc").startswith("W/")
+
+    def test_etag_matching(self):
+        etag = strong_etag(b"menu")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches('"other-gzip"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_variant_etags(self):
+        etag = strong_etag(b"menu")
+        assert variant_etag(etag, "identity") == etag
+        assert variant_etag(etag, "gzip") == etag[:-1] + '-gzip"'
+        assert len({variant_etag(etag, encoding) for encoding in ("identity", "gzip", "br")}) == 3
+        assert etag_matches(variant_etag(etag, "br"), etag)
+        assert etag_matches(f'W/{variant_etag(etag, "gzip")}', etag)
+
+
+class TestMenuPayload:
+    """Test the pre-built menu payload."""
+
+    def test_variants_decode_to_menu(self):
+        payload = build_menu_payload(MENU_DATA)
+        assert json.loads(payload.variants["identity"]) == MENU_DATA
+        assert json.loads(gzip.decompress(payload.variants["gzip"])) == MENU_DATA
+
+    def test_brotli_variant(self):
+        brotli = pytest.importorskip("brotli")
+        payload = build_menu_payload(MENU_DATA)
+        assert json.loads(brotli.decompress(payload.variants["br"])) == MENU_DATA
+
+    def test_payload_built_once(self):
+        assert current_menu().payload is current_menu().payload
+
+    def test_compression_skips_incompressible(self):
+        assert set(compress_variants(b"x")) == {"identity"}
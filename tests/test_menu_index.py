@@ -0,0 +1,51 @@
+"""
+Test suite for the server-side menu index.
+"""
+
+import pytest
+
+from app.menu_data import MENU_DATA
+from app.menu_index import MenuIndex, UnknownMenuItemError, normalize_name
+from app.menu_versions import current_menu
+from app.models import OrderItem
+
+
+class TestMenuIndex:
+    """Test normalized lookup and order pricing."""
+
+    def test_indexes_every_menu_item(self):
+        index = MenuIndex(MENU_DATA)
+        names = {
+            item["name"] for category in ("starters", "mains", "desserts", "drinks") for item in MENU_DATA[category]
+        }
+        assert len(index) == len(names)
+        assert all(name in index for name in names)
+
+    def test_normalized_lookup(self):
+        index = current_menu().index
+        assert normalize_name("  Lobster  Mac & Cheese ") == "lobster mac and cheese"
+        assert index.get("burrata and tomato").name == "Burrata & Tomato"
+        assert index.get("OLD FASHIONED").price_cents == 1200
+        assert index.get("Free Lobster") is None
+
+    def test_category(self):
+        index = current_menu().index
+        assert index.category("Negroni") == "drinks"
+        assert index.category("Mystery Item") == "other"
+
+    def test_price_order_uses_menu_prices_in_cents(self):
+        items, total_cents = current_menu().index.price_order(
+            [OrderItem(name="negroni", price=0.01, quantity=3), OrderItem(name="Olive Oil Cake", price=99.0)]
+        )
+        assert [(item.name, item.price, item.quantity) for item in items] == [
+            ("Negroni", 13.0, 3),
+            ("Olive Oil Cake", 8.0, 1),
+        ]
+        assert total_cents == 4700
+
+    def test_price_order_rejects_unknown_items(self):
+        with pytest.raises(UnknownMenuItemError) as exc_info:
+            current_menu().index.price_order(
+                [OrderItem(name="Negroni", price=13.0), OrderItem(name="Caviar", price=1.0)]
+            )
+        assert exc_info.value.names == ["Caviar"]
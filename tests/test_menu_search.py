@@ -0,0 +1,60 @@
+"""
+Test suite for semantic menu search.
+"""
+
+import numpy as np
+
+from app.menu_data import MENU_DATA
+from app.menu_index import MenuIndex
+from app.menu_search import MenuSearchIndex, encode, features
+
+INDEX = MenuSearchIndex(MenuIndex(MENU_DATA).entries, dim=256)
+
+
+def names(hits):
+    return [entry.name for entry, _ in hits]
+
+
+class TestEncoding:
+    """Test hashed feature vectors."""
+
+    def test_concepts_shared_between_query_and_items(self):
+        assert features("fishy")["c:fish"] == features("Seared Salmon Bowl")["c:fish"]
+
+    def test_vectors_normalized_and_contiguous(self):
+        matrix = encode(["Negroni", "", "Olive Oil Cake"], 64)
+        assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+        assert np.allclose(np.linalg.norm(matrix, axis=1), [1.0, 0.0, 1.0])
+
+    def test_encoding_is_stable(self):
+        assert np.array_equal(encode(["boozy coffee"], 64), encode(["boozy coffee"], 64))
+
+
+class TestMenuSearchIndex:
+    """Test top-k retrieval."""
+
+    def test_one_row_per_item(self):
+        assert INDEX.matrix.shape == (len(INDEX), 256)
+
+    def test_descriptive_queries(self):
+        assert "Seared Salmon Bowl" in names(INDEX.search("something light and fishy", k=2))
+        assert names(INDEX.search("a boozy coffee drink", k=1)) == ["Espresso Martini"]
+        assert set(names(INDEX.search("something sweet", k=3))) <= {item["name"] for item in MENU_DATA["desserts"]}
+
+    def test_scores_ranked_and_thresholded(self):
+        hits = INDEX.search("cheesy pasta", k=5)
+        scores = [score for _, score in hits]
+        assert scores == sorted(scores, reverse=True)
+        assert INDEX.search("thanks dude", min_score=0.25) == []
+
+    def test_batch_matches_single_queries(self):
+        queries = ["meaty", "spicy", "cheesy pasta"]
+        assert [names(hits) for hits in INDEX.search_batch(queries, k=3)] == [
+            names(INDEX.search(query, k=3)) for query in queries
+        ]
+
+    def test_k_larger_than_menu(self):
+        assert len(INDEX.search("negroni", k=1000, min_score=-1.0)) == len(INDEX)
+
+    def test_empty_menu(self):
+        assert MenuSearchIndex([], dim=16).search("anything") == []
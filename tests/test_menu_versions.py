@@ -0,0 +1,110 @@
+"""
+Test suite for the versioned, hot-reloadable menu.
+"""
+
+import copy
+import json
+import os
+
+import pytest
+
+from app.menu_data import MENU_DATA
+from app.menu_versions import MenuValidationError, MenuVersions, validate_menu
+
+
+def write_menu(path, menu, mtime_offset=0):
+    path.write_text(json.dumps(menu))
+    if mtime_offset:
+        # Filesystem timestamps can be coarse; make the change visible to the poller
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+
+@pytest.fixture
+def menu_file(tmp_path):
+    path = tmp_path / "menu.json"
+    write_menu(path, MENU_DATA)
+    return path
+
+
+def repriced(name, price):
+    menu = copy.deepcopy(MENU_DATA)
+    for category in ("starters", "mains", "desserts", "drinks"):
+        for item in menu[category]:
+            if item["name"] == name:
+                item["price"] = price
+    return menu
+
+
+class TestValidateMenu:
+    """Test menu validation."""
+
+    def test_builtin_menu_is_valid(self):
+        assert validate_menu(MENU_DATA) == MENU_DATA
+
+    def test_missing_category_rejected(self):
+        menu = {key: value for key, value in MENU_DATA.items() if key != "drinks"}
+        with pytest.raises(MenuValidationError):
+            validate_menu(menu)
+
+    def test_non_positive_price_rejected(self):
+        with pytest.raises(MenuValidationError):
+            validate_menu(repriced("Negroni", 0))
+
+    def test_duplicate_item_rejected(self):
+        menu = copy.deepcopy(MENU_DATA)
+        menu["drinks"].append({"name": "negroni", "description": "Again", "price": 1.0})
+        with pytest.raises(MenuValidationError, match="listed twice"):
+            validate_menu(menu)
+
+
+class TestMenuVersions:
+    """Test loading, reloading and pinning menu versions."""
+
+    def test_builtin_menu_by_default(self):
+        versions = MenuVersions(path="")
+        version = versions.current()
+        assert version.source == "built-in"
+        assert version.version == 1
+        assert version.index.get("Negroni").price_cents == 1300
+        assert "Negroni" in version.prompt.items
+
+    def test_file_change_swaps_every_artifact(self, menu_file):
+        versions = MenuVersions(path=str(menu_file))
+        first = versions.current()
+        assert versions.check_for_changes() is None
+
+        write_menu(menu_file, repriced("Negroni", 15.0), mtime_offset=1_000_000)
+        second = versions.check_for_changes()
+
+        assert second.version == 2
+        assert versions.current() is second
+        assert second.index.get("Negroni").price_cents == 1500
+        assert "$15.00" in second.prompt.items["Negroni"]
+        assert second.payload.etag != first.payload.etag
+        # The old version is untouched for requests still using it
+        assert first.index.get("Negroni").price_cents == 1300
+
+    def test_unchanged_content_keeps_version(self, menu_file):
+        versions = MenuVersions(path=str(menu_file))
+        first = versions.current()
+        write_menu(menu_file, MENU_DATA, mtime_offset=1_000_000)
+        assert versions.reload() == (first, False)
+
+    def test_invalid_file_keeps_current_version(self, menu_file):
+        versions = MenuVersions(path=str(menu_file))
+        first = versions.current()
+
+        menu_file.write_text("{not json")
+        assert versions.check_for_changes() is None
+        with pytest.raises(MenuValidationError):
+            versions.reload()
+        assert versions.current() is first
+
+    def test_pinned_version_survives_reload(self, menu_file):
+        versions = MenuVersions(path=str(menu_file))
+        with versions.pinned() as pinned:
+            write_menu(menu_file, repriced("Negroni", 15.0), mtime_offset=1_000_000)
+            versions.reload()
+            assert versions.current() is pinned
+        assert versions.current().version == 2
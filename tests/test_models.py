@@ -89,6 +89,13 @@ class TestOrderRequest:
         with pytest.raises(ValidationError):
             OrderRequest(items=[])
 
+    def test_price_optional(self):
+        """Test items may be ordered without a price (the menu prices them)."""
+        order = OrderRequest(items=[{"name": "Negroni", "quantity": 2}])
+        assert order.items[0].price is None
+        with pytest.raises(ValidationError):
+            OrderItem(name="Negroni", quantity=2)  # Priced items (responses) still need one
+
 
 class TestOrderResponse:
     """Test OrderResponse model."""
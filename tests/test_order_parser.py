@@ -0,0 +1,229 @@
+"""
+Test suite for ordering through chat.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.menu_data import MENU_DATA
+from app.menu_index import MenuIndex
+from app.order_parser import OrderParser, confirmation, singular
+
+client = TestClient(app)
+
+parser = OrderParser(MenuIndex(MENU_DATA).entries)
+
+
+def parsed_items(message):
+    parsed = parser.parse(message)
+    return None if parsed is None else [(item.name, item.quantity) for item in parsed.items]
+
+
+@pytest.fixture(autouse=True)
+def use_memory_db(memory_db):
+    app.dependency_overrides[get_db] = lambda: memory_db
+    yield memory_db
+    app.dependency_overrides.pop(get_db, None)
+
+
+class TestOrderParser:
+    """Test item and quantity extraction."""
+
+    @pytest.mark.parametrize(
+        "message, expected",
+        [
+            ("two smash burgers and a negroni", [("House Smash Burger", 2), ("Negroni", 1)]),
+            ("Can I get a burger and fries?", [("House Smash Burger", 1), ("Truffle Fries", 1)]),
+            ("3 margaritas please", [("Margarita", 3)]),
+            ("negroni x2 please", [("Negroni", 2)]),
+            ("a couple of espresso martinis", [("Espresso Martini", 2)]),
+            ("I'd like the mac and cheese", [("Lobster Mac & Cheese", 1)]),
+            ("give me a steak frites and 2 old fashioneds", [("Steak Frites", 1), ("Old Fashioned", 2)]),
+            ("one negroni and another negroni", [("Negroni", 2)]),
+            ("I will have the salmon", [("Seared Salmon Bowl", 1)]),
+            ("I'll take the salmon", [("Seared Salmon Bowl", 1)]),
+            ("fries please", [("Truffle Fries", 1)]),
+            ("two burgers and a negroni please", [("House Smash Burger", 2), ("Negroni", 1)]),
+        ],
+    )
+    def test_items_and_quantities(self, message, expected):
+        assert parsed_items(message) == expected
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "is the negroni strong?",
+            "what burgers do you have?",
+            "burger",
+            "hello",
+            "how much does it cost?",
+            "what do you add to the smash burger?",
+            "can you tell me about the negroni please?",
+            "whats your most popular order, the smash burger?",
+            "tell me about the 2 burgers",
+            "I want to know if the negroni is strong",
+            "we were 2 and loved the burger",
+        ],
+    )
+    def test_questions_are_not_orders(self, message):
+        assert parser.parse(message) is None
+
+    def test_menu_prices(self):
+        parsed = parser.parse("two smash burgers and a negroni")
+        assert [item.price for item in parsed.items] == [16.0, 13.0]
+        assert parsed.total_cents == 4500
+
+    def test_negated_items_skipped(self):
+        assert parsed_items("I'll have the risotto, no fries") == [("Roasted Mushroom Risotto", 1)]
+
+    def test_ambiguous_phrase(self):
+        parsed = parser.parse("I'll have the chicken")
+        assert parsed.items == []
+        assert parsed.ambiguous == {
+            "chicken": ["Buttermilk Fried Chicken Sandwich", "Grilled Chicken Cobb", "Smoked Chicken Flatbread"]
+        }
+
+    def test_singular(self):
+        assert [singular(w) for w in ("burgers", "fries", "sandwiches", "tomatoes", "glass")] == [
+            "burger",
+            "fry",
+            "sandwich",
+            "tomato",
+            "glass",
+        ]
+
+    @pytest.mark.parametrize(
+        "message, expected",
+        [
+            ("yes", True),
+            ("Yep, do it!", True),
+            ("yes please", True),
+            ("no thanks", False),
+            ("cancel that", False),
+            ("what's good?", None),
+            ("ok what desserts do you have?", None),
+            ("sure, but is it spicy?", None),
+            ("ok?", None),
+            ("no, I want 2 smash burgers", None),
+            ("", None),
+        ],
+    )
+    def test_confirmation(self, message, expected):
+        assert confirmation(message) is expected
+
+
+class TestChatOrdering:
+    """Test drafting and confirming an order in chat."""
+
+    drafts: dict = {}
+
+    def chat(self, message, session_id="order-test-session"):
+        """Send a message the way the web client does, echoing the previous draft."""
+        body = {"message": message, "session_id": session_id, "draft_order": self.drafts.get(session_id)}
+        response = client.post("/chat", json=body)
+        assert response.status_code == 200
+        self.drafts[session_id] = response.json()["draft_order"]
+        return response
+
+    def test_draft_then_confirm(self, use_memory_db):
+        draft = self.chat("two smash burgers and a negroni", "order-confirm")
+        assert draft.headers["x-answer-path"] == "order_draft"
+        assert "$45.00" in draft.json()["response"]
+        assert draft.json()["draft_order"]["items"] == [
+            {"name": "House Smash Burger", "price": 16.0, "quantity": 2},
+            {"name": "Negroni", "price": 13.0, "quantity": 1},
+        ]
+        assert use_memory_db.get_order_count() == 0
+
+        placed = self.chat("yes", "order-confirm")
+        assert placed.headers["x-answer-path"] == "order_placed"
+        assert placed.json()["draft_order"] is None
+        order_number = placed.json()["order_number"]
+        assert f"#{order_number}" in placed.json()["response"]
+        assert client.get(f"/order/{order_number}").json()["total"] == 45.0
+
+    def test_later_messages_add_to_draft(self):
+        self.chat("two smash burgers please", "order-add")
+        response = self.chat("and a negroni please", "order-add").json()
+        assert [(item["name"], item["quantity"]) for item in response["draft_order"]["items"]] == [
+            ("House Smash Burger", 2),
+            ("Negroni", 1),
+        ]
+
+    def test_cancel_drops_draft(self, use_memory_db):
+        self.chat("a negroni please", "order-cancel")
+        assert self.chat("no", "order-cancel").headers["x-answer-path"] == "order_cancelled"
+        assert self.chat("yes", "order-cancel").headers["x-answer-path"] != "order_placed"
+        assert use_memory_db.get_order_count() == 0
+
+    def test_leading_no_with_items_adds_to_draft(self, use_memory_db):
+        self.chat("a negroni please", "order-no-more")
+        response = self.chat("no, I want 2 smash burgers", "order-no-more")
+        assert response.headers["x-answer-path"] == "order_draft"
+        assert [item["name"] for item in response.json()["draft_order"]["items"]] == ["Negroni", "House Smash Burger"]
+
+    def test_question_does_not_confirm(self, use_memory_db):
+        self.chat("a negroni please", "order-question")
+        assert self.chat("sure, but is it spicy?", "order-question").headers["x-answer-path"] != "order_placed"
+        assert use_memory_db.get_order_count() == 0
+
+    def test_other_messages_keep_draft(self):
+        self.chat("a negroni please", "order-keep")
+        response = self.chat("what do you recommend?", "order-keep")
+        assert response.headers["x-answer-path"] == "recommendation"
+        assert response.json()["draft_order"] is not None
+
+    def test_confirmation_is_stateless(self, use_memory_db):
+        """Test any worker can place a draft the client sends back (no server-side state)."""
+        draft = {"items": [{"name": "negroni", "price": 0.01, "quantity": 2}], "session_id": "order-stateless"}
+        response = client.post("/chat", json={"message": "yes", "session_id": "order-stateless", "draft_order": draft})
+        assert response.headers["x-answer-path"] == "order_placed"
+        assert client.get(f"/order/{response.json()['order_number']}").json()["total"] == 26.0  # Menu prices
+
+    def test_confirmed_order_reaches_subscribers(self, monkeypatch):
+        """Test a chat-placed order is published to its session's SSE subscribers, on the event loop."""
+        from app.events import order_events
+
+        subscription = order_events.subscribe(session_id="order-events")
+        received = []
+
+        def push(event):
+            try:
+                asyncio.get_running_loop()
+                received.append((event["type"], True))
+            except RuntimeError:
+                received.append((event["type"], False))
+
+        monkeypatch.setattr(subscription, "push", push)
+        try:
+            draft = {"items": [{"name": "Negroni", "quantity": 1}], "session_id": "order-events"}
+            response = client.post("/chat", json={"message": "yes", "session_id": "order-events", "draft_order": draft})
+            assert response.headers["x-answer-path"] == "order_placed"
+        finally:
+            order_events.unsubscribe(subscription)
+        assert received == [("order_created", True)]
+
+    def test_yes_without_draft_is_chat(self, use_memory_db):
+        response = client.post("/chat", json={"message": "yes", "session_id": "order-none"})
+        assert response.headers["x-answer-path"] != "order_placed"
+        assert use_memory_db.get_order_count() == 0
+
+    def test_ambiguous_item_asks(self):
+        response = self.chat("I'll have the chicken", "order-clarify")
+        assert response.headers["x-answer-path"] == "order_clarify"
+        assert "Grilled Chicken Cobb" in response.json()["response"]
+
+    def test_websocket_order(self, use_memory_db):
+        with client.websocket_connect("/ws/chat") as ws:
+            ws.receive_json()
+            events = []
+            for message in ("two smash burgers and a negroni", "yep"):
+                ws.send_json({"message": message})
+                events.append([ws.receive_json() for _ in range(3)][-1])
+        assert events[0]["draft_order"]["items"][0]["quantity"] == 2
+        assert "draft_order" not in events[1]
+        assert use_memory_db.get_order(events[1]["order_number"]) is not None
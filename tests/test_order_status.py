@@ -0,0 +1,60 @@
+"""
+Test suite for the order status state machine.
+"""
+
+from app.order_status import ORDER_TRANSITIONS, apply_transitions, transition_error
+
+ORDERS = {
+    1: {"status": "confirmed", "session_id": "s1"},
+    2: {"status": "served", "session_id": "s2"},
+}
+
+
+class TestTransitionError:
+    """Test single status changes."""
+
+    def test_forward_steps_allowed(self):
+        """Test the normal kitchen flow is allowed step by step."""
+        flow = ["confirmed", "preparing", "ready", "served"]
+        for current, new in zip(flow, flow[1:]):
+            assert transition_error(current, new) is None
+
+    def test_cancel_until_served(self):
+        """Test orders can be cancelled until they are served."""
+        for status in ("pending", "confirmed", "preparing", "ready"):
+            assert transition_error(status, "cancelled") is None
+        assert transition_error("served", "cancelled") == "Order is already served"
+
+    def test_skipping_and_going_back_rejected(self):
+        """Test skipped or backwards steps are explained."""
+        assert "allowed: cancelled, preparing" in transition_error("confirmed", "served")
+        assert transition_error("ready", "preparing") is not None
+
+    def test_final_states(self):
+        """Test served and cancelled allow nothing further."""
+        assert ORDER_TRANSITIONS["served"] == ORDER_TRANSITIONS["cancelled"] == frozenset()
+
+
+class TestApplyTransitions:
+    """Test batches of status changes."""
+
+    def test_sequential_changes_to_one_order(self):
+        """Test one batch may move an order through several steps."""
+        results, writes = apply_transitions(ORDERS, [(1, "preparing"), (1, "ready")])
+        assert [result["ok"] for result in results] == [True, True]
+        assert results[1]["previous_status"] == "preparing"
+        assert writes == {1: "ready"}
+
+    def test_per_order_failures(self):
+        """Test failures are reported per order without stopping the batch."""
+        results, writes = apply_transitions(ORDERS, [(2, "ready"), (3, "ready"), (1, "preparing")])
+        assert [result["ok"] for result in results] == [False, False, True]
+        assert results[0]["status"] == "served"
+        assert results[1]["error"] == "Order #3 not found"
+        assert results[2]["session_id"] == "s1"
+        assert writes == {1: "preparing"}
+
+    def test_current_state_not_mutated(self):
+        """Test the caller's snapshot is left untouched."""
+        apply_transitions(ORDERS, [(1, "preparing")])
+        assert ORDERS[1]["status"] == "confirmed"
@@ -0,0 +1,63 @@
+"""
+Test suite for order export/import helpers and CLI.
+"""
+
+import json
+
+from app.database import MemoryDatabase, set_db
+from app.orders_io import _main, iter_csv, iter_ndjson, parse_csv, parse_ndjson
+
+ORDER = {
+    "order_number": 1732,
+    "session_id": None,
+    "items": [{"name": "Negroni", "price": 13.0, "quantity": 1}],
+    "total": 13.0,
+    "status": "confirmed",
+    "created_at": "2024-01-01 12:00:00",
+}
+
+
+class TestEncoding:
+    """Test chunked export encoders."""
+
+    def test_ndjson_one_block_per_chunk(self):
+        blocks = list(iter_ndjson([[ORDER, ORDER], [ORDER]]))
+        assert len(blocks) == 2
+        assert blocks[0].count(b"\n") == 2
+
+    def test_csv_roundtrip(self):
+        lines = b"".join(iter_csv([[ORDER]])).decode().splitlines()
+        header = lines[0].split(",")
+        errors: list[str] = []
+        assert list(parse_csv(lines[1:], errors, header)) == [ORDER]
+        assert errors == []
+
+
+class TestParsing:
+    """Test import parsing and validation."""
+
+    def test_invalid_lines_reported(self):
+        errors: list[str] = []
+        lines = [json.dumps(ORDER), "", json.dumps({**ORDER, "items": []}), "{"]
+        assert len(list(parse_ndjson(lines, errors))) == 1
+        assert len(errors) == 2
+        assert errors[0].startswith("line 3:")
+
+
+class TestCommandLine:
+    """Test python -m app.orders_io."""
+
+    def test_import_then_export(self, tmp_path, capsys):
+        store = MemoryDatabase()
+        set_db(store)
+        try:
+            source = tmp_path / "orders.ndjson"
+            source.write_text(json.dumps(ORDER) + "\n")
+            assert _main(["import", str(source)]) == 0
+            assert store.get_order(1732)["total"] == 13.0
+
+            target = tmp_path / "export.csv"
+            assert _main(["export", "--format", "csv", "-o", str(target)]) == 0
+            assert target.read_text().splitlines()[1].startswith("1732,")
+        finally:
+            set_db(None)
@@ -0,0 +1,87 @@
+"""
+Test suite for opt-in request profiling.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.profiling import ProfilingMiddleware, list_profiles
+
+# The middleware is only installed when PROFILING_ENABLED is set at startup; wrap the app directly instead
+client = TestClient(ProfilingMiddleware(app))
+
+
+@pytest.fixture(autouse=True)
+def profiling(monkeypatch, tmp_path, memory_db):
+    monkeypatch.setattr("app.profiling.settings.profiling_enabled", True)
+    monkeypatch.setattr("app.profiling.settings.profiling_dir", str(tmp_path / "profiles"))
+    monkeypatch.setattr("app.profiling.settings.profiling_sample_rate", 0.0)
+    monkeypatch.setattr("app.profiling.settings.profiling_token", None)
+    monkeypatch.setattr("app.main.settings.debug_token", None)
+    app.dependency_overrides[get_db] = lambda: memory_db
+    yield tmp_path / "profiles"
+    app.dependency_overrides.pop(get_db, None)
+
+
+class TestProfilingMiddleware:
+    """Test triggering and the written profile files."""
+
+    def test_untriggered_request_not_profiled(self, profiling):
+        response = client.get("/menu")
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert not profiling.exists()
+
+    def test_header_triggers_profile(self, profiling):
+        response = client.post(
+            "/order", json={"items": [{"name": "Negroni", "price": 13.0}]}, headers={"X-Profile": "1"}
+        )
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+
+        assert {path.name for path in profiling.iterdir()} == {
+            f"{profile_id}.prof",
+            f"{profile_id}.txt",
+            f"{profile_id}.json",
+        }
+        summary = (profiling / f"{profile_id}.txt").read_text()
+        assert "POST /order -> 200" in summary
+        assert "allocation sites" in summary
+        (profile,) = list_profiles()
+        assert profile["id"] == profile_id
+        assert profile["trigger"] == "header"
+
+    def test_token_required_when_configured(self, monkeypatch, profiling):
+        monkeypatch.setattr("app.profiling.settings.profiling_token", "s3cret")
+        assert "x-profile-id" not in client.get("/menu", headers={"X-Profile": "1"}).headers
+        assert "x-profile-id" in client.get("/menu", headers={"X-Profile": "s3cret"}).headers
+
+    def test_sampling_and_pruning(self, monkeypatch, profiling):
+        monkeypatch.setattr("app.profiling.settings.profiling_sample_rate", 1.0)
+        monkeypatch.setattr("app.profiling.settings.profiling_max_files", 2)
+        for _ in range(3):
+            assert "x-profile-id" in client.get("/health/live").headers
+        assert len(list(profiling.glob("*.json"))) == 2
+        assert len(list(profiling.glob("*.prof"))) == 2
+
+
+class TestProfileEndpoints:
+    """Test listing and reading profiles."""
+
+    def test_list_and_read(self, profiling):
+        profile_id = client.get("/menu", headers={"X-Profile": "1"}).headers["x-profile-id"]
+
+        listed = client.get("/debug/profiles").json()
+        assert [profile["id"] for profile in listed] == [profile_id]
+        assert listed[0]["path"] == "/menu"
+
+        response = client.get(f"/debug/profiles/{profile_id}")
+        assert response.status_code == 200
+        assert "GET /menu -> 200" in response.text
+        assert client.get("/debug/profiles/nope").status_code == 404
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr("app.profiling.settings.profiling_enabled", False)
+        assert client.get("/debug/profiles").status_code == 404
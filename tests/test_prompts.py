@@ -0,0 +1,119 @@
+"""
+Test suite for budgeted LLM prompt assembly.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.menu_data import MENU_DATA
+from app.prompts import TokenCounter, build_menu_prompt, build_prompt, estimate_tokens
+
+MENU_PROMPT = build_menu_prompt(MENU_DATA)
+
+
+@pytest.fixture(autouse=True)
+def no_llama_server(monkeypatch):
+    """Estimate token counts unless a test configures llama-server."""
+    monkeypatch.setattr("app.prompts.settings.llama_server_url", None)
+
+
+class TestMenuPrompt:
+    """Test the per-version prompt pieces."""
+
+    def test_pieces(self):
+        assert "The Common House" in MENU_PROMPT.header
+        assert MENU_PROMPT.items["Negroni"] == "- Negroni: Gin, Campari, sweet vermouth ($13.00)\n"
+        full, compact = MENU_PROMPT.summaries[3]
+        assert full.startswith("DRINKS ($11.00-$14.00): Old Fashioned, ")
+        assert compact == "DRINKS: 5 items, $11.00-$14.00\n"
+
+
+@pytest.mark.asyncio
+class TestTokenCounter:
+    """Test cached /tokenize counts."""
+
+    async def test_counts_cached(self, monkeypatch):
+        monkeypatch.setattr("app.prompts.settings.llama_server_url", "http://llama")
+        calls = []
+
+        def handler(request):
+            calls.append(json.loads(request.content)["content"])
+            return httpx.Response(200, json={"tokens": [1, 2, 3]})
+
+        counter = TokenCounter()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await counter.count(["a", "b", "a"], client) == [3, 3, 3]
+            assert await counter.count(["a", "b"], client) == [3, 3]
+        assert sorted(calls) == ["a", "b"]
+        assert len(counter) == 2
+
+    async def test_estimates_when_tokenize_fails(self, monkeypatch):
+        monkeypatch.setattr("app.prompts.settings.llama_server_url", "http://llama")
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500)
+
+        counter = TokenCounter()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await counter.count(["x" * 40], client) == [10]
+            assert await counter.count(["x" * 40], client) == [10]
+        assert len(calls) == 1  # Backs off instead of retrying every request
+        assert len(counter) == 0
+
+
+@pytest.mark.asyncio
+class TestBuildPrompt:
+    """Test relevance trimming and the token budget."""
+
+    async def test_relevant_items_in_full_rest_summarized(self):
+        text, stats = await build_prompt(MENU_PROMPT, "negroni?", ["Negroni"], budget=0)
+        assert MENU_PROMPT.items["Negroni"] in text
+        assert MENU_PROMPT.items["Margarita"] not in text
+        assert "Margarita" in text  # Named in the drinks summary
+        assert text.endswith("Customer: negroni?\nTobi:")
+        assert (stats.menu_items, stats.summaries) == (1, 4)
+        assert stats.prompt_tokens < estimate_tokens("".join(MENU_PROMPT.items.values()))
+
+    async def test_budget_prefers_items_then_recent_history(self):
+        history = [("Customer", "first " * 20), ("Tobi", "reply " * 20), ("Customer", "latest question")]
+        _, unlimited = await build_prompt(MENU_PROMPT, "negroni?", ["Negroni"], history=history, budget=0)
+
+        text, stats = await build_prompt(MENU_PROMPT, "negroni?", ["Negroni"], history=history, budget=120)
+        assert stats.prompt_tokens <= 120 < unlimited.prompt_tokens
+        assert MENU_PROMPT.items["Negroni"] in text
+        assert "Customer: latest question\n" in text
+        assert "first first" not in text
+
+    async def test_compact_summaries_when_tight(self):
+        text, stats = await build_prompt(MENU_PROMPT, "hi", budget=110)
+        assert stats.prompt_tokens <= 110
+        assert "items, $" in text
+        assert text.endswith("Customer: hi\nTobi:")
+
+    async def test_only_menu_pieces_tokenized(self, monkeypatch):
+        """Test the message and history are estimated, so repeat requests need no /tokenize calls."""
+        monkeypatch.setattr("app.prompts.settings.llama_server_url", "http://llama")
+        calls = []
+
+        def handler(request):
+            calls.append(json.loads(request.content)["content"])
+            return httpx.Response(200, json={"tokens": [1, 2, 3]})
+
+        counter = TokenCounter()
+        history = [("Customer", "hi"), ("Tobi", "hey dude")]
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await build_prompt(MENU_PROMPT, "negroni?", ["Negroni"], history=history, counter=counter, client=client)
+            assert calls and not any("Customer:" in text or "Tobi:" in text for text in calls)
+            calls.clear()
+            await build_prompt(MENU_PROMPT, "margarita?", ["Negroni"], history=history, counter=counter, client=client)
+        assert calls == []
+
+    async def test_message_always_included(self):
+        text, stats = await build_prompt(MENU_PROMPT, "hello there", ["Negroni"], is_vip=True, budget=1)
+        assert "VIP" in text
+        assert text.endswith("Customer: hello there\nTobi:")
+        assert (stats.menu_items, stats.summaries, stats.history_turns) == (0, 0, 0)
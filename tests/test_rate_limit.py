@@ -0,0 +1,91 @@
+"""
+Test suite for chat rate limiting and load shedding.
+"""
+
+from app.rate_limit import AdaptiveLimiter, ChatRateLimits, RateLimiter, retry_after_header
+
+
+class TestRateLimiter:
+    """Test keyed token buckets."""
+
+    def test_burst_then_refill(self):
+        limiter = RateLimiter(rate=2.0, burst=3)
+        assert [limiter.check("a", now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+        wait = limiter.check("a", now=100.0)
+        assert wait == 0.5
+        assert limiter.check("a", now=100.5) == 0.0
+
+    def test_keys_are_independent(self):
+        limiter = RateLimiter(rate=1.0, burst=1)
+        assert limiter.check("a", now=0.0) == 0.0
+        assert limiter.check("a", now=0.0) > 0
+        assert limiter.check("b", now=0.0) == 0.0
+
+    def test_idle_buckets_evicted(self):
+        limiter = RateLimiter(rate=1.0, burst=1, idle_seconds=60)
+        limiter._last_sweep = 0.0
+        limiter.check("old", now=1.0)
+        limiter.check("new", now=100.0)
+        assert len(limiter) == 1
+
+
+class TestAdaptiveLimiter:
+    """Test the latency-driven global limit."""
+
+    def test_backs_off_when_slow_and_recovers(self):
+        limiter = AdaptiveLimiter(max_rate=10, min_rate=1, burst=10, target_latency=1.0, smoothing=1.0)
+        for _ in range(20):
+            limiter.record_latency(5.0)
+        assert limiter.rate == 1
+
+        limiter.record_latency(0.1)
+        assert limiter.rate == 2
+        for _ in range(20):
+            limiter.record_latency(0.1)
+        assert limiter.rate == 10
+
+    def test_sheds_when_bucket_empty(self):
+        limiter = AdaptiveLimiter(max_rate=1, min_rate=1, burst=1, target_latency=1.0)
+        assert limiter.check(now=limiter._bucket.updated) == 0.0
+        assert limiter.check(now=limiter._bucket.updated) > 0
+
+
+class TestChatRateLimits:
+    """Test combined per-IP, per-session and global checks."""
+
+    def test_session_limit(self, monkeypatch):
+        limits = ChatRateLimits()
+        limits.per_session = RateLimiter(rate=0.01, burst=2)
+        assert limits.check("1.2.3.4", "s1") is None
+        assert limits.check("1.2.3.4", "s1") is None
+
+        limit, wait = limits.check("1.2.3.4", "s1")
+        assert limit == "session"
+        assert wait > 0
+        assert limits.check("1.2.3.4", "s2") is None
+
+    def test_rejected_request_uses_no_tokens(self):
+        """Test a request rejected by the session or global limit does not drain the IP bucket."""
+        limits = ChatRateLimits()
+        limits.per_ip = RateLimiter(rate=0.01, burst=2)
+        limits.per_session = RateLimiter(rate=0.01, burst=1)
+        assert limits.check("1.2.3.4", "s1") is None
+        for _ in range(5):
+            assert limits.check("1.2.3.4", "s1")[0] == "session"
+        assert limits.check("1.2.3.4", "s2") is None  # The IP still has its second token
+
+        limits.global_limit = AdaptiveLimiter(max_rate=0.01, min_rate=0.01, burst=0, target_latency=1.0)
+        assert limits.check("5.6.7.8", "s3")[0] == "global"
+        limits.global_limit = AdaptiveLimiter(max_rate=0.01, min_rate=0.01, burst=1, target_latency=1.0)
+        assert limits.check("5.6.7.8", "s3") is None  # Neither the IP nor the session was charged
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr("app.rate_limit.settings.rate_limit_enabled", False)
+        limits = ChatRateLimits()
+        limits.per_ip = RateLimiter(rate=0.01, burst=0)
+        assert limits.check("1.2.3.4", None) is None
+
+    def test_retry_after_header(self):
+        assert retry_after_header(0.2) == "1"
+        assert retry_after_header(2.5) == "3"
@@ -0,0 +1,157 @@
+"""
+Test suite for the production server helpers.
+"""
+
+import contextlib
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from app.menu_versions import menu_versions
+from app.database import set_db
+from app.server import default_workers, preload, worker_log_file
+
+
+class TestServer:
+    """Test worker sizing and startup preloading."""
+
+    def test_default_workers_from_cpu_count(self, monkeypatch):
+        monkeypatch.setattr("app.server.settings.workers", 0)
+        assert default_workers() == (os.cpu_count() or 1)
+
+        monkeypatch.setattr("app.server.settings.workers", 3)
+        assert default_workers() == 3
+
+    def test_worker_log_file(self, monkeypatch):
+        monkeypatch.setattr("app.server.settings.log_file", "logs/app.log")
+        assert worker_log_file(1) == os.path.join("logs", "app.worker-1.log")
+
+    def test_preload_builds_shared_state(self, memory_db):
+        set_db(memory_db)
+        menu_versions._current = None
+
+        preload()
+
+        assert menu_versions._current is not None
+        set_db(None)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout=30.0):
+    """Poll ``condition`` until it returns something truthy."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError(f"Timed out after {timeout:.0f}s")
+
+
+@pytest.fixture
+def master(tmp_path):
+    """Run ``python -m app.server`` with two workers; yields (process, base URL)."""
+    repo_root = Path(__file__).parent.parent
+    port = free_port()
+    env = {
+        "PATH": os.environ.get("PATH", ""),
+        "PYTHONPATH": str(repo_root),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'orders.db'}",
+        "LOG_FILE": str(tmp_path / "logs" / "app.log"),
+        "LOG_LEVEL": "INFO",
+        "ENVIRONMENT": "testing",
+        "USE_LOCAL_AI": "false",
+        "GRACEFUL_TIMEOUT_SECONDS": "2",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+        cwd=repo_root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        yield process, f"http://127.0.0.1:{port}"
+    finally:
+        if process.poll() is None:
+            workers = workers_of(process)
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                for pid in workers | {process.pid}:
+                    with contextlib.suppress(ProcessLookupError):
+                        os.kill(pid, signal.SIGKILL)
+                process.wait()
+
+
+def workers_of(process) -> set[int]:
+    children = Path(f"/proc/{process.pid}/task/{process.pid}/children")
+    return {int(pid) for pid in children.read_text().split()}
+
+
+def serving(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(f"{url}/health/live", timeout=2) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "fork") or not Path(f"/proc/{os.getpid()}/task/{os.getpid()}/children").exists(),
+    reason="needs fork and /proc child lists",
+)
+class TestMaster:
+    """Test the pre-forking master end to end (real processes and sockets)."""
+
+    def test_forks_workers_that_serve(self, master, tmp_path):
+        process, url = master
+        wait_for(lambda: serving(url))
+        assert len(wait_for(lambda: len(workers_of(process)) == 2 and workers_of(process))) == 2
+        # Every process rotates its own log file
+        wait_for(lambda: (tmp_path / "logs" / "app.worker-1.log").exists())
+        assert (tmp_path / "logs" / "app.log").exists()
+        assert (tmp_path / "logs" / "app.worker-0.log").exists()
+
+    def test_sighup_replaces_every_worker(self, master):
+        process, url = master
+        wait_for(lambda: serving(url))
+        before = wait_for(lambda: len(workers_of(process)) == 2 and workers_of(process))
+
+        process.send_signal(signal.SIGHUP)
+        after = wait_for(lambda: (pids := workers_of(process)).isdisjoint(before) and len(pids) == 2 and pids)
+        assert len(after) == 2
+        assert serving(url)
+
+    def test_crashed_worker_is_respawned(self, master):
+        process, url = master
+        wait_for(lambda: serving(url))
+        before = wait_for(lambda: len(workers_of(process)) == 2 and workers_of(process))
+
+        crashed = min(before)
+        os.kill(crashed, signal.SIGKILL)
+        after = wait_for(lambda: (pids := workers_of(process)) != before and len(pids) == 2 and pids)
+        assert crashed not in after and len(after & before) == 1
+        assert wait_for(lambda: serving(url))
+
+    def test_sigterm_stops_master_and_workers(self, master):
+        process, url = master
+        wait_for(lambda: serving(url))
+        workers = wait_for(lambda: len(workers_of(process)) == 2 and workers_of(process))
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+        assert not any(Path(f"/proc/{pid}").exists() for pid in workers)
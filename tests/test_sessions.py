@@ -0,0 +1,47 @@
+"""
+Test suite for chat session state.
+"""
+
+from app.sessions import SessionStore
+
+
+class TestSessionStore:
+    """Test session reuse and eviction."""
+
+    def test_reuses_session(self):
+        store = SessionStore()
+        session = store.get_or_create("abc")
+        session.add_turn("hi", "hey dude")
+
+        assert store.get_or_create("abc") is session
+        assert list(session.history) == [("Customer", "hi"), ("Tobi", "hey dude")]
+
+    def test_generates_id(self):
+        store = SessionStore()
+        assert store.get_or_create(None).session_id != store.get_or_create(None).session_id
+
+    def test_history_is_bounded(self, monkeypatch):
+        monkeypatch.setattr("app.sessions.settings.chat_history_turns", 2)
+        session = SessionStore().get_or_create("abc")
+        for turn in range(5):
+            session.add_turn(f"q{turn}", f"a{turn}")
+        assert list(session.history)[0] == ("Customer", "q3")
+
+    def test_evicts_least_recently_used(self):
+        store = SessionStore(max_sessions=2)
+        store.get_or_create("a")
+        store.get_or_create("b")
+        store.get_or_create("a")
+        store.get_or_create("c")
+
+        assert len(store) == 2
+        assert store.get_or_create("a").turns == 0
+        assert "b" not in store._sessions
+
+    def test_idle_session_expires(self):
+        store = SessionStore(idle_seconds=60)
+        session = store.get_or_create("a")
+        session.add_turn("hi", "hey")
+        session.last_active -= 120
+
+        assert store.get_or_create("a").turns == 0
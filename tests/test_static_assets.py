@@ -0,0 +1,108 @@
+"""
+Test suite for precompressed, fingerprinted static files.
+"""
+
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssets, fingerprinted_name
+
+PAGE = b"<html><body>" + b"Tobi says hi! " * 200 + b"</body></html>"
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "page.html").write_bytes(PAGE)
+    (tmp_path / "img").mkdir()
+    (tmp_path / "img" / "logo.png").write_bytes(b"\x89PNG" + b"\x00" * 500)
+    (tmp_path / ".hidden").write_text("secret")
+    return tmp_path
+
+
+def client_for(directory, rescan=False):
+    assets = StaticAssets(directory, rescan=rescan)
+    test_app = FastAPI()
+    test_app.mount("/static", assets)
+    return assets, TestClient(test_app)
+
+
+class TestStaticAssets:
+    """Test serving, negotiation and caching headers."""
+
+    def test_fingerprinted_name(self):
+        assert fingerprinted_name("css/app.css", "abc123") == "css/app.abc123.css"
+        assert fingerprinted_name("LICENSE", "abc123") == "LICENSE.abc123"
+
+    def test_plain_url_revalidates(self, static_dir):
+        _, client = client_for(static_dir)
+        response = client.get("/static/page.html", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.content == PAGE
+        assert response.headers["content-type"] == "text/html; charset=utf-8"
+        assert response.headers["cache-control"] == "public, max-age=300"
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        again = client.get("/static/page.html", headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304
+
+    def test_fingerprinted_url_immutable(self, static_dir):
+        assets, client = client_for(static_dir)
+        url = assets.url_for("page.html")
+        assert url.startswith("/static/page.") and url != "/static/page.html"
+        assert client.get("/static/asset-manifest.json").json()["page.html"] == url
+
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(PAGE)
+        assert response.content == PAGE  # Decoded by the client
+        assert gzip.decompress(assets.assets["page.html"].variants["gzip"]) == PAGE
+
+    def test_etag_per_encoding(self, static_dir):
+        _, client = client_for(static_dir)
+        plain = client.get("/static/page.html", headers={"Accept-Encoding": "identity"}).headers["etag"]
+        gzipped = client.get("/static/page.html", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        assert gzipped == plain[:-1] + '-gzip"'
+
+        again = client.get("/static/page.html", headers={"Accept-Encoding": "identity", "If-None-Match": gzipped})
+        assert again.status_code == 304
+        assert again.headers["etag"] == plain
+
+    def test_binary_files_not_compressed(self, static_dir):
+        assets, client = client_for(static_dir)
+        assert set(assets.assets["img/logo.png"].variants) == {"identity"}
+        response = client.get("/static/img/logo.png", headers={"Accept-Encoding": "gzip, br"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-type"] == "image/png"
+
+    def test_unknown_and_hidden_files(self, static_dir):
+        _, client = client_for(static_dir)
+        assert client.get("/static/.hidden").status_code == 404
+        assert client.get("/static/../page.html").status_code == 404
+        assert client.get("/static/missing.js").status_code == 404
+
+    def test_head_and_methods(self, static_dir):
+        _, client = client_for(static_dir)
+        head = client.head("/static/page.html", headers={"Accept-Encoding": "identity"})
+        assert head.status_code == 200
+        assert head.content == b""
+        assert head.headers["content-length"] == str(len(PAGE))
+        assert client.post("/static/page.html").status_code == 405
+
+    def test_rescan_picks_up_edits(self, static_dir):
+        assets, client = client_for(static_dir, rescan=True)
+        old_url = assets.url_for("page.html")
+        (static_dir / "page.html").write_bytes(b"<p>new</p>")
+        os.utime(static_dir / "page.html", ns=(1, 1))  # Changed mtime even on coarse clocks
+        assert client.get("/static/page.html").content == b"<p>new</p>"
+        assert assets.url_for("page.html") != old_url
+
+    def test_app_serves_chat_page(self):
+        response = TestClient(app).get("/static/restaurant_chat.html", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,181 @@
+"""
+Test suite for multi-location routing.
+"""
+
+import copy
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.database as database
+from app.database import create_database
+from app.main import app
+from app.menu_data import MENU_DATA
+from app.models import TenantConfig
+from app.tenants import TenantRegistry, set_tenant_registry
+
+client = TestClient(app)
+
+
+def registry(tmp_path, **kwargs) -> TenantRegistry:
+    menu = copy.deepcopy(MENU_DATA)
+    menu["restaurant_name"] = "The Common House Uptown"
+    menu["drinks"] = [{"name": "Uptown Spritz", "description": "Aperol, prosecco", "price": 10.0}]
+    menu_file = tmp_path / "uptown.json"
+    menu_file.write_text(json.dumps(menu))
+
+    configs = {
+        "downtown": TenantConfig(restaurant_name="The Common House Downtown", database_url="memory://"),
+        "uptown": TenantConfig(
+            restaurant_name="Uptown", hosts=["uptown.example.com"], menu_file=str(menu_file), database_url="memory://"
+        ),
+    }
+    return TenantRegistry(configs, **kwargs)
+
+
+@pytest.fixture
+def tenants(tmp_path):
+    registry_ = registry(tmp_path)
+    set_tenant_registry(registry_)
+    yield registry_
+    set_tenant_registry(None)
+
+
+class TestTenantRegistry:
+    """Test resolution, lazy loading and eviction."""
+
+    def test_resolve(self, tmp_path):
+        tenants = registry(tmp_path)
+        assert tenants.resolve(None, "/locations/downtown/menu") == ("downtown", "/menu", "/locations/downtown")
+        assert tenants.resolve("Uptown.Example.com:8000", "/menu") == ("uptown", "/menu", "")
+        assert tenants.resolve("other.example.com", "/menu") == (None, "/menu", "")
+
+    def test_loaded_lazily(self, tmp_path):
+        tenants = registry(tmp_path)
+        assert tenants.loaded == []
+        tenant = tenants.get("downtown")
+        assert tenants.get("downtown") is tenant
+        assert tenants.loaded == ["downtown"]
+
+    def test_idle_locations_evicted(self, tmp_path):
+        tenants = registry(tmp_path, idle_seconds=0.0)
+        tenants.get("downtown")
+        tenants.get("downtown").last_used -= 1
+        tenants.get("uptown")
+        assert tenants.loaded == ["uptown"]
+
+    def test_capacity_keeps_streaming_locations(self, tmp_path):
+        tenants = registry(tmp_path, max_loaded=1)
+        subscription = tenants.get("downtown").events.subscribe()
+        tenants.get("uptown")
+        assert tenants.loaded == ["downtown", "uptown"]
+
+        tenants.get("downtown").events.unsubscribe(subscription)
+        tenants.get("uptown")
+        assert tenants.loaded == ["uptown"]
+
+    def test_memory_store_keeps_location_loaded(self, tmp_path):
+        """Test a location whose orders live in memory is not evicted (they would be lost)."""
+        tenants = registry(tmp_path, idle_seconds=0.0)
+        tenants.get("downtown").db.create_order(1732, "a", [{"name": "Negroni", "price": 13.0, "quantity": 1}], 13.0)
+        tenants.get("downtown").last_used -= 1
+        tenants.get("uptown")
+        assert tenants.loaded == ["downtown", "uptown"]
+        assert tenants.get("downtown").db.get_order(1732) is not None
+
+    def test_memory_store_without_orders_evicted(self, tmp_path):
+        """Test reading from a memory location does not pin it."""
+        tenants = registry(tmp_path, idle_seconds=0.0)
+        assert tenants.get("downtown").db.list_orders() == []
+        tenants.get("downtown").last_used -= 1
+        tenants.get("uptown")
+        assert tenants.loaded == ["uptown"]
+
+    def test_eviction_closes_store(self, tmp_path, monkeypatch):
+        tenants = TenantRegistry(
+            {
+                "downtown": TenantConfig(
+                    restaurant_name="Downtown", database_url=f"sqlite:///{tmp_path / 'downtown.db'}"
+                ),
+                "uptown": TenantConfig(restaurant_name="Uptown", database_url="memory://"),
+            },
+            idle_seconds=0.0,
+        )
+        closed = []
+        monkeypatch.setattr(tenants.get("downtown").db, "close", lambda: closed.append("downtown"))
+        tenants.get("downtown").last_used -= 1
+        tenants.get("uptown")
+        assert tenants.loaded == ["uptown"]
+        assert closed == ["downtown"]
+
+    def test_archival_covers_every_location(self, tmp_path, monkeypatch):
+        """Test loaded and unloaded locations are archived."""
+        urls = {tenant_id: f"sqlite:///{tmp_path / f'{tenant_id}.db'}" for tenant_id in ("downtown", "uptown")}
+        monkeypatch.setattr(database, "_utc_timestamp", lambda: "2024-01-15 12:00:00")
+        for url in urls.values():
+            create_database(url).create_order(1732, "a", [{"name": "Negroni", "price": 13.0, "quantity": 1}], 13.0)
+
+        tenants = TenantRegistry(
+            {tenant_id: TenantConfig(restaurant_name=tenant_id, database_url=url) for tenant_id, url in urls.items()}
+        )
+        tenants.get("downtown")
+        assert tenants.archive_orders("2024-03-01 00:00:00") == 2
+        assert tenants.loaded == ["downtown"]  # Archiving does not load locations
+        assert tenants.archive_orders("2024-03-01 00:00:00") == 0
+
+    def test_invalid_location_id(self, tmp_path):
+        path = tmp_path / "tenants.json"
+        path.write_text(json.dumps({"Down Town": {"restaurant_name": "x"}}))
+        with pytest.raises(ValueError, match="Invalid location id"):
+            TenantRegistry.from_file(str(path))
+
+
+class TestTenantRouting:
+    """Test requests are served from their location's menu and store."""
+
+    def test_location_menu_by_path_and_host(self, tenants):
+        downtown = client.get("/locations/downtown/menu").json()
+        assert downtown["restaurant_name"] == "The Common House Downtown"
+        assert downtown["drinks"] == MENU_DATA["drinks"]
+
+        uptown = client.get("/menu", headers={"Host": "uptown.example.com"}).json()
+        assert uptown["restaurant_name"] == "The Common House Uptown"
+        assert [item["name"] for item in uptown["drinks"]] == ["Uptown Spritz"]
+
+        assert client.get("/menu").json()["restaurant_name"] == MENU_DATA["restaurant_name"]
+
+    def test_orders_priced_and_stored_per_location(self, tenants):
+        order = {"items": [{"name": "Uptown Spritz", "price": 1.0}]}
+        assert client.post("/locations/downtown/order", json=order).status_code == 422
+
+        response = client.post("/locations/uptown/order", json=order)
+        assert response.status_code == 200
+        order_number = response.json()["order_number"]
+        assert response.json()["total"] == 10.0
+
+        assert client.get(f"/locations/uptown/order/{order_number}").status_code == 200
+        assert tenants.get("downtown").db.get_order(order_number) is None
+
+    def test_chat_sessions_per_location(self, tenants):
+        from app.sessions import chat_sessions
+
+        with client.websocket_connect("/locations/downtown/ws/chat?session_id=shared-session") as ws:
+            ws.receive_json()
+            ws.send_json({"message": "hello"})
+            while ws.receive_json()["type"] != "end":
+                pass
+        assert tenants.get("downtown").sessions.get_or_create("shared-session").turns == 1
+        assert tenants.get("uptown").sessions.get_or_create("shared-session").turns == 0
+        assert chat_sessions.get_or_create("shared-session").turns == 0
+
+    def test_health_not_served_per_location(self, tenants):
+        """Test the process health routes are not reported as a location's health."""
+        for path in ("/health", "/health/live", "/health/ready"):
+            assert client.get(f"/locations/downtown{path}").status_code == 404
+            assert client.get(path).status_code == 200
+
+    def test_unknown_location(self, tenants):
+        response = client.get("/locations/nowhere/menu")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Unknown location: nowhere"}
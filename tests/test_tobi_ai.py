@@ -2,6 +2,8 @@
 Test suite for Tobi AI chatbot functionality.
 """
 
+import json
+
 import pytest
 from app.tobi_ai import get_tobi_response, TOBI_RESPONSES
 from app.menu_data import MENU_DATA
@@ -78,6 +80,16 @@ class TestTobiResponses:
         assert isinstance(response, str)
         assert len(response) > 0
 
+    def test_descriptive_question_uses_semantic_search(self):
+        """Test questions with no keyword match still find menu items."""
+        from app.tobi_ai import find_menu_item
+
+        matches = find_menu_item("something light and fishy")
+        assert matches
+        assert all(category in ("starters", "mains") for category, _ in matches)
+        assert "Seared Salmon Bowl" in [item["name"] for _, item in matches]
+        assert find_menu_item("thanks dude") == []
+
     def test_empty_message_handled(self):
         """Test Tobi handles empty messages gracefully."""
         response = get_tobi_response("", is_vip=False)
@@ -177,3 +189,75 @@ class TestTobiAsyncFunctions:
         from app.tobi_ai import get_tobi_response_async
 
         assert callable(get_tobi_response_async)
+
+
+@pytest.mark.asyncio
+class TestStreamTobiResponse:
+    """Test streamed responses for the WebSocket channel."""
+
+    async def collect(self, prompt, **kwargs):
+        from app.tobi_ai import stream_tobi_response
+
+        return [chunk async for chunk in stream_tobi_response(prompt, **kwargs)]
+
+    async def test_template_mode_yields_whole_response(self):
+        chunks = await self.collect("what burgers do you have?")
+        assert len(chunks) == 1
+        assert "burger" in chunks[0].lower()
+
+    async def test_streams_llama_server_tokens(self, monkeypatch):
+        import httpx
+
+        from app.tobi_ai import build_chat_prompt
+        from app.tracing import trace
+
+        requests = []
+        body = (
+            'data: {"content": " Hey", "stop": false}\n\n'
+            'data: {"content": " dude!", "stop": false}\n\n'
+            'data: {"content": "", "stop": true}\n\n'
+        )
+
+        def handler(request):
+            if request.url.path == "/tokenize":
+                return httpx.Response(200, json={"tokens": list(range(len(json.loads(request.content)["content"])))})
+            requests.append(request)
+            return httpx.Response(200, text=body)
+
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw)
+        )
+        monkeypatch.setattr("app.tobi_ai.settings.use_local_ai", True)
+        monkeypatch.setattr("app.tobi_ai.settings.llama_server_url", "http://llama")
+        monkeypatch.setattr("app.tracing.settings.tracing_enabled", True)
+
+        history = (("Customer", "hi"), ("Tobi", "Yo!"))
+        with trace("turn") as root:
+            chunks = await self.collect("burgers?", history=history)
+
+        assert chunks == ["Hey", " dude!"]
+        stages = [s.name for s in root.trace.spans]
+        assert stages[1:3] == ["prompt_build", "find_menu_item"]
+        assert stages[-2:] == ["llm_wait", "llm_generate"]
+        sent = json.loads(requests[0].content)
+        assert sent["stream"] is True
+        assert sent["prompt"] == await build_chat_prompt("burgers?", False, history)
+        assert "Customer: hi\nTobi: Yo!\nCustomer: burgers?\nTobi:" in sent["prompt"]
+
+    async def test_falls_back_to_template_when_server_down(self, monkeypatch):
+        import httpx
+
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw)
+        )
+        monkeypatch.setattr("app.tobi_ai.settings.use_local_ai", True)
+        monkeypatch.setattr("app.tobi_ai.settings.llama_server_url", "http://llama")
+
+        chunks = await self.collect("hello")
+        assert len(chunks) == 1
+        assert chunks[0]
@@ -0,0 +1,176 @@
+"""
+Test suite for in-process request tracing.
+"""
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.database import Database, get_db
+from app.main import app
+from app.tracing import TraceBuffer, TracingMiddleware, record_span, span, trace, traced, traces
+
+# The middleware is only installed when TRACING_ENABLED is set at startup; wrap the app directly instead
+client = TestClient(TracingMiddleware(app))
+
+
+@pytest.fixture(autouse=True)
+def fresh_traces(monkeypatch, memory_db):
+    monkeypatch.setattr("app.tracing.settings.tracing_enabled", True)
+    monkeypatch.setattr("app.main.settings.debug_token", None)
+    traces.clear()
+    app.dependency_overrides[get_db] = lambda: memory_db
+    yield traces
+    app.dependency_overrides.pop(get_db, None)
+    traces.clear()
+
+
+def span_names(found) -> list[str]:
+    return [s.name for s in found.spans]
+
+
+class TestSpans:
+    """Test span nesting, errors and the no-trace fast path."""
+
+    def test_span_outside_trace_is_noop(self):
+        with span("orphan") as orphan:
+            assert orphan is None
+        record_span("orphan", time.time_ns())
+        assert len(traces) == 0
+
+    def test_nested_spans_and_parents(self):
+        with trace("root") as root:
+            with span("outer") as outer:
+                with span("inner", rows=3) as inner:
+                    pass
+        assert inner.parent_id == outer.span_id
+        assert outer.parent_id == root.span_id
+        finished = traces.recent()[0]
+        assert span_names(finished) == ["root", "outer", "inner"]
+        assert finished.to_dict()["spans"][2]["attributes"] == {"rows": 3}
+
+    def test_error_recorded_and_reraised(self):
+        with pytest.raises(KeyError):
+            with trace("root"):
+                with span("lookup"):
+                    raise KeyError("missing")
+        summary = traces.recent()[0].to_dict()
+        assert summary["error"] == "KeyError: 'missing'"
+        assert summary["spans"][1]["error"] == "KeyError: 'missing'"
+
+    def test_traced_decorator(self):
+        @traced("double")
+        def double(x):
+            return x * 2
+
+        assert double(2) == 4  # Outside a trace
+        with trace("root"):
+            assert double(3) == 6
+        assert span_names(traces.recent()[0]) == ["root", "double"]
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr("app.tracing.settings.tracing_enabled", False)
+        with trace("root") as root:
+            assert root is None
+        assert len(traces) == 0
+
+    def test_breakdown_sums_per_stage(self):
+        with trace("root"):
+            start = time.time_ns()
+            record_span("db.query", start - 2_000_000, start)
+            record_span("db.query", start - 3_000_000, start)
+        assert traces.recent()[0].to_dict()["breakdown"] == {"db.query": 5.0}
+
+
+class TestTraceBuffer:
+    """Test the ring buffer and the OTLP file export."""
+
+    def test_oldest_dropped(self, monkeypatch):
+        buffer = TraceBuffer(max_traces=2)
+        monkeypatch.setattr("app.tracing.traces", buffer)
+        for name in ("a", "b", "c"):
+            with trace(name):
+                pass
+        assert [t.root.name for t in buffer.recent()] == ["c", "b"]
+
+    def test_min_duration_filter(self):
+        with trace("fast"):
+            pass
+        with trace("slow") as root:
+            root.start_ns -= 50_000_000
+        assert [t.root.name for t in traces.recent(min_duration_ms=40)] == ["slow"]
+
+    def test_export_otlp_lines(self, monkeypatch, tmp_path):
+        export = tmp_path / "traces.jsonl"
+        monkeypatch.setattr("app.tracing.settings.tracing_export_file", str(export))
+        monkeypatch.setattr("app.tracing.traces", TraceBuffer())
+        with trace("GET /menu", **{"http.status_code": 200}):
+            with span("db.query"):
+                pass
+
+        deadline = time.monotonic() + 5
+        while not export.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        request = json.loads(export.read_text().splitlines()[0])
+        scope = request["resourceSpans"][0]["scopeSpans"][0]
+        root, child = scope["spans"]
+        assert root["kind"] == 2 and "parentSpanId" not in root
+        assert child["parentSpanId"] == root["spanId"] and child["traceId"] == root["traceId"]
+        assert root["attributes"] == [{"key": "http.status_code", "value": {"intValue": "200"}}]
+        assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+
+
+class TestRequestTraces:
+    """Test traces of real requests and the /debug/traces endpoints."""
+
+    def test_chat_stages(self):
+        response = client.post("/chat", json={"message": "what burgers do you have?"})
+        assert response.status_code == 200
+
+        listed = client.get("/debug/traces").json()
+        assert len(listed) == 1  # /debug/ itself is not traced
+        chat = listed[0]
+        assert chat["name"] == "POST /chat"
+        assert chat["attributes"]["http.status_code"] == 200
+        assert {"validate", "magic_password", "intent_routing", "find_menu_item"} <= set(chat["breakdown"])
+
+        one = client.get(f"/debug/traces/{chat['trace_id']}").json()
+        assert one["spans"] == chat["spans"]
+
+    def test_unknown_trace(self):
+        assert client.get("/debug/traces/nope").status_code == 404
+
+    def test_debug_token_required_when_configured(self, monkeypatch):
+        monkeypatch.setattr("app.main.settings.debug_token", "s3cret")
+        assert client.get("/debug/traces").status_code == 403
+        assert client.get("/debug/traces", headers={"X-Debug-Token": "wrong"}).status_code == 403
+        assert client.get("/debug/traces/nope").status_code == 403
+        assert client.get("/debug/profiles").status_code == 403
+        assert client.get("/debug/traces", headers={"X-Debug-Token": "s3cret"}).status_code == 200
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("TRACING_ENABLED", raising=False)
+        assert Settings(_env_file=None).tracing_enabled is False
+
+    def test_health_not_traced(self):
+        client.get("/health/live")
+        assert len(traces) == 0
+
+    def test_websocket_turn_traced(self):
+        with client.websocket_connect("/ws/chat") as ws:
+            ws.receive_json()
+            ws.send_json({"message": "hello"})
+            while ws.receive_json()["type"] != "end":
+                pass
+        turn = traces.recent()[0]
+        assert turn.root.name == "WS /ws/chat"
+        assert {"validate", "magic_password", "intent_routing"} <= set(span_names(turn))
+
+    def test_sqlite_stages(self, tmp_path):
+        db = Database(tmp_path / "orders.db")
+        with trace("root"):
+            db.create_order(1, "s", [{"name": "Negroni", "price": 13.0, "quantity": 1}], 13.0)
+        assert span_names(traces.recent()[0]) == ["root", "db.connect", "db.query", "db.commit"]